@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import math
+import time
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from core.detector import unpack_detections
+from utils.defines import (
+    MODEL_INPUT_SIZE,
+    ADAPTIVE_LATENCY_HIGH_MS,
+    ADAPTIVE_LATENCY_LOW_MS,
+    ADAPTIVE_TEMP_HIGH_C,
+    ADAPTIVE_TEMP_LOW_C,
+    ADAPTIVE_HOLD_SECONDS,
+    ADAPTIVE_UP_FRAMES,
+    ADAPTIVE_SENSOR_INTERVAL,
+    ADAPTIVE_PROBE_RUNS,
+    SOC_TEMP_FILE,
+    SOC_THROTTLED_FILE,
+)
+from utils.log import log_info
+
+# get_throttled bits: ARM frequency capped, currently throttled, soft temperature limit
+THROTTLED_NOW_MASK = 0x2 | 0x4 | 0x8
+
+
+def read_soc_temperature():
+    """SoC temperature in degrees Celsius, or ``None`` when unavailable."""
+    try:
+        return int(SOC_TEMP_FILE.read_text()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def read_throttled():
+    """True while the Raspberry Pi firmware reports throttling, ``None`` when unknown."""
+    try:
+        return bool(int(SOC_THROTTLED_FILE.read_text(), 16) & THROTTLED_NOW_MASK)
+    except (OSError, ValueError):
+        return None
+
+
+class AdaptiveDetector:
+    """
+    Switches between preloaded ``(detector, input size)`` rungs at runtime.
+
+    Rung 0 is the most accurate.  Each rung's latency is measured at startup
+    so the cost of stepping up can be predicted from the current moving
+    average; see ``ADAPTIVE_LADDER`` for the switching rules.
+    """
+
+    def __init__(self, rungs):
+        if not rungs:
+            raise ValueError("AdaptiveDetector needs at least one rung")
+        self.rungs = rungs
+        self.rung = 0
+        self.alert = False
+        self.latency_ms = None
+        self.headroom_frames = 0
+        self.switched = time.monotonic()
+        self.sensor_checked = 0.0
+        self.hot = False
+        self.baseline_ms = [self._probe(detector, imgsz) for detector, imgsz in rungs]
+        log_info("Adaptive ladder: " + ", ".join(
+            f"{getattr(detector, 'model_path', '?')}@{imgsz} {ms:.0f} ms"
+            for (detector, imgsz), ms in zip(rungs, self.baseline_ms)))
+
+    @staticmethod
+    def _probe(detector, imgsz):
+        blank = np.zeros((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.uint8)
+        detector.detect_packed(blank, imgsz)
+        start = time.perf_counter()
+        for _ in range(ADAPTIVE_PROBE_RUNS):
+            detector.detect_packed(blank, imgsz)
+        return (time.perf_counter() - start) * 1000 / ADAPTIVE_PROBE_RUNS
+
+    def set_alert(self, active):
+        """Tell the ladder whether an alert is active, which favours accuracy."""
+        self.alert = active
+
+    def _read_sensors(self):
+        now = time.monotonic()
+        if now - self.sensor_checked < ADAPTIVE_SENSOR_INTERVAL:
+            return
+        self.sensor_checked = now
+        temperature = read_soc_temperature()
+        throttled = read_throttled()
+        if throttled or (temperature is not None and temperature >= ADAPTIVE_TEMP_HIGH_C):
+            self.hot = True
+        elif not throttled and (temperature is None or temperature <= ADAPTIVE_TEMP_LOW_C):
+            self.hot = False
+
+    def _switch(self, rung, reason):
+        log_info(f"Adaptive ladder: rung {self.rung} -> {rung} ({reason})")
+        # Start the new rung from its predicted latency rather than the old one's
+        self.latency_ms *= self.baseline_ms[rung] / self.baseline_ms[self.rung]
+        self.rung = rung
+        self.switched = time.monotonic()
+        self.headroom_frames = 0
+
+    def _adapt(self):
+        self._read_sensors()
+        if time.monotonic() - self.switched < ADAPTIVE_HOLD_SECONDS:
+            return
+        last = len(self.rungs) - 1
+
+        if self.rung < last:
+            if self.hot:
+                self._switch(self.rung + 1, "SoC hot or throttled")
+                return
+            if not self.alert and self.latency_ms > ADAPTIVE_LATENCY_HIGH_MS:
+                self._switch(self.rung + 1, f"latency {self.latency_ms:.0f} ms")
+                return
+
+        if self.rung > 0 and not self.hot:
+            predicted = self.latency_ms * self.baseline_ms[self.rung - 1] / self.baseline_ms[self.rung]
+            # During an alert any rung that keeps up is acceptable
+            limit = ADAPTIVE_LATENCY_HIGH_MS if self.alert else ADAPTIVE_LATENCY_LOW_MS
+            self.headroom_frames = self.headroom_frames + 1 if predicted < limit else 0
+            if self.headroom_frames >= ADAPTIVE_UP_FRAMES:
+                self._switch(self.rung - 1, f"headroom, predicted {predicted:.0f} ms")
+
+    def warmup(self, runs=None):
+        """Every rung is warmed up while its latency is probed."""
+
+    def status(self):
+        return {
+            "rung": self.rung,
+            "rungs": [{"model": str(getattr(detector, "model_path", "?")), "imgsz": imgsz,
+                       "baseline_ms": round(ms, 1)}
+                      for (detector, imgsz), ms in zip(self.rungs, self.baseline_ms)],
+        }
+
+    def _rung_input(self, imgsz):
+        detector, rung_size = self.rungs[self.rung]
+        if imgsz is not None and not isinstance(imgsz, int):
+            # Scale rectangular inputs (ROI crops, cascade tiles) to the rung
+            scale = rung_size / MODEL_INPUT_SIZE
+            return detector, tuple(max(32, math.ceil(side * scale / 32) * 32) for side in imgsz)
+        return detector, rung_size
+
+    def detect_packed(self, frame, imgsz=None):
+        detector, imgsz = self._rung_input(imgsz)
+        start = time.perf_counter()
+        packed = detector.detect_packed(frame, imgsz)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latency_ms = elapsed if self.latency_ms is None else 0.9 * self.latency_ms + 0.1 * elapsed
+        self._adapt()
+        return packed
+
+    def detect_extra(self, frame, imgsz=None):
+        """Inference on the current rung outside the per-frame pass (cascade tiles), not timed."""
+        detector, imgsz = self._rung_input(imgsz)
+        return detector.detect_packed(frame, imgsz)
+
+    def detect_humans(self, frame):
+        return unpack_detections(self.detect_packed(frame))
+
+    def close(self):
+        closed = set()
+        for detector, _ in self.rungs:
+            if id(detector) not in closed and hasattr(detector, "close"):
+                detector.close()
+            closed.add(id(detector))
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import time
+import cv2
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from utils.boxes import nms
+from utils.defines import (
+    FACE_CLASS_ID,
+    PHONE_CLASS_ID,
+    CONFIDENCE_THRESHOLD_FACE,
+    LETTERBOX_COLOR,
+    CASCADE_TILE_SIZE,
+    CASCADE_MAX_TILES,
+    CASCADE_CROP_SIDE,
+    CASCADE_CROP_ABOVE,
+    CASCADE_CROP_BELOW,
+    CASCADE_STAGE1_BUDGET_MS,
+    CASCADE_STAGE2_BUDGET_MS,
+    CASCADE_NMS_IOU,
+)
+
+
+class PhoneCascade:
+    """
+    Second detection stage that looks for phones around detected faces.
+
+    ``refine`` takes the packed stage-1 detections of a frame, cuts the region
+    around and below each confident face out of the full-resolution frame and
+    runs the phone detector on all of them at once as a row of tiles.  Phones
+    found there are merged with the stage-1 phones by NMS; everything else is
+    kept from stage 1.
+    """
+
+    def __init__(self, phone_detector, tile_size=CASCADE_TILE_SIZE, max_tiles=CASCADE_MAX_TILES):
+        self.phone_detector = phone_detector
+        # A shared main detector keeps tile inferences out of its per-frame statistics
+        self.detect = getattr(phone_detector, "detect_extra", phone_detector.detect_packed)
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.canvas = np.empty((tile_size, tile_size * max_tiles, 3), dtype=np.uint8)
+        self.tile_ms = None  # Moving average of the stage-2 cost per tile
+        self.last_crops = np.zeros((0, 4), dtype=int)
+        self.skipped = 0
+
+    def crops(self, faces, frame_shape):
+        """Return ``(K, 4)`` integer crop rectangles for the face boxes in ``faces``."""
+        height, width = frame_shape[:2]
+        face_w = faces[:, 2] - faces[:, 0]
+        face_h = faces[:, 3] - faces[:, 1]
+        crops = np.stack((
+            faces[:, 0] - face_w * CASCADE_CROP_SIDE,
+            faces[:, 1] - face_h * CASCADE_CROP_ABOVE,
+            faces[:, 2] + face_w * CASCADE_CROP_SIDE,
+            faces[:, 3] + face_h * CASCADE_CROP_BELOW,
+        ), axis=1)
+        crops = np.clip(crops, 0, [width, height, width, height]).astype(int)
+        return crops[(crops[:, 2] > crops[:, 0]) & (crops[:, 3] > crops[:, 1])]
+
+    def _tile_budget(self):
+        if self.tile_ms is None:
+            return self.max_tiles
+        return int(np.clip(CASCADE_STAGE2_BUDGET_MS // self.tile_ms, 1, self.max_tiles))
+
+    def refine(self, frame, packed, stage1_ms=None):
+        """Return ``packed`` with phones from the second stage merged in."""
+        self.last_crops = np.zeros((0, 4), dtype=int)
+        if stage1_ms is not None and stage1_ms > CASCADE_STAGE1_BUDGET_MS:
+            self.skipped += 1
+            return packed
+
+        faces = packed[(packed[:, 5] == FACE_CLASS_ID) & (packed[:, 4] > CONFIDENCE_THRESHOLD_FACE)]
+        faces = faces[np.argsort(-faces[:, 4], kind="stable")][:self._tile_budget()]
+        crops = self.crops(faces, frame.shape)
+        if not len(crops):
+            return packed
+
+        size = self.tile_size
+        canvas = self.canvas[:, :size * len(crops)]
+        canvas[:] = LETTERBOX_COLOR
+        scales = np.empty(len(crops), dtype=np.float32)
+        for i, (x1, y1, x2, y2) in enumerate(crops):
+            scale = size / max(x2 - x1, y2 - y1)
+            new_w = max(1, min(size, round((x2 - x1) * scale)))
+            new_h = max(1, min(size, round((y2 - y1) * scale)))
+            cv2.resize(frame[y1:y2, x1:x2], (new_w, new_h),
+                       dst=canvas[:new_h, i * size:i * size + new_w], interpolation=cv2.INTER_LINEAR)
+            scales[i] = scale
+
+        start = time.perf_counter()
+        phones = self.detect(canvas, (size, size * len(crops)))
+        elapsed = (time.perf_counter() - start) * 1000 / len(crops)
+        self.tile_ms = elapsed if self.tile_ms is None else 0.8 * self.tile_ms + 0.2 * elapsed
+        self.last_crops = crops
+
+        phones = phones[phones[:, 5] == PHONE_CLASS_ID]
+        if not len(phones):
+            return packed
+        # Assign each box to the tile holding its centre and map it back
+        tile = np.clip(((phones[:, 0] + phones[:, 2]) / 2 // size).astype(int), 0, len(crops) - 1)
+        offset = tile * size
+        phones[:, [0, 2]] = np.clip(phones[:, [0, 2]] - offset[:, None], 0, size)
+        phones[:, :4] /= scales[tile, None]
+        phones[:, [0, 2]] += crops[tile, 0, None]
+        phones[:, [1, 3]] += crops[tile, 1, None]
+        return nms(np.concatenate((packed, phones)), CASCADE_NMS_IOU)
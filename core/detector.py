@@ -3,8 +3,31 @@
 import sys
 sys.path.append('.')  # noqa
 
-from ultralytics import YOLO
-from utils.defines import NCNN_MODEL_PATH, CONFIDENCE_THRESHOLD
+from pathlib import Path
+import numpy as np
+from utils.defines import (
+    NCNN_MODEL_PATH,
+    CONFIDENCE_THRESHOLD,
+    MODEL_INPUT_SIZE,
+    WARMUP_RUNS,
+    THREAD_BUDGET,
+)
+
+
+def model_input_size(model_path):
+    """
+    Input size an NCNN export was made for, from its ``metadata.yaml``, as an
+    int or ``(height, width)``.  Falls back to ``MODEL_INPUT_SIZE``.
+    """
+    import yaml
+    try:
+        with open(Path(model_path) / "metadata.yaml") as f:
+            imgsz = yaml.safe_load(f).get("imgsz")
+    except (OSError, AttributeError, yaml.YAMLError):
+        return MODEL_INPUT_SIZE
+    if isinstance(imgsz, list) and len(imgsz) == 2:
+        return imgsz[0] if imgsz[0] == imgsz[1] else tuple(imgsz)
+    return imgsz if isinstance(imgsz, int) else MODEL_INPUT_SIZE
 
 
 class AIDetector:
@@ -12,17 +35,51 @@ class AIDetector:
     YOLOv11 detector using Ultralytics NCNN model.
     """
 
-    def __init__(self):
-        self.model = YOLO(NCNN_MODEL_PATH, task='detect')
+    def __init__(self, model_path=NCNN_MODEL_PATH, num_threads=THREAD_BUDGET["inference_threads"]):
+        # Imported here so that importing this module stays cheap; Ultralytics
+        # pulls in torch, which dominates startup time on the Pi.
+        from ultralytics import YOLO
+        self.model_path = model_path
+        self.model = YOLO(model_path, task='detect')
+        self.imgsz = model_input_size(model_path)
+        self.num_threads = num_threads
+        self._threads_applied = False
+
+    def _apply_num_threads(self):
+        # The NCNN net only exists once the predictor ran its first inference;
+        # extractors created afterwards pick up the new thread count.
+        predictor_model = getattr(self.model.predictor, "model", None)
+        net = getattr(predictor_model, "net", None)
+        if net is not None:
+            net.opt.num_threads = self.num_threads
+        self._threads_applied = True
+
+    def warmup(self, runs=WARMUP_RUNS):
+        """Run a few inferences so the first real frame is not slowed down."""
+        blank = np.zeros((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.detect_humans(blank)
+
+    def detect_packed(self, frame, imgsz=None, conf=CONFIDENCE_THRESHOLD):
+        """
+        Return detections as a float32 ``(N, 6)`` array of x1, y1, x2, y2,
+        conf, cls.  ``imgsz`` overrides the export's input size, either an
+        int or a ``(height, width)`` pair; ``conf`` is the minimum confidence.
+        """
+        results = self.model(frame, imgsz=imgsz or self.imgsz, conf=conf, verbose=False)
+        if not self._threads_applied:
+            self._apply_num_threads()
+        packed = [result.boxes.data.cpu().numpy() for result in results]
+        packed = np.concatenate(packed) if packed else np.zeros((0, 6), dtype=np.float32)
+        return packed[packed[:, 4] > conf].astype(np.float32, copy=False)
 
     def detect_humans(self, frame):
-        results = self.model(frame, verbose=False)
-        detections = []
-        for result in results:
-            for box in result.boxes:
-                if float(box.conf[0]) > CONFIDENCE_THRESHOLD:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    cls_id = int(box.cls[0])
-                    detections.append((x1, y1, x2, y2, conf, cls_id))
-        return detections
+        return unpack_detections(self.detect_packed(frame))
+
+
+def unpack_detections(packed):
+    """Convert a packed ``(N, 6)`` array to ``(x1, y1, x2, y2, conf, cls_id)`` tuples."""
+    boxes = packed[:, :4].astype(int).tolist()
+    confs = packed[:, 4].tolist()
+    classes = packed[:, 5].astype(int).tolist()
+    return [(*box, conf, cls_id) for box, conf, cls_id in zip(boxes, confs, classes)]
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""
+Out-of-process inference.
+
+``InferenceWorker`` runs ``AIDetector`` in a dedicated process so inference
+gets its cores without contending for the main process's GIL.  Frames are
+written into ``multiprocessing.shared_memory`` slots and packed detection
+arrays are read back from a second shared block; the pipe only carries small
+fixed-size control messages, so nothing is pickled per frame.
+"""
+import multiprocessing
+import struct
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from core.detector import unpack_detections
+from utils.defines import (
+    NCNN_MODEL_PATH,
+    THREAD_BUDGET,
+    WORKER_SLOTS,
+    WORKER_MAX_FRAME_SHAPE,
+    WORKER_MAX_DETECTIONS,
+    WORKER_START_TIMEOUT,
+    WORKER_RESULT_TIMEOUT,
+    WORKER_RESTART_BACKOFF,
+    WORKER_RESTART_MAX_BACKOFF,
+    WORKER_RESTART_NOTICE_AFTER,
+)
+from utils.log import log_info, log_error
+
+REQUEST = struct.Struct("<IIIIII")  # slot, height, width, seq, input height, input width
+REPLY = struct.Struct("<III")  # slot, detection count, seq
+READY = b"ready"
+STOP = b"stop"
+
+
+def _slot_views(shm, shape, dtype):
+    """Split a shared block into ``WORKER_SLOTS`` arrays of ``shape``."""
+    array = np.ndarray((WORKER_SLOTS, *shape), dtype=dtype, buffer=shm.buf)
+    return [array[i] for i in range(WORKER_SLOTS)]
+
+
+def _worker_main(conn, frames_name, results_name, model_path, budget):
+    from core.detector import AIDetector
+    from utils.thread_budget import apply_process_budget, apply_thread_role
+
+    apply_process_budget(budget)
+    apply_thread_role("inference", budget)
+    detector = AIDetector(model_path, budget["inference_threads"])
+    detector.warmup()
+
+    # Spawned children share the parent's resource tracker, which unlinks the
+    # blocks only when the parent does
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    results_shm = shared_memory.SharedMemory(name=results_name)
+    frames = _slot_views(frames_shm, WORKER_MAX_FRAME_SHAPE, np.uint8)
+    results = _slot_views(results_shm, (WORKER_MAX_DETECTIONS, 6), np.float32)
+    conn.send_bytes(READY)
+
+    try:
+        while True:
+            message = conn.recv_bytes()
+            if message == STOP:
+                break
+            slot, height, width, seq, input_h, input_w = REQUEST.unpack(message)
+            imgsz = (input_h, input_w) if input_h else None
+            packed = detector.detect_packed(frames[slot][:height, :width], imgsz)[:WORKER_MAX_DETECTIONS]
+            results[slot][:len(packed)] = packed
+            conn.send_bytes(REPLY.pack(slot, len(packed), seq))
+    except (EOFError, OSError):
+        pass
+    finally:
+        del frames, results
+        frames_shm.close()
+        results_shm.close()
+
+
+class InferenceWorker:
+    """
+    Supervised detector process with the same interface as ``AIDetector``.
+
+    If the worker crashes or stops answering it is restarted in the
+    background with exponential backoff; frames submitted meanwhile return no
+    detections.  ``notify(message, level)`` is called once restarts keep failing.
+    """
+
+    def __init__(self, model_path=NCNN_MODEL_PATH, budget=THREAD_BUDGET, notify=None):
+        self.model_path = model_path
+        self.budget = budget
+        self.notify = notify
+        self.ctx = multiprocessing.get_context("spawn")
+        frame_bytes = int(np.prod(WORKER_MAX_FRAME_SHAPE))
+        self.frames_shm = shared_memory.SharedMemory(create=True, size=WORKER_SLOTS * frame_bytes)
+        self.results_shm = shared_memory.SharedMemory(
+            create=True, size=WORKER_SLOTS * WORKER_MAX_DETECTIONS * 6 * 4)
+        self.frames = _slot_views(self.frames_shm, WORKER_MAX_FRAME_SHAPE, np.uint8)
+        self.results = _slot_views(self.results_shm, (WORKER_MAX_DETECTIONS, 6), np.float32)
+        self.slot = 0
+        self.seq = 0
+        self.conn = None
+        self.process = None
+        self.restarting = threading.Lock()
+        self.stopping = threading.Event()
+        self.closed = False
+        self._start_worker()
+
+    def _start_worker(self):
+        conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.frames_shm.name, self.results_shm.name, self.model_path, self.budget),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        try:
+            ready = conn.poll(WORKER_START_TIMEOUT) and conn.recv_bytes() == READY
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            process.kill()
+            raise RuntimeError("Inference worker failed to start")
+        self.conn, self.process = conn, process
+        log_info(f"Inference worker ready (pid {process.pid})")
+
+    def _restart(self):
+        if not self.restarting.acquire(blocking=False):
+            return
+        if self.process is not None:
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.conn = self.process = None
+
+        def restart():
+            failures = 0
+            delay = WORKER_RESTART_BACKOFF
+            try:
+                while not self.closed:
+                    try:
+                        self._start_worker()
+                        return
+                    except RuntimeError as e:
+                        failures += 1
+                        log_error(f"Inference worker restart failed ({failures}x, retrying in {delay:.0f} s): {e}")
+                        if failures == WORKER_RESTART_NOTICE_AFTER and self.notify is not None:
+                            self.notify("Detection offline: model failed to load", "critical")
+                    if self.stopping.wait(delay):
+                        return
+                    delay = min(delay * 2, WORKER_RESTART_MAX_BACKOFF)
+            finally:
+                self.restarting.release()
+
+        threading.Thread(target=restart, daemon=True).start()
+
+    def warmup(self, runs=None):
+        """The worker warms up its model before reporting ready."""
+
+    def detect_packed(self, frame, imgsz=None):
+        conn = self.conn
+        if conn is None:
+            return np.zeros((0, 6), dtype=np.float32)
+        height, width = frame.shape[:2]
+        if height > WORKER_MAX_FRAME_SHAPE[0] or width > WORKER_MAX_FRAME_SHAPE[1]:
+            raise ValueError(f"Frame {width}x{height} exceeds WORKER_MAX_FRAME_SHAPE")
+
+        slot = self.slot
+        self.slot = (slot + 1) % WORKER_SLOTS
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self.frames[slot][:height, :width] = frame
+        try:
+            if imgsz is None:
+                input_h = input_w = 0
+            elif isinstance(imgsz, int):
+                input_h = input_w = imgsz
+            else:
+                input_h, input_w = imgsz
+            conn.send_bytes(REQUEST.pack(slot, height, width, self.seq, input_h, input_w))
+            while conn.poll(WORKER_RESULT_TIMEOUT):
+                reply_slot, count, seq = REPLY.unpack(conn.recv_bytes())
+                if seq == self.seq:
+                    return self.results[reply_slot][:count].copy()
+            log_error("Inference worker timed out, restarting")
+        except (EOFError, OSError) as e:
+            log_error(f"Inference worker crashed ({e}), restarting")
+        self._restart()
+        return np.zeros((0, 6), dtype=np.float32)
+
+    def detect_humans(self, frame):
+        return unpack_detections(self.detect_packed(frame))
+
+    def close(self):
+        self.closed = True
+        self.stopping.set()
+        if self.conn is not None:
+            try:
+                self.conn.send_bytes(STOP)
+            except OSError:
+                pass
+        if self.process is not None:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+        del self.frames, self.results
+        self.frames_shm.close()
+        self.frames_shm.unlink()
+        self.results_shm.close()
+        self.results_shm.unlink()
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+"""
+Zero-downtime model hot swap.
+
+``ModelManager`` wraps the running detector with the same interface.  A new
+model is loaded, warmed up and validated on a background thread while the
+current one keeps serving frames; the swap itself is a reference assignment
+made on the inference thread between two frames.
+"""
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from core.detector import unpack_detections
+from utils.boxes import box_iou
+from utils.defines import (
+    NCNN_MODEL_PATH,
+    MODEL_WATCH_DIR,
+    MODEL_WATCH_INTERVAL,
+    ACTIVE_MODEL_FILE,
+    MODEL_VALIDATE_FRAMES,
+    MODEL_VALIDATE_MIN_FRAMES,
+    MODEL_VALIDATE_SAMPLE_INTERVAL,
+    MODEL_VALIDATE_MIN_AGREEMENT,
+    MODEL_VALIDATE_MAX_SLOWDOWN,
+)
+from utils.log import log_info, log_warning, log_error
+from utils.thread_budget import apply_thread_role
+
+NCNN_FILES = ("model.ncnn.param", "model.ncnn.bin")
+
+
+def active_model_path():
+    """Model path recorded by the last swap, or ``NCNN_MODEL_PATH``."""
+    try:
+        path = Path(ACTIVE_MODEL_FILE.read_text().strip())
+    except OSError:
+        return NCNN_MODEL_PATH
+    if all((path / name).exists() for name in NCNN_FILES):
+        return path
+    log_warning(f"Recorded model {path} is missing, using {NCNN_MODEL_PATH}")
+    return NCNN_MODEL_PATH
+
+
+def record_active_model(path):
+    """Write the active model path atomically so the next start uses it."""
+    ACTIVE_MODEL_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ACTIVE_MODEL_FILE.with_suffix(".tmp")
+    tmp.write_text(f"{path}\n")
+    os.replace(tmp, ACTIVE_MODEL_FILE)
+
+
+def agreement(reference, packed):
+    """Fraction of boxes matched by class at IoU >= 0.5 between two results."""
+    if len(reference) == 0 and len(packed) == 0:
+        return 1.0
+    iou = box_iou(reference, packed)
+    iou[reference[:, 5, None] != packed[None, :, 5]] = 0
+    matched = np.count_nonzero(iou.max(axis=1) >= 0.5) if len(packed) else 0
+    return matched / max(len(reference), len(packed))
+
+
+class ModelManager:
+    """
+    Running detector plus the machinery to replace it without a gap.
+
+    ``factory(path)`` loads and warms up a detector.  Candidates come from
+    ``request(path)`` (the admin route) or from the directory watcher.
+    """
+
+    def __init__(self, detector, factory, model_path):
+        self.active = detector
+        self.active_path = Path(model_path)
+        self.previous = None
+        self.previous_path = None
+        self.factory = factory
+        self.pending = None  # (detector, path) validated and waiting for the next frame
+        self.rollback_requested = False
+        self.samples = deque(maxlen=MODEL_VALIDATE_FRAMES)  # (frame, imgsz, packed)
+        self.calls = 0
+        self.latency_ms = None
+        self.state = "idle"
+        self.last_error = None
+        self.loading = threading.Lock()
+        self.seen = {}  # watched export path -> mtime already handled
+        self.stopped = False
+
+    # ---- inference thread -------------------------------------------------
+
+    def _apply_pending(self):
+        if self.rollback_requested:
+            self.rollback_requested = False
+            if self.previous is not None:
+                self.active, self.previous = self.previous, self.active
+                self.active_path, self.previous_path = self.previous_path, self.active_path
+                self.latency_ms = None
+                self._record()
+                log_info(f"Rolled back to model {self.active_path}")
+        pending = self.pending
+        if pending is not None:
+            self.pending = None
+            self.loading.release()
+            retired = self.previous
+            self.previous, self.previous_path = self.active, self.active_path
+            self.active, self.active_path = pending
+            self.latency_ms = None
+            self.state = "idle"
+            self._record()
+            log_info(f"Swapped in model {self.active_path} (previous kept for rollback)")
+            if retired is not None and hasattr(retired, "close"):
+                threading.Thread(target=retired.close, daemon=True).start()
+
+    def _record(self):
+        try:
+            record_active_model(self.active_path)
+        except OSError as e:
+            log_warning(f"Could not record active model: {e}")
+
+    def detect_packed(self, frame, imgsz=None):
+        if self.pending is not None or self.rollback_requested:
+            self._apply_pending()
+        start = time.perf_counter()
+        packed = self.active.detect_packed(frame, imgsz)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latency_ms = elapsed if self.latency_ms is None else 0.9 * self.latency_ms + 0.1 * elapsed
+
+        self.calls += 1
+        if self.calls % MODEL_VALIDATE_SAMPLE_INTERVAL == 1:
+            self.samples.append((frame.copy(), imgsz, packed.copy()))
+        return packed
+
+    def detect_extra(self, frame, imgsz=None):
+        """
+        Inference outside the per-frame pass (cascade tiles), kept out of the
+        latency average and validation samples.
+        """
+        if hasattr(self.active, "detect_extra"):
+            return self.active.detect_extra(frame, imgsz)
+        return self.active.detect_packed(frame, imgsz)
+
+    def detect_humans(self, frame):
+        return unpack_detections(self.detect_packed(frame))
+
+    def warmup(self, runs=None):
+        """The active model is warmed up by the factory."""
+
+    def set_alert(self, active):
+        if hasattr(self.active, "set_alert"):
+            self.active.set_alert(active)
+
+    # ---- background loading -----------------------------------------------
+
+    def validate(self, detector):
+        """Raise ``ValueError`` if ``detector`` disagrees with or is much slower than the active model."""
+        samples = list(self.samples)
+        if len(samples) < MODEL_VALIDATE_MIN_FRAMES:
+            raise ValueError(f"only {len(samples)} of {MODEL_VALIDATE_MIN_FRAMES} validation frames recorded yet")
+        scores = []
+        start = time.perf_counter()
+        for frame, imgsz, reference in samples:
+            packed = detector.detect_packed(frame, imgsz)
+            if packed.ndim != 2 or packed.shape[1] != 6:
+                raise ValueError(f"Unexpected output shape {packed.shape}")
+            scores.append(agreement(reference, packed))
+        latency = (time.perf_counter() - start) * 1000 / len(samples)
+        score = float(np.mean(scores))
+        log_info(f"Candidate model: agreement {score:.2f}, {latency:.0f} ms "
+                 f"(running model {self.latency_ms or 0:.0f} ms)")
+        if score < MODEL_VALIDATE_MIN_AGREEMENT:
+            raise ValueError(f"agreement {score:.2f} below {MODEL_VALIDATE_MIN_AGREEMENT}")
+        if self.latency_ms and latency > self.latency_ms * MODEL_VALIDATE_MAX_SLOWDOWN:
+            raise ValueError(f"latency {latency:.0f} ms exceeds {MODEL_VALIDATE_MAX_SLOWDOWN}x "
+                             f"the running model")
+
+    def _load(self, path):
+        try:
+            self.state = f"loading {path}"
+            apply_thread_role("background")
+            detector = self.factory(path)
+            self.state = f"validating {path}"
+            # Measured on the inference cores so its latency compares with the running model
+            apply_thread_role("inference")
+            try:
+                self.validate(detector)
+            except Exception:
+                if hasattr(detector, "close"):
+                    detector.close()
+                raise
+            self.state = f"swapping {path}"
+            self.last_error = None
+            # ``loading`` stays held until the inference thread takes the candidate
+            self.pending = (detector, path)
+        except Exception as e:
+            self.state = "idle"
+            self.last_error = f"{path}: {e}"
+            log_error(f"Model {path} rejected: {e}")
+            self.loading.release()
+
+    def request(self, path):
+        """
+        Start loading ``path`` in the background.  Returns False when another
+        load is running or waiting to be swapped in, or the export is incomplete.
+        """
+        path = Path(path)
+        if not all((path / name).exists() for name in NCNN_FILES):
+            self.last_error = f"{path}: not an NCNN export"
+            return False
+        if not self.loading.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._load, args=(path,), daemon=True).start()
+        return True
+
+    def rollback(self):
+        """Swap the previous model back in before the next frame."""
+        if self.previous is None:
+            return False
+        self.rollback_requested = True
+        return True
+
+    def status(self):
+        status = {
+            "active": str(self.active_path),
+            "previous": None if self.previous_path is None else str(self.previous_path),
+            "state": self.state,
+            "latency_ms": None if self.latency_ms is None else round(self.latency_ms, 1),
+            "last_error": self.last_error,
+        }
+        # An adaptive ladder serves the active model from several rungs
+        if hasattr(self.active, "status"):
+            ladder = self.active.status()
+            status["ladder"] = ladder
+            status["serving"] = "{model}@{imgsz}".format(**ladder["rungs"][ladder["rung"]])
+        return status
+
+    # ---- directory watcher ------------------------------------------------
+
+    def _scan(self):
+        """Return the newest settled NCNN export in the watch directory not yet handled."""
+        newest = None
+        now = time.time()
+        for path in MODEL_WATCH_DIR.glob("*_ncnn_model"):
+            try:
+                mtime = max((path / name).stat().st_mtime for name in NCNN_FILES)
+            except OSError:
+                continue
+            # Skip exports still being copied and ones already tried
+            if now - mtime < MODEL_WATCH_INTERVAL or self.seen.get(path) == mtime:
+                continue
+            if newest is None or mtime > newest[1]:
+                newest = (path, mtime)
+        return newest
+
+    def _watch(self):
+        apply_thread_role("background")
+        while not self.stopped:
+            time.sleep(MODEL_WATCH_INTERVAL)
+            # Defer candidates until enough frames have been recorded to validate them
+            if len(self.samples) < MODEL_VALIDATE_MIN_FRAMES:
+                continue
+            candidate = self._scan()
+            if candidate is None or candidate[0] == self.active_path:
+                continue
+            path, mtime = candidate
+            if self.request(path):
+                self.seen[path] = mtime
+
+    def start_watching(self):
+        # Exports present at startup are not candidates
+        for path in MODEL_WATCH_DIR.glob("*_ncnn_model"):
+            try:
+                self.seen[path] = max((path / name).stat().st_mtime for name in NCNN_FILES)
+            except OSError:
+                pass
+        threading.Thread(target=self._watch, daemon=True).start()
+        return self
+
+    def close(self):
+        self.stopped = True
+        for detector in (self.active, self.previous, self.pending and self.pending[0]):
+            if detector and hasattr(detector, "close"):
+                detector.close()
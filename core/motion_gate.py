@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import cv2
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import (
+    MOTION_WIDTH,
+    MOTION_PIXEL_THRESHOLD,
+    MOTION_AREA_THRESHOLD,
+    MOTION_IDLE_INTERVAL,
+)
+
+
+class MotionGate:
+    """
+    Decides whether the detector needs to run on a frame.
+
+    The frame is compared, downsampled and in grayscale, with the frame seen
+    at the last inference, so slow changes accumulate until they count as
+    motion.  Inference always runs when something changed or an operator or
+    alert is active, and every ``MOTION_IDLE_INTERVAL`` frames otherwise.
+    """
+
+    def __init__(self, idle_interval=MOTION_IDLE_INTERVAL):
+        self.idle_interval = idle_interval
+        self.reference = None
+        self.skipped = 0
+
+    def _downsample(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height = max(1, round(gray.shape[0] * MOTION_WIDTH / gray.shape[1]))
+        return cv2.resize(gray, (MOTION_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+    def motion(self, small):
+        """Return True when ``small`` differs enough from the reference frame."""
+        if self.reference is None or self.reference.shape != small.shape:
+            return True
+        diff = cv2.absdiff(small, self.reference)
+        changed = np.count_nonzero(diff > MOTION_PIXEL_THRESHOLD)
+        return changed > MOTION_AREA_THRESHOLD * diff.size
+
+    def should_infer(self, frame, active):
+        """
+        Return True if the detector should run on ``frame``.  ``active`` is
+        set while an operator is tracked or an alert is held.
+        """
+        small = self._downsample(frame)
+        if active or self.skipped + 1 >= self.idle_interval or self.motion(small):
+            self.reference = small
+            self.skipped = 0
+            return True
+        self.skipped += 1
+        return False
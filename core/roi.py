@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import math
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from core.detector import unpack_detections
+from utils.defines import (
+    MODEL_INPUT_SIZE,
+    ROI_FULL_FRAME_INTERVAL,
+    ROI_ZONE_MARGIN,
+    ROI_BOX_EXPAND,
+    ROI_MAX_AREA,
+    FACE_CLASS_ID,
+    PHONE_CLASS_ID,
+)
+
+STRIDE = 32
+
+
+class RoiDetector:
+    """
+    Runs a detector on the part of the frame that matters.
+
+    The crop is the bounding rectangle of the zones (plus
+    ``ROI_ZONE_MARGIN``) and the last-known face and phone boxes, each grown
+    by ``ROI_BOX_EXPAND``.  It is cut from the native frame and never
+    upscaled, so small faces and phones keep more pixels than in a
+    full-frame pass, and it is fed to the model at a rectangular input size
+    matching its aspect.  A full frame is processed every
+    ``ROI_FULL_FRAME_INTERVAL`` frames and whenever there is nothing to
+    crop around.
+    """
+
+    def __init__(self, detector, full_frame_interval=ROI_FULL_FRAME_INTERVAL):
+        self.detector = detector
+        self.full_frame_interval = full_frame_interval
+        self.last_boxes = np.zeros((0, 4), dtype=np.float32)
+        self.since_full = full_frame_interval
+        self.last_region = None
+
+    def region(self, frame_shape, zone_rect):
+        """Return the crop ``(x1, y1, x2, y2)``, or ``None`` for a full-frame pass."""
+        height, width = frame_shape[:2]
+        rects = []
+        if zone_rect is not None:
+            x1, y1, x2, y2 = zone_rect
+            margin = ROI_ZONE_MARGIN * width
+            rects.append([x1 - margin, y1 - margin, x2 + margin, y2 + margin])
+        if len(self.last_boxes):
+            boxes = self.last_boxes
+            grow = (boxes[:, 2:] - boxes[:, :2]) * ROI_BOX_EXPAND
+            rects.extend(np.hstack((boxes[:, :2] - grow, boxes[:, 2:] + grow)).tolist())
+        if not rects:
+            return None
+
+        rects = np.array(rects)
+        x1 = max(0, int(rects[:, 0].min()))
+        y1 = max(0, int(rects[:, 1].min()))
+        x2 = min(width, int(math.ceil(rects[:, 2].max())))
+        y2 = min(height, int(math.ceil(rects[:, 3].max())))
+        if x2 <= x1 or y2 <= y1 or (x2 - x1) * (y2 - y1) > ROI_MAX_AREA * width * height:
+            return None
+        return x1, y1, x2, y2
+
+    @staticmethod
+    def input_size(width, height):
+        """Model input ``(height, width)`` for a crop: long side capped, never upscaled."""
+        scale = min(1.0, MODEL_INPUT_SIZE / max(width, height))
+        return (max(STRIDE, math.ceil(height * scale / STRIDE) * STRIDE),
+                max(STRIDE, math.ceil(width * scale / STRIDE) * STRIDE))
+
+    def detect_packed(self, frame, zone_rect=None):
+        region = None
+        if self.since_full + 1 < self.full_frame_interval:
+            region = self.region(frame.shape, zone_rect)
+        self.last_region = region
+
+        if region is None:
+            packed = self.detector.detect_packed(frame)
+            self.since_full = 0
+        else:
+            x1, y1, x2, y2 = region
+            packed = self.detector.detect_packed(frame[y1:y2, x1:x2], self.input_size(x2 - x1, y2 - y1))
+            packed[:, [0, 2]] += x1
+            packed[:, [1, 3]] += y1
+            self.since_full += 1
+
+        tracked = np.isin(packed[:, 5], (FACE_CLASS_ID, PHONE_CLASS_ID))
+        self.last_boxes = packed[tracked, :4]
+        return packed
+
+    def detect_humans(self, frame, zone_rect=None):
+        return unpack_detections(self.detect_packed(frame, zone_rect))
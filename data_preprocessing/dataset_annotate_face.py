@@ -1,9 +1,38 @@
+"""
+Face Auto-Annotation Script
+
+Runs a face model over every image of a YOLO dataset and replaces the face
+labels (`FACE_CLASS`) with its detections, keeping all other classes:
+
+- Images are decoded ahead of the model on a thread pool (`PREFETCH_WORKERS`)
+  and inferred in batches of `BATCH_SIZE`.
+- Images without faces go to `missing_faces/`, images with overlapping faces
+  (IoU above `IOU_THRESHOLD`, checked as one matrix) to `overlapping_faces/`,
+  and up to `SAVE_LIMIT` previews to `check_faces/`.
+- Labels and images are written by a background writer thread.
+- Progress is checkpointed per split after each batch is written, so a killed
+  run resumes where it stopped. Delete `.annotate_face.progress` in a split
+  to annotate it again.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import json
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import cv2
+import numpy as np
 from ultralytics import YOLO
 from tqdm import tqdm
 
+sys.path.append('.')  # noqa
+
+from utils.boxes import box_iou
+
 # ---------------------- CONFIGURATION ----------------------
 INPUT_FOLDER = Path(os.environ.get("INPUT_FOLDER", "dataset/FACEANDPHONE.v2i.yolov11"))
 MODEL_PATH = Path(os.environ.get("MODEL_PATH", "models/yolov8m_FINAL_DATA.pt"))
@@ -12,31 +41,110 @@ CONF_THRESHOLD = 0.4
 SAVE_LIMIT = 2500
 IOU_THRESHOLD = 0.5
 IMG_EXTENSIONS = [".jpg", ".jpeg", ".png"]
-DEVICE = 'cuda'
+DEVICE = os.environ.get("ANNOTATE_DEVICE", "")  # "" lets Ultralytics pick CUDA when available, else CPU
 DATA_SPLITS = ['train', 'valid', 'test']
+BATCH_SIZE = int(os.environ.get("ANNOTATE_BATCH", 8))
+PREFETCH_WORKERS = 4
+PREFETCH_BATCHES = 4  # Decoded batches kept ahead of the model
+CHECKPOINT_NAME = ".annotate_face.progress"
 # ----------------------------------------------------------
 
-# Load YOLOv8 model
-model = YOLO(MODEL_PATH)
-model.to(DEVICE)
-
-# Utility: Calculate IoU
-
-
-def calculate_iou(box1, box2):
-    x1 = max(box1[0], box2[0])
-    y1 = max(box1[1], box2[1])
-    x2 = min(box1[2], box2[2])
-    y2 = min(box1[3], box2[3])
-    inter_area = max(0, x2 - x1) * max(0, y2 - y1)
-    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-    union_area = area1 + area2 - inter_area
-    return inter_area / union_area if union_area > 0 else 0
-
 
-# Process each split
-for split in DATA_SPLITS:
+def prefetch(paths, pool):
+    """Yield ``(path, image)`` in order while decoding up to ``PREFETCH_BATCHES`` batches ahead."""
+    pending = deque()
+    paths = iter(paths)
+    for path in paths:
+        pending.append((path, pool.submit(cv2.imread, str(path))))
+        if len(pending) >= BATCH_SIZE * PREFETCH_BATCHES:
+            break
+    for path in paths:
+        done_path, future = pending.popleft()
+        yield done_path, future.result()
+        pending.append((path, pool.submit(cv2.imread, str(path))))
+    while pending:
+        done_path, future = pending.popleft()
+        yield done_path, future.result()
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def has_overlap(boxes):
+    if len(boxes) < 2:
+        return False
+    return bool(np.triu(box_iou(boxes, boxes), 1).max() > IOU_THRESHOLD)
+
+
+def face_label_lines(boxes, width, height):
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    rows = np.stack(((x1 + x2) / 2 / width, (y1 + y2) / 2 / height, (x2 - x1) / width, (y2 - y1) / height), axis=1)
+    return [f"{FACE_CLASS} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}" for xc, yc, w, h in rows]
+
+
+def write_labels(label_file, face_labels):
+    existing_labels = []
+    if label_file.exists():
+        with open(label_file, "r") as f:
+            existing_labels = [
+                line.strip() for line in f.readlines()
+                if line.strip() and not line.strip().startswith(f"{FACE_CLASS} ")
+            ]
+    tmp = label_file.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        for label in existing_labels + face_labels:
+            f.write(label + "\n")
+    os.replace(tmp, label_file)
+
+
+def write_image(output_path, img):
+    # cv2.imwrite reports failures by returning False
+    if not cv2.imwrite(str(output_path), img):
+        raise OSError(f"Could not write image: {output_path}")
+
+
+def write_preview(img, boxes, output_path):
+    for x1, y1, x2, y2 in boxes.astype(int):
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(img, f"face {FACE_CLASS}", (x1, y1 - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    write_image(output_path, img)
+
+
+def load_checkpoint(path, image_paths):
+    """Return ``(done, saved_count)`` from a checkpoint matching this image list."""
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return 0, 0
+    done = state.get("done", 0)
+    if 0 < done <= len(image_paths) and image_paths[done - 1].name == state.get("last"):
+        return done, state.get("saved_count", 0)
+    print(f"⚠️ {path} does not match the current images; starting the split over.")
+    return 0, 0
+
+
+def commit_batch(writes, path, done, last, saved_count):
+    """Checkpoint a batch once all of its writes succeeded; re-raises the first failure."""
+    for write in writes:
+        write.result()
+    save_checkpoint(path, done, last, saved_count)
+
+
+def save_checkpoint(path, done, last, saved_count):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"done": done, "last": last, "saved_count": saved_count}))
+    os.replace(tmp, path)
+
+
+def annotate_split(model, split, pool, writer):
     print(f"Processing split: {split.upper()}")
 
     # Set paths for split
@@ -45,82 +153,93 @@ for split in DATA_SPLITS:
     check_face_folder = INPUT_FOLDER / split / "check_faces"
     missing_face_folder = INPUT_FOLDER / split / "missing_faces"
     overlap_face_folder = INPUT_FOLDER / split / "overlapping_faces"
+    checkpoint = INPUT_FOLDER / split / CHECKPOINT_NAME
 
     check_face_folder.mkdir(parents=True, exist_ok=True)
     missing_face_folder.mkdir(parents=True, exist_ok=True)
     overlap_face_folder.mkdir(parents=True, exist_ok=True)
+    label_folder.mkdir(parents=True, exist_ok=True)
 
     image_paths = sorted([
         p for p in image_folder.glob("*")
         if p.suffix.lower() in IMG_EXTENSIONS
     ])
 
-    saved_count = 0
-
-    for img_path in tqdm(image_paths, desc=f"\uD83D\uDD04 {split} images", ncols=100):
-        img = cv2.imread(str(img_path))
-        if img is None:
-            print(f"\n❌ Failed to read image: {img_path.name}")
-            continue
-
-        height, width = img.shape[:2]
-        results = model.predict(source=img, conf=CONF_THRESHOLD, verbose=False, device=DEVICE)[0]
-
-        if results.boxes is None or results.boxes.shape[0] == 0:
-            output_path = missing_face_folder / img_path.name
-            cv2.imwrite(str(output_path), img)
-            print(f"\n🔍 No face detected in: {img_path.name}")
-            continue
-
-        boxes_xyxy = [box.xyxy[0].tolist() for box in results.boxes]
-
-        overlapping = False
-        for i in range(len(boxes_xyxy)):
-            for j in range(i + 1, len(boxes_xyxy)):
-                if calculate_iou(boxes_xyxy[i], boxes_xyxy[j]) > IOU_THRESHOLD:
-                    overlapping = True
-                    break
-            if overlapping:
-                break
-
-        if overlapping:
-            output_path = overlap_face_folder / img_path.name
-            cv2.imwrite(str(output_path), img)
-            print(f"\n⚠️ Overlapping faces: {img_path.name}")
-            continue
-
-        face_labels = []
-        for box in boxes_xyxy:
-            x1, y1, x2, y2 = box
-            x_center = (x1 + x2) / 2.0 / width
-            y_center = (y1 + y2) / 2.0 / height
-            w = (x2 - x1) / width
-            h = (y2 - y1) / height
-            face_labels.append(f"{FACE_CLASS} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}")
-
-        label_file = label_folder / f"{img_path.stem}.txt"
-        existing_labels = []
-        if label_file.exists():
-            with open(label_file, "r") as f:
-                existing_labels = [
-                    line.strip() for line in f.readlines()
-                    if not line.strip().startswith(f"{FACE_CLASS} ")
-                ]
-
-        updated_labels = existing_labels + face_labels
-        with open(label_file, "w") as f:
-            for label in updated_labels:
-                f.write(label + "\n")
-
-        if saved_count < SAVE_LIMIT:
-            for x1, y1, x2, y2 in boxes_xyxy:
-                x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
-                cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(img, f"face {FACE_CLASS}", (x1, y1 - 8),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-            output_path = check_face_folder / img_path.name
-            cv2.imwrite(str(output_path), img)
-            saved_count += 1
-            print(f"   ✅ Saved to check_faces/{img_path.name}")
-
-    print(f"✅ Done with {split.upper()}: {saved_count} detection preview image(s) saved.")
+    done, saved_count = load_checkpoint(checkpoint, image_paths)
+    if done == len(image_paths) and done:
+        print(f"✅ {split.upper()} already annotated (delete {checkpoint} to redo).")
+        return
+    if done:
+        print(f"🔁 Resuming {split.upper()} at image {done} of {len(image_paths)}")
+
+    start = time.perf_counter()
+    processed = 0
+    commits = deque()
+    progress = tqdm(total=len(image_paths), initial=done, desc=f"🔄 {split} images", ncols=100)
+    for batch in batches(prefetch(image_paths[done:], pool), BATCH_SIZE):
+        writes = []
+        readable = [(path, img) for path, img in batch if img is not None]
+        for path, img in batch:
+            if img is None:
+                print(f"\n❌ Failed to read image: {path.name}")
+
+        results = model.predict(source=[img for _, img in readable], conf=CONF_THRESHOLD,
+                                verbose=False, device=DEVICE) if readable else []
+        for (img_path, img), result in zip(readable, results):
+            boxes = result.boxes.xyxy.cpu().numpy() if result.boxes is not None else np.zeros((0, 4))
+
+            if len(boxes) == 0:
+                writes.append(writer.submit(write_image, missing_face_folder / img_path.name, img))
+                print(f"\n🔍 No face detected in: {img_path.name}")
+                continue
+
+            if has_overlap(boxes):
+                writes.append(writer.submit(write_image, overlap_face_folder / img_path.name, img))
+                print(f"\n⚠️ Overlapping faces: {img_path.name}")
+                continue
+
+            height, width = img.shape[:2]
+            label_file = label_folder / f"{img_path.stem}.txt"
+            writes.append(writer.submit(write_labels, label_file, face_label_lines(boxes, width, height)))
+
+            if saved_count < SAVE_LIMIT:
+                writes.append(writer.submit(write_preview, img, boxes, check_face_folder / img_path.name))
+                saved_count += 1
+
+        # Queued behind this batch's writes and only checkpoints them if all of
+        # them and every earlier batch succeeded
+        if commits:
+            writes.append(commits[-1])
+        done += len(batch)
+        processed += len(batch)
+        commits.append(writer.submit(commit_batch, writes, checkpoint, done, batch[-1][0].name, saved_count))
+        # Bounds queued images and re-raises write errors
+        while len(commits) > PREFETCH_BATCHES or (commits and commits[0].done()):
+            commits.popleft().result()
+        progress.update(len(batch))
+        progress.set_postfix(img_s=f"{processed / (time.perf_counter() - start):.1f}")
+    progress.close()
+
+    writer.submit(lambda: None).result()
+    for commit in commits:
+        commit.result()
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Done with {split.upper()}: {processed} image(s) at {rate:.1f} img/s, "
+          f"{saved_count} detection preview image(s) saved.")
+
+
+def main():
+    if not MODEL_PATH.exists():
+        print(f"❌ Error: model not found: {MODEL_PATH}")
+        sys.exit(1)
+    model = YOLO(MODEL_PATH)
+
+    # One writer thread keeps writes ordered with the checkpoint that follows them
+    with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as pool, ThreadPoolExecutor(max_workers=1) as writer:
+        for split in DATA_SPLITS:
+            annotate_split(model, split, pool, writer)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ It preserves only proper 5-column bounding box entries per label file.
 Removed label files (or filtered lines) are saved into a separate directory.
 Visualizations are also generated for the removed labels with bounding boxes drawn.
 
+Label lines are read from the dataset manifest (`dataset_manifest.py`) rather than re-parsed.
+
 Configuration parameters are defined at the top of the script.
 
 Author: Kirtan Soni
@@ -14,10 +16,15 @@ Version: 1.0
 """
 
 import os
+import sys
 from pathlib import Path
 import shutil
 import cv2
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_manifest import Manifest
+
 # -------------------- CONFIGURATION --------------------
 DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Forklift_Dataset"))  # Path to the YOLO dataset directory
 # Cleaned dataset with only bounding boxes
@@ -30,19 +37,12 @@ VISUALIZE_REMOVED = True                            # Draw and save bounding box
 # -------------------- FUNCTION TO CLEAN LABEL --------------------
 
 
-def is_valid_bbox_line(line):
-    parts = line.strip().split()
-    return len(parts) == 5 and all(p.replace('.', '', 1).isdigit() or p.isdigit() for p in parts)
-
-
-def draw_boxes(image_path, label_lines, output_path):
+def draw_boxes(image_path, boxes, output_path):
     img = cv2.imread(str(image_path))
     if img is None:
         return
     h, w = img.shape[:2]
-    for line in label_lines:
-        parts = list(map(float, line.strip().split()))
-        class_id, cx, cy, bw, bh = parts
+    for class_id, cx, cy, bw, bh in boxes:
         x1 = int((cx - bw / 2) * w)
         y1 = int((cy - bh / 2) * h)
         x2 = int((cx + bw / 2) * w)
@@ -59,10 +59,9 @@ def clean_yolo_labels():
     total_cleaned = 0
     total_removed = 0
     removal_log = []
+    manifest = Manifest(DATASET_DIR)
 
     for split in ["train", "valid", "test"]:
-        img_dir = DATASET_DIR / split / "images"
-        lbl_dir = DATASET_DIR / split / "labels"
         out_img_dir = OUTPUT_DIR / split / "images"
         out_lbl_dir = OUTPUT_DIR / split / "labels"
         rem_lbl_dir = REMOVED_DIR / split / "labels"
@@ -75,40 +74,36 @@ def clean_yolo_labels():
         rem_img_dir.mkdir(parents=True, exist_ok=True)
         vis_img_dir.mkdir(parents=True, exist_ok=True)
 
-        image_files = [f for f in img_dir.glob("*") if f.suffix.lower() in IMG_FORMATS]
-
-        for img_path in image_files:
-            label_path = lbl_dir / (img_path.stem + ".txt")
+        labels = {label: (lines, malformed) for label, _, lines, malformed, _ in manifest.labels(split)}
 
-            if not label_path.exists():
+        for img_path, label_path in manifest.pairs(split):
+            if img_path.suffix.lower() not in IMG_FORMATS or label_path is None:
                 continue
 
-            with open(label_path, 'r') as f:
-                lines = f.readlines()
+            lines, malformed = labels[label_path]
 
-            bbox_lines = [l for l in lines if is_valid_bbox_line(l)]
-
-            if len(bbox_lines) == len(lines):
+            if malformed == 0:
                 # All lines are valid bbox
                 shutil.copy(img_path, out_img_dir / img_path.name)
                 shutil.copy(label_path, out_lbl_dir / label_path.name)
                 total_cleaned += 1
             else:
                 # File contains non-bbox data
-                with open(rem_lbl_dir / label_path.name, 'w') as f:
-                    f.writelines(lines)
+                shutil.copy(label_path, rem_lbl_dir / label_path.name)
                 shutil.copy(img_path, rem_img_dir / img_path.name)
                 if VISUALIZE_REMOVED:
-                    draw_boxes(img_path, bbox_lines, vis_img_dir / img_path.name)
+                    draw_boxes(img_path, manifest.boxes(label_path), vis_img_dir / img_path.name)
                 total_removed += 1
                 removal_log.append({
                     "split": split,
                     "file": label_path.name,
-                    "total_lines": len(lines),
-                    "bbox_lines": len(bbox_lines),
-                    "removed_lines": len(lines) - len(bbox_lines)
+                    "total_lines": lines,
+                    "bbox_lines": lines - malformed,
+                    "removed_lines": malformed
                 })
 
+    manifest.close()
+
     print("\n✅ Cleanup complete. Cleaned and removed files are separated.")
     print("\n--- Removal Summary ---")
     print(f"Total cleaned label files: {total_cleaned}")
@@ -1,32 +1,22 @@
 import os
+import sys
 from pathlib import Path
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_label_transform import transform_labels
+
 # --------- CONFIGURATION ---------
 # Path can be overridden with the INPUT_FOLDER environment variable
 INPUT_FOLDER = Path(os.environ.get("INPUT_FOLDER", "dataset/data/class_2"))
 OLD_CLASS = 2
 NEW_CLASS = 1
-EXT = ".txt"
 # ---------------------------------
 
 
 def replace_class_in_labels(input_dir: Path, old_class: int, new_class: int):
-    for file in input_dir.rglob(f'*{EXT}'):
-        with open(file, 'r') as f:
-            lines = f.readlines()
-
-        updated_lines = []
-        for line in lines:
-            parts = line.strip().split()
-            if len(parts) < 5:
-                continue
-            if int(parts[0]) == old_class:
-                parts[0] = str(new_class)
-            updated_lines.append(' '.join(parts) + '\n')
-
-        with open(file, 'w') as f:
-            f.writelines(updated_lines)
-        print(f"Updated: {file}")
+    """Remap one class; see dataset_label_transform.py for merges, deletes and box filters."""
+    return transform_labels(input_dir, class_map={old_class: new_class})
 
 
 if __name__ == "__main__":
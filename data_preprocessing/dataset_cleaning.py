@@ -14,7 +14,10 @@ This script processes a YOLO-format object detection dataset by performing the f
      - More than the allowed number of detections (default = 2).
      - Zero detections.
      - Very small bounding boxes (area below a defined threshold).
-     - Duplicate images (determined by base filename pattern, e.g., `helm_000115`).
+     - Label lines that are not valid boxes (segmentation polygons, out-of-range
+       coordinates, bad class IDs), like `dataset_balancing.py`.
+     - Duplicate and near-duplicate images across all splits, found by perceptual hash
+       (`dataset_dedup.py`); the first copy in train/valid/test order is kept.
 
 3. **Visualization**:
    - Draws bounding boxes on removed images and stores them under the `removed/` directory with reason prefixes.
@@ -22,17 +25,27 @@ This script processes a YOLO-format object detection dataset by performing the f
 4. **Train/Valid/Test Split**:
    - After cleaning, it randomly splits the dataset into training, validation, and testing sets using user-defined ratios.
 
-5. **Logging and Statistics**:
+5. **Parallelism**:
+   - Labels are read from the dataset manifest (`dataset_manifest.py`), which only
+     re-parses files changed since the last run, and validated for the whole dataset
+     at once with array operations (`yolo_labels.validate`).
+   - Drawing removed images and copying run on a thread pool (`WORKERS`) with progress bars.
+   - `VIEW_MODE` can hard-link or symlink kept images, or write image lists only
+     (`dataset_views.py`), instead of copying them.
+   - Results are gathered in input order, so the seeded split is identical to a sequential run.
+
+6. **Logging and Statistics**:
    - Prints informative logs for each step.
    - Displays a detailed summary of how many images were processed, removed, and retained per category.
 
-6. **Parameters You Can Modify**:
+7. **Parameters You Can Modify**:
    - `INPUT_DATASET_DIR`: Path to the raw YOLO dataset.
    - `OUTPUT_DATASET_DIR`: Where cleaned dataset will be saved.
    - `MIN_BBOX_AREA`: Bounding box area threshold.
    - `MAX_OBJECTS_ALLOWED`: Maximum number of allowed detections per image.
    - `TRAIN_SPLIT`, `VALID_SPLIT`, `TEST_SPLIT`: Ratios for dataset splitting.
    - `SEED`: Ensures reproducible splits.
+   - `WORKERS`: Worker pool size.
 
 Usage:
     - Place your dataset in the correct YOLO folder structure.
@@ -43,10 +56,19 @@ Author: Kirtan Soni
 Version: 1.0
 """
 import os
-import shutil
+import sys
 from pathlib import Path
 import random
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+from tqdm import tqdm
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_dedup import find_duplicates
+from data_preprocessing.dataset_manifest import Manifest
+from data_preprocessing.yolo_labels import validate
+from data_preprocessing.dataset_views import VIEW_MODE, check_mode, place_image, place_label, write_list_dataset
 
 # -------------------- CONFIGURATION PARAMETERS --------------------
 # Input dataset directory in YOLO format
@@ -69,28 +91,27 @@ TRAIN_SPLIT = 0.7
 VALID_SPLIT = 0.2
 TEST_SPLIT = 0.1
 
+# Perceptual hash bits (of 64) two images may differ by and still count as duplicates
+HAMMING_RADIUS = 6
+
 # Random seed for reproducibility
 SEED = 42
 
-# -------------------- UTILITY FUNCTIONS --------------------
+# How kept images reach the output: copy | hardlink | symlink | list
+MODE = check_mode(VIEW_MODE)
 
+# Worker threads for drawing and copying
+WORKERS = int(os.environ.get("CLEANING_WORKERS", os.cpu_count() or 1))
 
-def read_label_file(label_path):
-    with open(label_path, 'r') as f:
-        lines = f.readlines()
-    return [list(map(float, line.strip().split())) for line in lines if line.strip()]  # class_id cx cy w h
+# -------------------- UTILITY FUNCTIONS --------------------
 
 
-def is_valid_annotation(annotations):
-    if len(annotations) == 0:
-        return False, "no_detection"
-    if len(annotations) > MAX_OBJECTS_ALLOWED:
-        return False, "too_many_detections"
-    for ann in annotations:
-        _, _, _, w, h = ann
-        if w * h < MIN_BBOX_AREA:
-            return False, "bbox_too_small"
-    return True, "valid"
+def run_parallel(function, items, desc):
+    """Map ``function`` over ``items`` on the worker pool, keeping input order."""
+    if WORKERS <= 1:
+        return [function(item) for item in tqdm(items, desc=desc, ncols=100)]
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        return list(tqdm(pool.map(function, items), total=len(items), desc=desc, ncols=100))
 
 
 def collect_image_label_pairs(split_dir):
@@ -107,6 +128,12 @@ def create_yolo_structure(base_dir):
     REMOVED_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def copy_pair(job):
+    img_path, label_path, split = job
+    place_image(img_path, OUTPUT_DATASET_DIR / split / "images" / img_path.name, MODE)
+    place_label(label_path, OUTPUT_DATASET_DIR / split / "labels" / label_path.name)
+
+
 def draw_and_save_removed_image(img_path, annotations, reason):
     img = cv2.imread(str(img_path))
     if img is None:
@@ -131,22 +158,19 @@ def main():
     OUTPUT_DATASET_DIR.mkdir(parents=True, exist_ok=True)
     create_yolo_structure(OUTPUT_DATASET_DIR)
 
-    all_pairs = []
-    seen_base_names = set()
-    duplicate_images_removed = 0
+    collected_pairs = []
+    splits = ["train", "valid", "test"]
+    with ThreadPoolExecutor(max_workers=len(splits)) as pool:
+        collected = list(pool.map(collect_image_label_pairs, [INPUT_DATASET_DIR / split for split in splits]))
 
-    for split in ["train", "valid", "test"]:
-        split_dir = INPUT_DATASET_DIR / split
-        split_pairs = collect_image_label_pairs(split_dir)
-        for img_path, label_path in split_pairs:
-            base_name = "_".join(img_path.stem.split("_")[:2])  # e.g., helm_000115
-            if base_name in seen_base_names:
-                duplicate_images_removed += 1
-                continue
-            seen_base_names.add(base_name)
-            all_pairs.append((img_path, label_path))
+    for split, split_pairs in zip(splits, collected):
+        collected_pairs += split_pairs
         print(f"Collected {len(split_pairs)} image-label pairs from '{split}' split.")
 
+    duplicates = find_duplicates([img_path for img_path, _ in collected_pairs], HAMMING_RADIUS, WORKERS)
+    all_pairs = [pair for pair in collected_pairs if pair[0] not in duplicates]
+    duplicate_images_removed = len(duplicates)
+
     print(f"\n[INFO] Total image-label pairs after removing duplicates: {len(all_pairs)}")
     print(f"[INFO] Duplicate images removed: {duplicate_images_removed}")
 
@@ -155,29 +179,46 @@ def main():
     removed_due_to_small_area = 0
     removed_due_to_too_many = 0
     removed_due_to_empty = 0
+    removed_due_to_malformed = 0
+
+    removed = []
+
+    verdicts = {}  # label path -> (reason, boxes)
+    with Manifest(INPUT_DATASET_DIR) as manifest:
+        for split in splits:
+            labels = manifest.packed_labels(split)
+            reasons = validate(labels, MAX_OBJECTS_ALLOWED, MIN_BBOX_AREA)
+            malformed = {str(label): count for label, _, _, count, _ in manifest.labels(split)}
+            for index, path in enumerate(labels.files):
+                reason = "malformed_labels" if malformed.get(str(path)) else reasons[index]
+                verdicts[str(path)] = (reason, labels.file_boxes(index))
 
     for img_path, label_path in all_pairs:
-        if not label_path.exists():
+        if str(label_path) not in verdicts:
             removed_due_to_no_label += 1
             continue
-        annotations = read_label_file(label_path)
-        is_valid, reason = is_valid_annotation(annotations)
-        if is_valid:
+        reason, annotations = verdicts[str(label_path)]
+        if reason == "valid":
             valid_pairs.append((img_path, label_path))
-        else:
-            if reason == "no_detection":
-                removed_due_to_empty += 1
-            elif reason == "too_many_detections":
-                removed_due_to_too_many += 1
-            elif reason == "bbox_too_small":
-                removed_due_to_small_area += 1
-            draw_and_save_removed_image(img_path, annotations, reason)
+            continue
+        if reason == "no_detection":
+            removed_due_to_empty += 1
+        elif reason == "too_many_detections":
+            removed_due_to_too_many += 1
+        elif reason == "bbox_too_small":
+            removed_due_to_small_area += 1
+        elif reason == "malformed_labels":
+            removed_due_to_malformed += 1
+        removed.append((img_path, annotations, reason))
+
+    run_parallel(lambda job: draw_and_save_removed_image(*job), removed, "🖍️ Drawing removed images")
 
     print(f"\n[INFO] Valid cleaned pairs retained: {len(valid_pairs)}")
     print(f"[INFO] Removed due to missing label file: {removed_due_to_no_label}")
     print(f"[INFO] Removed due to no detection: {removed_due_to_empty}")
     print(f"[INFO] Removed due to >{MAX_OBJECTS_ALLOWED} detections: {removed_due_to_too_many}")
     print(f"[INFO] Removed due to small bounding box area: {removed_due_to_small_area}")
+    print(f"[INFO] Removed due to malformed label lines: {removed_due_to_malformed}")
 
     random.shuffle(valid_pairs)
 
@@ -190,13 +231,15 @@ def main():
         "test": valid_pairs[valid_end:]
     }
 
-    for split, pairs in split_map.items():
-        print(f"\n[INFO] Copying {len(pairs)} items to '{split}' split...")
-        for img_path, label_path in pairs:
-            dest_img = OUTPUT_DATASET_DIR / split / "images" / img_path.name
-            dest_lbl = OUTPUT_DATASET_DIR / split / "labels" / label_path.name
-            shutil.copy(img_path, dest_img)
-            shutil.copy(label_path, dest_lbl)
+    if MODE == "list":
+        yaml_path = write_list_dataset(OUTPUT_DATASET_DIR, {split: [img for img, _ in pairs]
+                                                            for split, pairs in split_map.items()}, INPUT_DATASET_DIR)
+        print(f"\n[INFO] Image lists written; train with data={yaml_path}")
+    else:
+        for split, pairs in split_map.items():
+            print(f"\n[INFO] Placing {len(pairs)} items in '{split}' split ({MODE})...")
+        copy_jobs = [(img_path, label_path, split) for split, pairs in split_map.items() for img_path, label_path in pairs]
+        run_parallel(copy_pair, copy_jobs, "📁 Copying")
 
     print("\n✅ Dataset cleaning and splitting complete.")
     print("\n--- Final Summary ---")
@@ -207,6 +250,7 @@ def main():
     print(f"Removed (no detection): {removed_due_to_empty}")
     print(f"Removed (too many detections): {removed_due_to_too_many}")
     print(f"Removed (small bounding box): {removed_due_to_small_area}")
+    print(f"Removed (malformed labels): {removed_due_to_malformed}")
     print(f"Train split: {len(split_map['train'])}")
     print(f"Valid split: {len(split_map['valid'])}")
     print(f"Test split:  {len(split_map['test'])}")
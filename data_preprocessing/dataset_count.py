@@ -8,6 +8,9 @@ It reports:
 - Total images and labels per split
 - Total counts across the dataset
 
+Counts come from the dataset manifest (`dataset_manifest.py`), refreshed incrementally.
+For class, box and resolution distributions use `dataset_stats.py`.
+
 Usage:
 - Update `DATASET_DIR` with the path to your YOLO dataset.
 - Run the script.
@@ -17,8 +20,13 @@ Version: 1.0
 """
 
 import os
+import sys
 from pathlib import Path
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_manifest import Manifest
+
 # -------------------- CONFIGURATION --------------------
 DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Forklift_Dataset"))  # Replace with your YOLO dataset path
 
@@ -28,13 +36,11 @@ DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Forklift_Dataset"))  #
 def count_yolo_dataset():
     splits = ["train", "valid", "test"]
     totals = {"images": 0, "labels": 0}
+    with Manifest(DATASET_DIR) as manifest:
+        counts = {split: (manifest.count("images", split), manifest.count("labels", split)) for split in splits}
 
     for split in splits:
-        img_dir = DATASET_DIR / split / "images"
-        lbl_dir = DATASET_DIR / split / "labels"
-
-        num_images = len(list(img_dir.glob("*.*"))) if img_dir.exists() else 0
-        num_labels = len(list(lbl_dir.glob("*.txt"))) if lbl_dir.exists() else 0
+        num_images, num_labels = counts[split]
 
         totals["images"] += num_images
         totals["labels"] += num_labels
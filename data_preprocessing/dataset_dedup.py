@@ -0,0 +1,185 @@
+"""
+YOLO Dataset Near-Duplicate Detection
+
+Finds duplicate and near-duplicate images by content rather than filename:
+
+1. **Perceptual hash**: each image is reduced to a 64-bit DCT hash (pHash), which
+   survives re-encoding, resizing and mild colour/brightness changes.
+2. **Cache**: hashes are stored by the SHA-1 of the file contents, so re-runs only
+   hash new or modified images, whatever their names.
+3. **Index**: hashes go into a BK-tree, so each image is compared with the few
+   candidates within `HAMMING_RADIUS` instead of every other image.
+4. **Leakage check**: run on its own, the script reports duplicates across
+   `train`, `valid` and `test` of a dataset.
+
+`dataset_cleaning.py` uses `find_duplicates` to drop duplicates across all splits
+before re-splitting.
+
+Usage:
+    - Set `DATASET_DIR` (or the environment variable) and run the script.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+
+# -------------------- CONFIGURATION --------------------
+DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Cleaned_Dataset"))
+
+# Hashes by file content, shared by every dataset under dataset/
+HASH_CACHE_FILE = Path(os.environ.get("DEDUP_CACHE_FILE", "dataset/.phash_cache.json"))
+
+# Largest number of differing hash bits still treated as the same picture (of 64)
+HAMMING_RADIUS = 6
+
+WORKERS = int(os.environ.get("DEDUP_WORKERS", os.cpu_count() or 1))
+CHUNK_SIZE = 128
+IMAGE_EXTS = [".jpg", ".jpeg", ".png"]
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def content_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def phash(path):
+    """64-bit perceptual hash of an image file, or ``None`` if it cannot be read."""
+    img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    small = cv2.resize(img, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # The DC term only carries overall brightness
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Metric tree over 64-bit hashes under Hamming distance."""
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, item, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """Return ``[(distance, item)]`` for every entry within ``radius``."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.append((distance, node[1]))
+            # Triangle inequality: only subtrees in this band can hold matches
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def load_cache():
+    try:
+        return json.loads(HASH_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    HASH_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = HASH_CACHE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache))
+    os.replace(tmp, HASH_CACHE_FILE)
+
+
+def hash_images(paths, workers=WORKERS):
+    """Return the perceptual hash of every path (``None`` for unreadable files)."""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        digests = list(pool.map(content_digest, paths))
+
+    cache = load_cache()
+    missing = sorted({digest: path for digest, path in zip(digests, paths) if digest not in cache}.items())
+    if missing:
+        print(f"[INFO] Hashing {len(missing)} new images ({len(set(digests)) - len(missing)} cached)...")
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                hashes = list(pool.map(phash, [path for _, path in missing], chunksize=CHUNK_SIZE))
+        else:
+            hashes = [phash(path) for _, path in missing]
+        cache.update((digest, value) for (digest, _), value in zip(missing, hashes))
+        save_cache(cache)
+    return [cache[digest] for digest in digests]
+
+
+def find_duplicates(paths, radius=HAMMING_RADIUS, workers=WORKERS):
+    """
+    Return ``{duplicate: kept}`` for ``paths``.  The first image of each
+    group in input order is kept, so results are deterministic.
+    """
+    paths = list(paths)
+    tree = BKTree()
+    duplicates = {}
+    for path, value in zip(paths, hash_images(paths, workers)):
+        if value is None:
+            continue
+        matches = tree.search(value, radius)
+        if matches:
+            duplicates[path] = min(matches, key=lambda match: match[0])[1]
+        else:
+            tree.add(value, path)
+    return duplicates
+
+# -------------------- MAIN SCRIPT --------------------
+
+
+def main():
+    splits = ["train", "valid", "test"]
+    paths = []
+    for split in splits:
+        images_dir = DATASET_DIR / split / "images"
+        if images_dir.exists():
+            paths += sorted(p for p in images_dir.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+    print(f"[INFO] Scanning {len(paths)} images in {DATASET_DIR}")
+
+    duplicates = find_duplicates(paths)
+    leaks = {}
+    for duplicate, kept in duplicates.items():
+        pair = (kept.parent.parent.name, duplicate.parent.parent.name)
+        if pair[0] != pair[1]:
+            leaks[pair] = leaks.get(pair, 0) + 1
+            print(f"  {pair[0]}/{kept.name}  ~  {pair[1]}/{duplicate.name}")
+
+    print("\n--- Summary ---")
+    print(f"Near-duplicates (radius {HAMMING_RADIUS}): {len(duplicates)}")
+    for (kept_split, duplicate_split), count in sorted(leaks.items()):
+        print(f"Leaked {kept_split} -> {duplicate_split}: {count}")
+    if not leaks:
+        print("✅ No duplicates across splits.")
+
+
+if __name__ == "__main__":
+    main()
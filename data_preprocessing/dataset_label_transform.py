@@ -0,0 +1,202 @@
+"""
+YOLO Label Transform
+
+Applies a class mapping and box filters to every label file under a folder:
+
+1. **Remap / merge**: `CLASS_MAP` maps old class IDs to new ones (several old IDs
+   may map to the same new ID).
+2. **Delete**: lines of `DELETE_CLASSES` are removed.
+3. **Filter**: boxes smaller than `MIN_BOX_AREA` or with a width/height ratio outside
+   `ASPECT_RANGE` (normalized coordinates) are removed.
+
+All labels are parsed at once (`yolo_labels.py`) and the rules are evaluated as
+array operations; only files that actually change are rewritten. Only the class
+token of a kept line is touched and coordinates keep their original text.
+Remaps and deletes also apply to polygon and out-of-range lines; otherwise
+malformed lines are kept as they are unless `DROP_MALFORMED` is set.
+
+Each file is written to a temporary file and renamed into place from a thread
+pool. Finished files are recorded in a journal, so an interrupted run can be
+restarted with the same settings without applying the mapping twice.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.yolo_labels import load_label_files
+
+# -------------------- CONFIGURATION --------------------
+INPUT_FOLDER = Path(os.environ.get("INPUT_FOLDER", "dataset/data/class_2"))
+CLASS_MAP = {2: 1}        # old class ID -> new class ID
+DELETE_CLASSES = []       # class IDs whose boxes are removed
+MIN_BOX_AREA = 0.0        # normalized w * h
+ASPECT_RANGE = None       # (min, max) of normalized w / h, or None
+DROP_MALFORMED = False    # also remove lines that are not 5-column boxes
+DRY_RUN = False           # report what would change without writing
+WORKERS = int(os.environ.get("TRANSFORM_WORKERS", (os.cpu_count() or 1) * 2))
+JOURNAL_NAME = ".label_transform.journal"
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def line_numbers(labels):
+    """Index of every non-blank line within its file, aligned with ``labels.line_file``."""
+    first_line = np.searchsorted(labels.line_file, np.arange(len(labels)))
+    return np.arange(len(labels.line_file)) - first_line[labels.line_file]
+
+
+def plan_transform(labels, class_map=CLASS_MAP, delete_classes=DELETE_CLASSES, min_area=MIN_BOX_AREA,
+                   aspect_range=ASPECT_RANGE, drop_malformed=DROP_MALFORMED):
+    """
+    Evaluate the rules over every line.  Returns ``(new_cls, deleted, changed_files, stats)``
+    where ``new_cls`` and ``deleted`` align with ``labels.line_file``.
+
+    Remaps and class deletes apply to every line with a known class, polygons and
+    out-of-range boxes included; the area and aspect filters only to valid boxes.
+    """
+    cls = labels.line_cls
+    known = cls >= 0
+    lookup = np.arange(max([int(cls.max(initial=0))] + list(class_map)) + 1)
+    for old, new in class_map.items():
+        lookup[old] = new
+    new_cls = np.where(known, lookup[np.maximum(cls, 0)], cls)
+    by_class = known & np.isin(cls, delete_classes)
+
+    # Box filters, mapped from boxes back to their lines
+    box_lines = np.searchsorted(labels.line_file, np.arange(len(labels)))[labels.box_file()] + labels.box_line
+    w, h = labels.boxes[:, 3], labels.boxes[:, 4]
+    small = w * h < min_area
+    bad_aspect = np.zeros(len(w), dtype=bool)
+    if aspect_range is not None:
+        aspect = np.divide(w, h, out=np.zeros_like(w), where=h > 0)
+        bad_aspect = (aspect < aspect_range[0]) | (aspect > aspect_range[1])
+    by_area = np.zeros(len(cls), dtype=bool)
+    by_area[box_lines[small]] = True
+    by_area &= ~by_class
+    by_aspect = np.zeros(len(cls), dtype=bool)
+    by_aspect[box_lines[bad_aspect]] = True
+    by_aspect &= ~by_class & ~by_area
+    malformed = labels.malformed()
+    deleted = by_class | by_area | by_aspect | (malformed if drop_malformed else False)
+
+    changed_lines = deleted | (new_cls != cls)
+    changed = np.bincount(labels.line_file[changed_lines], minlength=len(labels)) > 0
+    stats = {
+        "files": len(labels),
+        "boxes": len(labels.boxes),
+        "remapped": int(np.count_nonzero((new_cls != cls) & ~deleted)),
+        "deleted_class": int(by_class.sum()),
+        "deleted_area": int(by_area.sum()),
+        "deleted_aspect": int(by_aspect.sum()),
+        "malformed_lines": int(malformed.sum()),
+        "changed_files": int(changed.sum()),
+    }
+    return new_cls, deleted, np.flatnonzero(changed), stats
+
+
+def rewrite_file(path, edits, box_lines, drop_malformed=DROP_MALFORMED):
+    """
+    Apply ``edits`` ({non-blank line index: new class or None to delete}) to
+    one file and replace it atomically.  Lines without an edit are kept as
+    they are, unless they are not in ``box_lines`` and ``drop_malformed`` is set.
+    """
+    with open(path, "r") as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    out = []
+    for index, line in enumerate(lines):
+        if index in edits:
+            if edits[index] is None:
+                continue
+            parts = line.split()
+            line = " ".join([str(edits[index])] + parts[1:])
+        elif drop_malformed and index not in box_lines:
+            continue
+        out.append(line + "\n")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.writelines(out)
+    os.replace(tmp, path)
+
+
+def config_signature(class_map, delete_classes, min_area, aspect_range, drop_malformed):
+    config = json.dumps([sorted(class_map.items()), sorted(delete_classes), min_area, aspect_range, drop_malformed])
+    return hashlib.sha1(config.encode()).hexdigest()
+
+
+def transform_labels(input_dir=INPUT_FOLDER, class_map=CLASS_MAP, delete_classes=DELETE_CLASSES,
+                     min_area=MIN_BOX_AREA, aspect_range=ASPECT_RANGE, drop_malformed=DROP_MALFORMED,
+                     dry_run=DRY_RUN):
+    input_dir = Path(input_dir)
+    if not input_dir.is_dir():
+        print(f"❌ Error: folder not found: {input_dir}")
+        sys.exit(1)
+    start = time.perf_counter()
+
+    # A journal from an interrupted run with the same settings lists files already done
+    journal_path = input_dir / JOURNAL_NAME
+    signature = config_signature(class_map, delete_classes, min_area, aspect_range, drop_malformed)
+    done = set()
+    if journal_path.exists():
+        entries = journal_path.read_text().splitlines()
+        if not entries or entries[0] == signature:
+            done = set(entries[1:])
+            print(f"🔁 Resuming: {len(done)} file(s) already transformed")
+        else:
+            print(f"❌ Error: {journal_path} is from a run with different settings; "
+                  f"finish that run or delete the journal.")
+            sys.exit(1)
+
+    paths = sorted(str(p) for p in input_dir.rglob("*.txt") if str(p) not in done)
+    labels = load_label_files(paths)
+    new_cls, deleted, changed, stats = plan_transform(labels, class_map, delete_classes, min_area,
+                                                      aspect_range, drop_malformed)
+
+    print(f"📊 {stats['files']} files, {stats['boxes']} boxes: {stats['remapped']} remapped, "
+          f"{stats['deleted_class']} deleted by class, {stats['deleted_area']} by area, "
+          f"{stats['deleted_aspect']} by aspect; {stats['malformed_lines']} malformed line(s) "
+          f"{'dropped' if drop_malformed else 'kept'}")
+    if dry_run or not len(changed):
+        if not dry_run and journal_path.exists():
+            journal_path.unlink()
+        print(f"✅ {stats['changed_files']} file(s) {'would change' if dry_run else 'to change'}.")
+        return stats
+
+    line_no = line_numbers(labels)
+    edits = {int(i): {} for i in changed}
+    for line in np.flatnonzero(deleted | (new_cls != labels.line_cls)):
+        edits[int(labels.line_file[line])][int(line_no[line])] = None if deleted[line] else int(new_cls[line])
+
+    lock = threading.Lock()
+    with open(journal_path, "a") as journal:
+        if journal.tell() == 0:
+            journal.write(signature + "\n")
+            journal.flush()
+
+        def apply(index):
+            box_lines = set(labels.box_line[labels.offsets[index]:labels.offsets[index + 1]].tolist())
+            rewrite_file(paths[index], edits[index], box_lines, drop_malformed)
+            with lock:
+                journal.write(paths[index] + "\n")
+                journal.flush()
+
+        with ThreadPoolExecutor(max_workers=max(WORKERS, 1)) as pool:
+            list(pool.map(apply, edits))
+    journal_path.unlink()
+
+    print(f"✅ Rewrote {len(edits)} of {stats['files']} file(s) in {time.perf_counter() - start:.2f} s.")
+    return stats
+
+
+if __name__ == "__main__":
+    transform_labels()
@@ -0,0 +1,251 @@
+"""
+YOLO Dataset Manifest
+
+Scans a YOLO dataset once into an SQLite index stored next to it
+(`<dataset>/.manifest.sqlite`) so the preprocessing scripts can query files,
+image sizes and parsed boxes instead of re-globbing directories and
+re-parsing every label file:
+
+1. **Layout**: every `images/` + `labels/` pair directly in the dataset folder
+   (split "") or one level below it (`train`, `valid`, `test`, ...) is indexed.
+2. **Incremental**: files are matched by size and modification time; only new or
+   changed files are re-read, and deleted ones are dropped.
+3. **Contents**:
+   - images: path, size, mtime, width, height (read from the file header)
+   - labels: path, size, mtime, line counts, class IDs on every line
+   - boxes: class, cx, cy, w, h of every well-formed 5-column line
+
+Labels are parsed with the bulk loader in `yolo_labels.py`; `packed_labels()`
+returns a split's boxes in the same packed form.
+
+Run on its own, the script builds or refreshes the manifest and prints a summary.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import os
+import sys
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.yolo_labels import PackedLabels, load_label_files
+from utils.image_header import encoded_size
+
+# -------------------- CONFIGURATION --------------------
+DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Forklift_Dataset"))
+MANIFEST_NAME = ".manifest.sqlite"
+IMAGE_EXTS = [".jpg", ".jpeg", ".png"]
+WORKERS = int(os.environ.get("MANIFEST_WORKERS", os.cpu_count() or 1))
+CHUNK_SIZE = 1024  # Files handled per worker task
+HEADER_BYTES = 64 * 1024  # Read for the image size; the whole file only if the header is further in
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY, split TEXT, stem TEXT, size INTEGER, mtime_ns INTEGER,
+    width INTEGER, height INTEGER);
+CREATE TABLE IF NOT EXISTS labels (
+    path TEXT PRIMARY KEY, split TEXT, stem TEXT, size INTEGER, mtime_ns INTEGER,
+    lines INTEGER, malformed INTEGER, classes TEXT);
+CREATE TABLE IF NOT EXISTS boxes (
+    label TEXT, line INTEGER, cls INTEGER, cx REAL, cy REAL, w REAL, h REAL);
+CREATE INDEX IF NOT EXISTS images_split ON images (split, stem);
+CREATE INDEX IF NOT EXISTS labels_split ON labels (split, stem);
+CREATE INDEX IF NOT EXISTS boxes_label ON boxes (label);
+"""
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def image_size(path):
+    """Return ``(width, height)`` from the PNG/JPEG header, decoding only as a fallback."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(HEADER_BYTES)
+            size = encoded_size(head)
+            if size is None and head[:2] == b"\xff\xd8" and len(head) == HEADER_BYTES:
+                # Large EXIF/ICC segments can push the frame header past the first chunk
+                size = encoded_size(head + f.read())
+    except OSError:
+        return None, None
+    if size is not None:
+        return size
+    img = cv2.imread(str(path))
+    return (img.shape[1], img.shape[0]) if img is not None else (None, None)
+
+
+def image_sizes(paths):
+    return [image_size(path) for path in paths]
+
+
+def parse_labels(paths):
+    """Return ``(lines, malformed, classes, boxes)`` for each label file."""
+    labels = load_label_files(paths)
+    lines, malformed, classes = labels.line_counts(), labels.malformed_counts(), labels.classes()
+    rows = np.column_stack((labels.box_line, labels.boxes)).tolist()
+    return [(int(lines[i]), int(malformed[i]), ",".join(map(str, classes[i])),
+             [(int(row[0]), int(row[1]), *row[2:]) for row in rows[labels.offsets[i]:labels.offsets[i + 1]]])
+            for i in range(len(paths))]
+
+
+def find_splits(dataset_dir):
+    """Split names (relative folder, "" for a flat dataset) that hold an images/ or labels/ folder."""
+    candidates = [dataset_dir] + sorted(p for p in dataset_dir.iterdir() if p.is_dir())
+    return [("" if d == dataset_dir else d.name) for d in candidates
+            if (d / "images").is_dir() or (d / "labels").is_dir()]
+
+
+def scan_dir(directory, exts):
+    if not directory.is_dir():
+        return {}
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in exts:
+                stat = entry.stat()
+                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class Manifest:
+    """
+    SQLite index of a YOLO dataset.  ``update()`` brings it in line with the
+    files on disk; the query methods only read the index.
+    """
+
+    def __init__(self, dataset_dir=DATASET_DIR, update=True):
+        self.dataset_dir = Path(dataset_dir)
+        if not self.dataset_dir.is_dir():
+            raise FileNotFoundError(f"Dataset directory not found: {self.dataset_dir}")
+        self.db = sqlite3.connect(str(self.dataset_dir / MANIFEST_NAME))
+        self.db.executescript(SCHEMA)
+        if update:
+            self.update()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sync(self, table, split, on_disk, read):
+        """Insert new/changed rows for ``table`` and delete vanished ones; returns the change count."""
+        stored = {path: (size, mtime) for path, size, mtime in self.db.execute(
+            f"SELECT path, size, mtime_ns FROM {table} WHERE split = ?", (split,))}
+        changed = [path for path, stat in on_disk.items() if stored.get(path) != stat]
+        gone = [path for path in stored if path not in on_disk]
+        chunks = [changed[i:i + CHUNK_SIZE] for i in range(0, len(changed), CHUNK_SIZE)]
+        if len(chunks) <= 1 or WORKERS <= 1:
+            contents = [content for chunk in chunks for content in read(chunk)]
+        else:
+            # Header reads are I/O bound; label parsing is CPU bound
+            executor = ThreadPoolExecutor if table == "images" else ProcessPoolExecutor
+            with executor(max_workers=WORKERS) as pool:
+                contents = [content for result in pool.map(read, chunks) for content in result]
+
+        stale = [(path,) for path in changed + gone]
+        self.db.executemany(f"DELETE FROM {table} WHERE path = ?", stale)
+        if table == "labels":
+            self.db.executemany("DELETE FROM boxes WHERE label = ?", stale)
+        for path, content in zip(changed, contents):
+            size, mtime = on_disk[path]
+            stem = Path(path).stem
+            if table == "images":
+                self.db.execute("INSERT INTO images VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (path, split, stem, size, mtime, *content))
+            else:
+                lines, malformed, classes, boxes = content
+                self.db.execute("INSERT INTO labels VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                (path, split, stem, size, mtime, lines, malformed, classes))
+                self.db.executemany("INSERT INTO boxes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    [(path, *box) for box in boxes])
+        return len(changed) + len(gone)
+
+    def update(self):
+        """Re-index new, modified and deleted files; returns the number of changes."""
+        changes = 0
+        splits = find_splits(self.dataset_dir)
+        for split in splits:
+            split_dir = self.dataset_dir / split
+            changes += self._sync("images", split, scan_dir(split_dir / "images", IMAGE_EXTS), image_sizes)
+            changes += self._sync("labels", split, scan_dir(split_dir / "labels", [".txt"]), parse_labels)
+        # Splits whose folders were removed entirely
+        for table in ("images", "labels"):
+            for (split,) in self.db.execute(f"SELECT DISTINCT split FROM {table}").fetchall():
+                if split not in splits:
+                    changes += self._sync(table, split, {}, None)
+        self.db.commit()
+        return changes
+
+    def splits(self):
+        return [row[0] for row in self.db.execute(
+            "SELECT split FROM images UNION SELECT split FROM labels ORDER BY 1")]
+
+    def count(self, table, split=None):
+        query = f"SELECT COUNT(*) FROM {table}" + (" WHERE split = ?" if split is not None else "")
+        return self.db.execute(query, () if split is None else (split,)).fetchone()[0]
+
+    def pairs(self, split=""):
+        """``[(image, label or None)]`` for every image of a split, sorted by path."""
+        rows = self.db.execute(
+            "SELECT i.path, l.path FROM images i LEFT JOIN labels l ON l.split = i.split AND l.stem = i.stem "
+            "WHERE i.split = ? ORDER BY i.path", (split,))
+        return [(Path(image), Path(label) if label else None) for image, label in rows]
+
+    def labels(self, split=""):
+        """``[(label, image or None, lines, malformed, classes)]`` for every label file of a split."""
+        rows = self.db.execute(
+            "SELECT l.path, MIN(i.path), l.lines, l.malformed, l.classes FROM labels l "
+            "LEFT JOIN images i ON i.split = l.split AND i.stem = l.stem "
+            "WHERE l.split = ? GROUP BY l.path ORDER BY l.path", (split,))
+        return [(Path(label), Path(image) if image else None, lines, malformed,
+                 tuple(int(c) for c in classes.split(",") if c))
+                for label, image, lines, malformed, classes in rows]
+
+    def boxes(self, label_path):
+        """``[(cls, cx, cy, w, h)]`` of the well-formed lines of one label file."""
+        return [row for row in self.db.execute(
+            "SELECT cls, cx, cy, w, h FROM boxes WHERE label = ? ORDER BY line", (str(label_path),))]
+
+    def packed_labels(self, split=""):
+        """Well-formed boxes of every label file of a split as ``PackedLabels`` (files sorted by path)."""
+        files = [row[0] for row in self.db.execute("SELECT path FROM labels WHERE split = ? ORDER BY path", (split,))]
+        rows = self.db.execute(
+            "SELECT l.path, b.line, b.cls, b.cx, b.cy, b.w, b.h FROM boxes b JOIN labels l ON b.label = l.path "
+            "WHERE l.split = ? ORDER BY l.path, b.line", (split,)).fetchall()
+        boxes = np.array([row[2:] for row in rows], dtype=np.float32).reshape(-1, 5)
+        box_line = np.array([row[1] for row in rows], dtype=np.int64)
+        # Rows are sorted by path like ``files``, so per-file counts give the offsets
+        counts = {}
+        for row in rows:
+            counts[row[0]] = counts.get(row[0], 0) + 1
+        offsets = np.concatenate(([0], np.cumsum([counts.get(f, 0) for f in files]))).astype(np.int64)
+        return PackedLabels([Path(f) for f in files], boxes, offsets, box_line)
+
+    def image_size(self, image_path):
+        return self.db.execute("SELECT width, height FROM images WHERE path = ?", (str(image_path),)).fetchone()
+
+# -------------------- MAIN SCRIPT --------------------
+
+
+def main():
+    with Manifest(DATASET_DIR, update=False) as manifest:
+        changes = manifest.update()
+        print(f"[INFO] Manifest {DATASET_DIR / MANIFEST_NAME}: {changes} file(s) re-indexed")
+        for split in manifest.splits():
+            boxes = manifest.db.execute(
+                "SELECT COUNT(*) FROM boxes b JOIN labels l ON b.label = l.path WHERE l.split = ?",
+                (split,)).fetchone()[0]
+            print(f"[INFO] Split: {split or '.'}  images {manifest.count('images', split)}  "
+                  f"labels {manifest.count('labels', split)}  boxes {boxes}")
+
+
+if __name__ == "__main__":
+    main()
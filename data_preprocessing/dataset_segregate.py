@@ -1,36 +1,31 @@
 import os
-import shutil
+import sys
 from pathlib import Path
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_manifest import Manifest
+from data_preprocessing.dataset_views import VIEW_MODE, check_mode, place_image, place_label, write_image_list
+
 # -------------------- CONFIGURATION --------------------
 # Must contain train/, valid/, test/
 INPUT_DATASET_DIR = Path(os.environ.get("INPUT_DATASET_DIR", "dataset/Test2.v1i.yolov11"))
 OUTPUT_BASE_DIR = Path(os.environ.get("OUTPUT_BASE_DIR", "dataset/data"))  # Will create class_x_y/... folders
+# copy | hardlink | symlink | list (class_x_y.txt image lists, no copies); see dataset_views.py
+MODE = check_mode(VIEW_MODE)
 # -------------------------------------------------------
 
 SPLITS = ['train', 'valid', 'test']
 
 
-def extract_class_combination(label_path: Path):
-    """Return sorted tuple of unique class IDs found in label file."""
-    class_ids = set()
-    try:
-        with label_path.open('r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if parts and parts[0].isdigit():
-                    class_ids.add(int(parts[0]))
-    except Exception as e:
-        print(f"[ERROR] Reading {label_path}: {e}")
-    return tuple(sorted(class_ids))
-
-
 def get_combination_folder_name(class_ids_tuple):
     """Generate folder name like class_0_2 from tuple (0, 2)."""
     return "class_" + "_".join(str(cid) for cid in class_ids_tuple)
 
 
 def segregate_dataset():
+    manifest = Manifest(INPUT_DATASET_DIR)
+    combo_images = {}
     for split in SPLITS:
         image_dir = INPUT_DATASET_DIR / split / "images"
         label_dir = INPUT_DATASET_DIR / split / "labels"
@@ -39,19 +34,19 @@ def segregate_dataset():
             print(f"[WARN] Skipping '{split}' – missing images or labels folder.")
             continue
 
-        for label_file in label_dir.glob("*.txt"):
-            stem = label_file.stem
-            image_file = next((f for f in image_dir.glob(f"{stem}.*")), None)
-
+        # Class IDs of every label line, with its image, straight from the manifest
+        for label_file, image_file, _, _, class_ids in manifest.labels(split):
             if not image_file:
                 print(f"[WARN] No image found for label: {label_file.name}")
                 continue
 
-            class_ids = extract_class_combination(label_file)
             if not class_ids:
                 continue
 
             combo_folder_name = get_combination_folder_name(class_ids)
+            if MODE == "list":
+                combo_images.setdefault(combo_folder_name, []).append(image_file)
+                continue
             combo_dir = OUTPUT_BASE_DIR / combo_folder_name
             image_out_dir = combo_dir / "images"
             label_out_dir = combo_dir / "labels"
@@ -59,9 +54,12 @@ def segregate_dataset():
             image_out_dir.mkdir(parents=True, exist_ok=True)
             label_out_dir.mkdir(parents=True, exist_ok=True)
 
-            shutil.copy2(image_file, image_out_dir / image_file.name)
-            shutil.copy2(label_file, label_out_dir / label_file.name)
+            place_image(image_file, image_out_dir / image_file.name, MODE)
+            place_label(label_file, label_out_dir / label_file.name)
 
+    manifest.close()
+    for combo_folder_name, images in combo_images.items():
+        write_image_list(images, OUTPUT_BASE_DIR / f"{combo_folder_name}.txt")
     print("✅ Dataset segregation by class combinations complete.")
 
 
@@ -1,8 +1,13 @@
 import os
-import shutil
+import sys
 import random
 from pathlib import Path
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_manifest import Manifest
+from data_preprocessing.dataset_views import VIEW_MODE, check_mode, place_image, place_label, write_list_dataset
+
 # ---------------- CONFIGURATION ----------------
 # Path to folder containing 'images/' and 'labels/'
 INPUT_DIR = Path(os.environ.get("INPUT_DIR", "dataset/data/class_2"))
@@ -15,13 +20,11 @@ SPLIT_RATIO = {
 }
 
 IMAGE_EXTS = [".jpg", ".jpeg", ".png"]
+# copy | hardlink | symlink | list (image-list files + data.yaml, no copies); see dataset_views.py
+MODE = check_mode(VIEW_MODE)
 # ------------------------------------------------
 
 
-def get_image_files(image_dir):
-    return [f for f in image_dir.iterdir() if f.suffix.lower() in IMAGE_EXTS]
-
-
 def ensure_dir(path):
     if not path.exists():
         path.mkdir(parents=True)
@@ -41,19 +44,17 @@ def split_dataset(image_files, ratios):
     }
 
 
-def copy_files(image_list, subset_name, image_dir, label_dir):
+def copy_files(pair_list, subset_name):
     out_img_dir = OUTPUT_DIR / subset_name / 'images'
     out_lbl_dir = OUTPUT_DIR / subset_name / 'labels'
 
     ensure_dir(out_img_dir)
     ensure_dir(out_lbl_dir)
 
-    for img_path in image_list:
-        label_path = label_dir / (img_path.stem + ".txt")
-
-        shutil.copy(img_path, out_img_dir / img_path.name)
-        if label_path.exists():
-            shutil.copy(label_path, out_lbl_dir / label_path.name)
+    for img_path, label_path in pair_list:
+        place_image(img_path, out_img_dir / img_path.name, MODE)
+        if label_path is not None:
+            place_label(label_path, out_lbl_dir / label_path.name)
 
 
 def main():
@@ -63,12 +64,18 @@ def main():
     if not image_dir.exists() or not label_dir.exists():
         raise FileNotFoundError("Ensure 'images/' and 'labels/' folders exist in the input directory.")
 
-    image_files = get_image_files(image_dir)
+    with Manifest(INPUT_DIR) as manifest:
+        image_files = [pair for pair in manifest.pairs("") if pair[0].suffix.lower() in IMAGE_EXTS]
 
     splits = split_dataset(image_files, SPLIT_RATIO)
 
-    for split_name, files in splits.items():
-        copy_files(files, split_name, image_dir, label_dir)
+    if MODE == "list":
+        yaml_path = write_list_dataset(OUTPUT_DIR, {name: [img for img, _ in files] for name, files in splits.items()},
+                                       INPUT_DIR)
+        print(f"📝 Image lists written; train with data={yaml_path}")
+    else:
+        for split_name, files in splits.items():
+            copy_files(files, split_name)
 
     print("✅ Dataset split completed successfully.")
     for k, v in splits.items():
@@ -0,0 +1,239 @@
+"""
+YOLO Dataset Statistics
+
+Reports the label and image distributions of a YOLO dataset, per split and in
+total, for balancing face vs phone data:
+
+- class frequencies (boxes and images containing the class)
+- boxes per image (images without a label file count as empty)
+- box size (sqrt of the normalized area) and aspect ratio (width / height in pixels)
+- image resolutions
+
+Everything comes from the dataset manifest (`dataset_manifest.py`): labels are
+parsed and image sizes read from the file headers once, and later runs only
+re-read changed files. Each split is aggregated with NumPy over all of its boxes
+at once; histograms use fixed bins, so the totals are the sums of the splits.
+
+Writes `stats.json` and small PNG histograms to `STATS_DIR`.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_manifest import Manifest
+from data_preprocessing.dataset_views import read_class_names
+
+# -------------------- CONFIGURATION --------------------
+DATASET_DIR = Path(os.environ.get("DATASET_DIR", "dataset/Forklift_Dataset"))
+STATS_DIR = Path(os.environ.get("STATS_DIR", DATASET_DIR / "stats"))
+PLOT_HISTOGRAMS = True
+MAX_BOXES_BIN = 20                             # Last boxes-per-image bin holds everything above
+SIZE_BINS = np.linspace(0, 1, 21)              # sqrt(w * h), normalized
+ASPECT_BINS = 2.0 ** np.arange(-4, 4.5, 0.5)   # width / height, clipped to the outer bins
+TOP_RESOLUTIONS = 10
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def summary(values):
+    if not len(values):
+        return {"min": None, "mean": None, "max": None}
+    return {"min": round(float(values.min()), 4), "mean": round(float(values.mean()), 4),
+            "max": round(float(values.max()), 4)}
+
+
+def split_arrays(manifest, split):
+    """
+    Return ``(boxes, box_wh, boxes_per_image, image_wh)`` for one split:
+    the packed boxes, the pixel size of the image each box belongs to
+    (NaN when unknown), the box count of every image and every image's size.
+    """
+    labels = manifest.packed_labels(split)
+    # Same order as ``packed_labels`` files: one row per label file, sorted by path
+    label_wh = np.array(manifest.db.execute(
+        "SELECT MIN(i.width), MIN(i.height) FROM labels l "
+        "LEFT JOIN images i ON i.split = l.split AND i.stem = l.stem "
+        "WHERE l.split = ? GROUP BY l.path ORDER BY l.path", (split,)).fetchall(), dtype=np.float64).reshape(-1, 2)
+    image_wh = np.array(manifest.db.execute(
+        "SELECT width, height FROM images WHERE split = ?", (split,)).fetchall(), dtype=np.float64).reshape(-1, 2)
+    unlabeled = manifest.db.execute(
+        "SELECT COUNT(*) FROM images i WHERE i.split = ? AND NOT EXISTS "
+        "(SELECT 1 FROM labels l WHERE l.split = i.split AND l.stem = i.stem)", (split,)).fetchone()[0]
+
+    box_wh = label_wh[labels.box_file()] if len(labels.boxes) else np.zeros((0, 2))
+    boxes_per_image = np.concatenate((labels.counts(), np.zeros(unlabeled, dtype=np.int64)))
+    return labels.boxes, box_wh, boxes_per_image, image_wh
+
+
+def split_stats(boxes, box_wh, boxes_per_image, image_wh):
+    """Histograms and counts of one split; every histogram uses the fixed bins above."""
+    cls = boxes[:, 0].astype(np.int64)
+    w, h = boxes[:, 3].astype(np.float64), boxes[:, 4].astype(np.float64)
+    # Pixel aspect where the image size is known, normalized aspect otherwise
+    pixel_w = np.where(np.isnan(box_wh[:, 0]), 1.0, box_wh[:, 0])
+    pixel_h = np.where(np.isnan(box_wh[:, 1]), 1.0, box_wh[:, 1])
+    aspect = np.divide(w * pixel_w, h * pixel_h, out=np.full_like(w, np.nan), where=h > 0)
+    aspect = np.clip(aspect[~np.isnan(aspect)], ASPECT_BINS[0], ASPECT_BINS[-1])
+
+    # Images containing each class: unique (image, class) pairs
+    image_index = np.repeat(np.arange(len(boxes_per_image)), boxes_per_image)
+    pairs = np.unique(np.stack((image_index, cls), axis=1), axis=0) if len(cls) else np.zeros((0, 2), dtype=np.int64)
+    box_counts = np.bincount(cls) if len(cls) else np.zeros(0, dtype=np.int64)
+    image_counts = np.bincount(pairs[:, 1], minlength=len(box_counts))
+
+    known = image_wh[~np.isnan(image_wh).any(axis=1)].astype(np.int64)
+    resolutions, resolution_counts = (np.unique(known, axis=0, return_counts=True) if len(known)
+                                      else (np.zeros((0, 2), dtype=np.int64), np.zeros(0, dtype=np.int64)))
+
+    return {
+        "images": int(len(boxes_per_image)),
+        "boxes": int(len(boxes)),
+        "classes": {int(c): {"boxes": int(box_counts[c]), "images": int(image_counts[c])}
+                    for c in np.flatnonzero(box_counts)},
+        "boxes_per_image": np.bincount(np.minimum(boxes_per_image, MAX_BOXES_BIN),
+                                       minlength=MAX_BOXES_BIN + 1).tolist(),
+        "box_size": np.histogram(np.sqrt(w * h), SIZE_BINS)[0].tolist(),
+        "box_aspect": np.histogram(aspect, ASPECT_BINS)[0].tolist(),
+        "resolutions": {f"{rw}x{rh}": int(n) for (rw, rh), n in zip(resolutions.tolist(), resolution_counts.tolist())},
+        "width": summary(known[:, 0]),
+        "height": summary(known[:, 1]),
+        "mean_boxes_per_image": round(float(boxes_per_image.mean()), 4) if len(boxes_per_image) else None,
+        "max_boxes_per_image": int(boxes_per_image.max(initial=0)),
+    }
+
+
+def merge_stats(stats):
+    """Totals over splits: counts and fixed-bin histograms add up."""
+    total = {
+        "images": sum(s["images"] for s in stats),
+        "boxes": sum(s["boxes"] for s in stats),
+        "classes": {},
+        "resolutions": {},
+    }
+    for key in ("boxes_per_image", "box_size", "box_aspect"):
+        total[key] = np.sum([s[key] for s in stats], axis=0).astype(int).tolist() if stats else []
+    for s in stats:
+        for c, counts in s["classes"].items():
+            merged = total["classes"].setdefault(c, {"boxes": 0, "images": 0})
+            merged["boxes"] += counts["boxes"]
+            merged["images"] += counts["images"]
+        for resolution, n in s["resolutions"].items():
+            total["resolutions"][resolution] = total["resolutions"].get(resolution, 0) + n
+    total["classes"] = dict(sorted(total["classes"].items()))
+    for key in ("width", "height"):
+        known = [s for s in stats if s[key]["min"] is not None]
+        sized = [sum(s["resolutions"].values()) for s in known]
+        total[key] = {
+            "min": min((s[key]["min"] for s in known), default=None),
+            "mean": round(sum(s[key]["mean"] * n for s, n in zip(known, sized)) / sum(sized), 4) if known else None,
+            "max": max((s[key]["max"] for s in known), default=None),
+        }
+    total["mean_boxes_per_image"] = round(total["boxes"] / total["images"], 4) if total["images"] else None
+    total["max_boxes_per_image"] = max((s["max_boxes_per_image"] for s in stats), default=0)
+    return total
+
+
+def top_resolutions(stats):
+    for s in stats.values():
+        s["resolutions"] = dict(sorted(s["resolutions"].items(), key=lambda item: -item[1])[:TOP_RESOLUTIONS])
+
+
+def plot_histograms(stats, names, out_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    splits = [split for split in stats if split != "total"]
+    plots = {
+        "boxes_per_image": (np.arange(MAX_BOXES_BIN + 2) - 0.5, "Boxes per image", False),
+        "box_size": (SIZE_BINS, "Box size (sqrt of normalized area)", False),
+        "box_aspect": (ASPECT_BINS, "Box aspect (width / height)", True),
+    }
+    paths = []
+    for key, (bins, xlabel, log_x) in plots.items():
+        fig, ax = plt.subplots(figsize=(5, 3.5))
+        for split in splits:
+            ax.stairs(stats[split][key], bins, label=split or ".")
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("Count")
+        if log_x:
+            ax.set_xscale("log", base=2)
+        ax.legend()
+        paths.append(out_dir / f"{key}.png")
+        fig.savefig(paths[-1], dpi=100, bbox_inches="tight")
+        plt.close(fig)
+
+    classes = sorted(stats["total"]["classes"])
+    fig, ax = plt.subplots(figsize=(5, 3.5))
+    width = 0.8 / max(len(splits), 1)
+    for i, split in enumerate(splits):
+        counts = [stats[split]["classes"].get(c, {"boxes": 0})["boxes"] for c in classes]
+        ax.bar(np.arange(len(classes)) + i * width, counts, width, label=split or ".")
+    ax.set_xticks(np.arange(len(classes)) + width * (len(splits) - 1) / 2)
+    ax.set_xticklabels([str(names.get(c, c)) for c in classes])
+    ax.set_ylabel("Boxes")
+    ax.legend()
+    paths.append(out_dir / "classes.png")
+    fig.savefig(paths[-1], dpi=100, bbox_inches="tight")
+    plt.close(fig)
+    return paths
+
+# -------------------- MAIN SCRIPT --------------------
+
+
+def dataset_stats(dataset_dir=DATASET_DIR, out_dir=STATS_DIR, plot=PLOT_HISTOGRAMS):
+    start = time.perf_counter()
+    with Manifest(dataset_dir) as manifest:
+        splits = manifest.splits()
+        stats = {split: split_stats(*split_arrays(manifest, split)) for split in splits}
+    stats["total"] = merge_stats(list(stats.values()))
+    top_resolutions(stats)
+
+    names = read_class_names(dataset_dir) or {}
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "dataset": str(dataset_dir),
+        "class_names": {int(c): str(name) for c, name in names.items()},
+        "bins": {"boxes_per_image": list(range(MAX_BOXES_BIN + 1)),
+                 "box_size": SIZE_BINS.round(4).tolist(), "box_aspect": ASPECT_BINS.round(4).tolist()},
+        "splits": stats,
+    }
+    json_path = out_dir / "stats.json"
+    json_path.write_text(json.dumps(report, indent=2))
+
+    for split, s in stats.items():
+        classes = ", ".join(f"{names.get(c, c)}: {n['boxes']} boxes / {n['images']} images"
+                            for c, n in s["classes"].items())
+        print(f"[INFO] Split: {split or '.'}  images {s['images']}  boxes {s['boxes']}  "
+              f"boxes/image {s['mean_boxes_per_image']}  ({classes or 'no boxes'})")
+    print(f"📝 Report: {json_path} ({time.perf_counter() - start:.2f} s)")
+    if plot:
+        try:
+            for path in plot_histograms(stats, names, out_dir):
+                print(f"📊 {path}")
+        except ImportError:
+            print("⚠️ matplotlib is not installed; skipping the PNG histograms")
+    return report
+
+
+def main():
+    dataset_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DATASET_DIR
+    if not dataset_dir.is_dir():
+        print(f"❌ Error: dataset folder not found: {dataset_dir}")
+        sys.exit(1)
+    dataset_stats(dataset_dir, STATS_DIR if len(sys.argv) < 2 or "STATS_DIR" in os.environ else dataset_dir / "stats")
+
+
+if __name__ == "__main__":
+    main()
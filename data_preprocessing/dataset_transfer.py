@@ -4,7 +4,8 @@ YOLO Dataset Transfer Script
 This script transfers a YOLO-format object detection dataset from one directory to another,
 maintaining the directory structure (`train/`, `valid/`, `test/`), including both `images/` and `labels/`.
 
-Simply configure the source and destination paths.
+Simply configure the source and destination paths. Set `VIEW_MODE` to hard-link or
+symlink images, or to write image lists only, instead of copying (see `dataset_views.py`).
 
 Usage:
 - Update `SOURCE_DIR` and `DESTINATION_DIR`
@@ -15,9 +16,13 @@ Version: 1.0
 """
 
 import os
-import shutil
+import sys
 from pathlib import Path
 
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_views import VIEW_MODE, check_mode, place_image, place_label, write_list_dataset
+
 # -------------------- CONFIGURATION --------------------
 # Paths can be overridden using environment variables for cross-platform support
 DEFAULT_SOURCE = Path("dataset/source")
@@ -25,6 +30,7 @@ DEFAULT_DESTINATION = Path("dataset/destination")
 
 SOURCE_DIR = Path(os.environ.get("SOURCE_DIR", DEFAULT_SOURCE))
 DESTINATION_DIR = Path(os.environ.get("DESTINATION_DIR", DEFAULT_DESTINATION))
+MODE = check_mode(VIEW_MODE)
 
 # -------------------- MAIN SCRIPT --------------------
 
@@ -35,6 +41,13 @@ def transfer_yolo_dataset():
 
     print("[INFO] Starting dataset transfer...")
 
+    if MODE == "list":
+        split_images = {split: sorted((SOURCE_DIR / split / "images").glob("*.*"))
+                        for split in splits if (SOURCE_DIR / split / "images").exists()}
+        yaml_path = write_list_dataset(DESTINATION_DIR, split_images, SOURCE_DIR)
+        print(f"\n✅ Image lists written; train with data={yaml_path}")
+        return
+
     for split in splits:
         for sub in subfolders:
             src_path = SOURCE_DIR / split / sub
@@ -49,7 +62,10 @@ def transfer_yolo_dataset():
             print(f"[INFO] Copying {len(files)} files from {src_path} to {dst_path}...")
 
             for file in files:
-                shutil.copy(file, dst_path)
+                if sub == "images":
+                    place_image(file, dst_path / file.name, MODE)
+                else:
+                    place_label(file, dst_path / file.name)
 
     print("\n✅ Dataset transfer complete.")
 
@@ -0,0 +1,115 @@
+"""
+Dataset Views
+
+Helpers for scripts that build a new dataset from an existing one
+(`dataset_split.py`, `dataset_segregate.py`, `dataset_transfer.py`,
+`dataset_cleaning.py`) without duplicating every image:
+
+- `copy`:     copy images (previous behaviour)
+- `hardlink`: hard-link images; falls back to copying across filesystems
+- `symlink`:  symlink images to their absolute source path
+- `list`:     write no files, only Ultralytics image-list files (`<split>.txt`) and a
+              `data.yaml` pointing at them; labels are read from the source dataset
+
+Label files are always copied in the file modes. They are small, and tools that
+edit labels in place must not write through a link into the source dataset.
+
+Set `VIEW_MODE` (environment variable) to choose the mode.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+# -------------------- CONFIGURATION --------------------
+VIEW_MODE = os.environ.get("VIEW_MODE", "copy")
+VIEW_MODES = ["copy", "hardlink", "symlink", "list"]
+
+# Ultralytics data.yaml keys for the split folder names used in this repo
+YAML_SPLIT_KEYS = {"train": "train", "valid": "val", "val": "val", "test": "test"}
+
+_fallback_warned = set()
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def check_mode(mode=VIEW_MODE):
+    if mode not in VIEW_MODES:
+        raise ValueError(f"VIEW_MODE must be one of {VIEW_MODES}, got '{mode}'")
+    return mode
+
+
+def place_image(src, dst, mode=VIEW_MODE):
+    """
+    Put ``src`` at ``dst`` by copy, hard link or symlink.  Returns the mode
+    actually used: hard links and symlinks fall back to a copy when the
+    filesystem refuses them (e.g. across devices).
+    """
+    dst = Path(dst)
+    if os.path.lexists(dst):
+        dst.unlink()
+    try:
+        if mode == "hardlink":
+            os.link(src, dst)
+            return mode
+        if mode == "symlink":
+            os.symlink(os.path.abspath(src), dst)
+            return mode
+    except OSError as e:
+        if mode not in _fallback_warned:
+            _fallback_warned.add(mode)
+            print(f"⚠️ Cannot {mode} {src} -> {dst} ({e}); copying instead")
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def place_label(src, dst):
+    shutil.copy2(src, dst)
+
+
+def write_image_list(images, path):
+    """Write absolute image paths, one per line, as Ultralytics expects."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text("".join(f"{os.path.abspath(image)}\n" for image in images))
+    os.replace(tmp, path)
+    return path
+
+
+def read_class_names(source_dir):
+    """Class names from the source dataset's data.yaml, or ``None``."""
+    yaml_path = Path(source_dir) / "data.yaml"
+    if not yaml_path.exists():
+        return None
+    import yaml
+    with open(yaml_path, "r") as f:
+        return (yaml.safe_load(f) or {}).get("names")
+
+
+def write_list_dataset(out_dir, split_images, source_dir=None):
+    """
+    Write ``<split>.txt`` for each ``{split: [images]}`` entry and a
+    ``data.yaml`` referencing them.  Returns the yaml path.
+    """
+    out_dir = Path(out_dir)
+    # JSON strings are valid YAML scalars and survive ':' or '#' in names
+    lines = [f"path: {json.dumps(str(out_dir.resolve()))}"]
+    for split, images in split_images.items():
+        list_path = write_image_list(images, out_dir / f"{split}.txt")
+        lines.append(f"{YAML_SPLIT_KEYS.get(split, split)}: {list_path.name}")
+    names = read_class_names(source_dir) if source_dir else None
+    if names is None:
+        print(f"⚠️ No class names found in {source_dir}/data.yaml; add 'names' to {out_dir / 'data.yaml'}")
+    else:
+        if isinstance(names, list):
+            names = dict(enumerate(names))
+        lines.append(f"nc: {len(names)}")
+        lines.append("names:")
+        lines += [f"  {index}: {json.dumps(str(name))}" for index, name in names.items()]
+    yaml_path = out_dir / "data.yaml"
+    yaml_path.write_text("\n".join(lines) + "\n")
+    return yaml_path
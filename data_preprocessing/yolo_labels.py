@@ -0,0 +1,196 @@
+"""
+Bulk YOLO Label Loader
+
+Reads many YOLO label files at once into a packed representation instead of
+splitting and converting every line in Python:
+
+- `boxes`: float32 `(N, 5)` array of class, cx, cy, w, h for every well-formed line
+- `offsets`: `(F + 1,)` array; boxes of file `i` are `boxes[offsets[i]:offsets[i + 1]]`
+- line-level masks (`wrong_count`, `polygon`, `unparsable`, `bad_class`,
+  `out_of_range`) marking malformed lines, e.g. segmentation polygons
+
+All files are read in bulk, every number in them is converted in one NumPy call,
+and dataset-wide rules (`validate`) are expressed as array operations.
+
+Run on its own, the script loads a labels folder and reports malformed lines.
+
+Author: Kirtan Soni
+Version: 1.0
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+import numpy as np
+
+# -------------------- CONFIGURATION --------------------
+LABELS_DIR = Path(os.environ.get("LABELS_DIR", "dataset/Forklift_Dataset/train/labels"))
+NUM_CLASSES = None  # Set to reject class IDs >= this value
+READ_WORKERS = 8    # Threads reading files; parsing itself is vectorized
+READ_CHUNK = 512    # Files read per thread task
+
+# -------------------- UTILITY FUNCTIONS --------------------
+
+
+def read_texts(paths):
+    texts = []
+    for path in paths:
+        with open(path, "r") as f:
+            texts.append(f.read())
+    return texts
+
+
+def to_floats(tokens):
+    """Convert tokens to float64, with NaN for any that are not numbers."""
+    try:
+        return np.array(tokens, dtype=np.float64)
+    except ValueError:
+        values = np.full(len(tokens), np.nan)
+        for i, token in enumerate(tokens):
+            try:
+                values[i] = float(token)
+            except ValueError:
+                pass
+        return values
+
+
+class PackedLabels:
+    """
+    Boxes of many label files in one array.  Line-level arrays cover every
+    non-blank line; they are empty when the labels came from the manifest.
+    """
+
+    def __init__(self, files, boxes, offsets, box_line=None, line_file=None, line_cls=None, masks=None):
+        self.files = list(files)  # As passed in: str or Path
+        self.boxes = boxes
+        self.offsets = offsets
+        self.box_line = box_line if box_line is not None else np.zeros(len(boxes), dtype=np.int64)
+        self.line_file = line_file if line_file is not None else np.zeros(0, dtype=np.int64)
+        self.line_cls = line_cls if line_cls is not None else np.zeros(0, dtype=np.int64)
+        self.masks = masks or {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def counts(self):
+        """Number of well-formed boxes per file."""
+        return np.diff(self.offsets)
+
+    def box_file(self):
+        """File index of every box."""
+        return np.repeat(np.arange(len(self.files)), self.counts())
+
+    def file_boxes(self, index):
+        return self.boxes[self.offsets[index]:self.offsets[index + 1]]
+
+    def malformed(self):
+        """``(L,)`` mask of lines failing any rule."""
+        invalid = np.zeros(len(self.line_file), dtype=bool)
+        for mask in self.masks.values():
+            invalid |= mask
+        return invalid
+
+    def line_counts(self):
+        return np.bincount(self.line_file, minlength=len(self.files))
+
+    def malformed_counts(self):
+        return np.bincount(self.line_file[self.malformed()], minlength=len(self.files))
+
+    def classes(self):
+        """Sorted class IDs on every line (boxes and polygons) of each file."""
+        known = self.line_cls >= 0
+        pairs = np.unique(np.stack((self.line_file[known], self.line_cls[known]), axis=1), axis=0)
+        classes = [[] for _ in self.files]
+        for file_index, cls in pairs.tolist():
+            classes[file_index].append(cls)
+        return classes
+
+
+def load_label_files(paths, num_classes=NUM_CLASSES):
+    """Read and parse ``paths`` into a ``PackedLabels``."""
+    paths = list(paths)
+    chunks = [paths[i:i + READ_CHUNK] for i in range(0, len(paths), READ_CHUNK)]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        texts = list(chain.from_iterable(pool.map(read_texts, chunks)))
+
+    per_file = [text.splitlines() for text in texts]
+    lines = list(chain.from_iterable(per_file))
+    line_file = np.repeat(np.arange(len(paths)), [len(file_lines) for file_lines in per_file])
+    ntok = np.fromiter(map(len, map(str.split, lines)), dtype=np.int64, count=len(lines))
+
+    # Blank lines are not annotations
+    keep = ntok > 0
+    lines = [line for line, kept in zip(lines, keep) if kept]
+    line_file, ntok = line_file[keep], ntok[keep]
+    starts = np.cumsum(ntok) - ntok
+    first_line = np.searchsorted(line_file, np.arange(len(paths)))
+    line_no = np.arange(len(lines)) - first_line[line_file]
+
+    values = to_floats(" ".join(lines).split())
+    unparsable = np.add.reduceat(np.isnan(values), starts) > 0 if len(lines) else np.zeros(0, dtype=bool)
+
+    first = values[starts] if len(lines) else np.zeros(0)
+    integral = np.isfinite(first) & (first >= 0) & (first == np.floor(first))
+    if num_classes is not None:
+        integral &= first < num_classes
+    line_cls = np.where(integral, first, -1).astype(np.int64)
+
+    five = (ntok == 5) & ~unparsable
+    rows = values[starts[five, None] + np.arange(5)]
+    out_of_range = np.zeros(len(lines), dtype=bool)
+    out_of_range[five] = ((rows[:, 1:] < 0) | (rows[:, 1:] > 1)).any(axis=1)
+    masks = {
+        "wrong_count": (ntok != 5) & ~((ntok > 5) & (ntok % 2 == 1)),
+        "polygon": (ntok > 5) & (ntok % 2 == 1),  # class followed by x, y pairs
+        "unparsable": unparsable,
+        "bad_class": ~unparsable & (line_cls < 0),
+        "out_of_range": out_of_range,
+    }
+
+    valid = five & (line_cls >= 0) & ~out_of_range
+    boxes = values[starts[valid, None] + np.arange(5)].astype(np.float32)
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(line_file[valid], minlength=len(paths)))))
+    return PackedLabels(paths, boxes, offsets, line_no[valid], line_file, line_cls, masks)
+
+
+def load_labels_dir(labels_dir, num_classes=NUM_CLASSES):
+    """Load every ``.txt`` file of a labels folder, sorted by name."""
+    names = sorted(name for name in os.listdir(labels_dir) if name.endswith(".txt"))
+    return load_label_files([os.path.join(labels_dir, name) for name in names], num_classes)
+
+
+def validate(labels, max_objects, min_area):
+    """
+    Per-file verdict for the cleaning rules: "no_detection",
+    "too_many_detections", "bbox_too_small" or "valid".
+    """
+    counts = labels.counts()
+    area = labels.boxes[:, 3] * labels.boxes[:, 4]
+    small = np.bincount(labels.box_file()[area < min_area], minlength=len(labels)) > 0
+    return np.select([counts == 0, counts > max_objects, small],
+                     ["no_detection", "too_many_detections", "bbox_too_small"], "valid")
+
+# -------------------- MAIN SCRIPT --------------------
+
+
+def main():
+    labels_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else LABELS_DIR
+    if not labels_dir.is_dir():
+        print(f"❌ Error: labels folder not found: {labels_dir}")
+        sys.exit(1)
+
+    labels = load_labels_dir(labels_dir)
+    print(f"[INFO] {len(labels)} label files, {len(labels.line_file)} lines, {len(labels.boxes)} boxes")
+    for name, mask in labels.masks.items():
+        print(f"[INFO] {name}: {int(mask.sum())} line(s)")
+    malformed = labels.malformed_counts()
+    bad = np.flatnonzero(malformed)
+    for index in bad[:20]:
+        print(f"  {os.path.basename(labels.files[index])}: {malformed[index]} malformed line(s)")
+    if len(bad) > 20:
+        print(f"  ... and {len(bad) - 20} more files")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,37 @@
 # -*- coding: utf-8 -*-
 
 import cv2
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 from utils.camera_stream import CameraStream
-from core.detector import AIDetector
+from core.detector import AIDetector, unpack_detections
+from core.inference_worker import InferenceWorker
+from core.motion_gate import MotionGate
+from core.roi import RoiDetector
+from core.cascade import PhoneCascade
+from core.adaptive import AdaptiveDetector
+from core.model_manager import ModelManager, active_model_path
+from utils.clip_recorder import ClipRecorder
+from utils.detection_log import (
+    DetectionLogger,
+    FLAG_PHONE_PRESENT,
+    FLAG_PHONE_ACTIVE,
+    FLAG_ANY_OUTSIDE,
+    FLAG_BREACH_ACTIVE,
+    FLAG_GATED,
+)
 # from comm.serial_comm import SerialComm
 from utils.log import log_info, log_error
+from utils.startup import StartupTimer
+from utils.thread_budget import apply_process_budget, apply_thread_role
 from utils.web_stream import (
     start_web_streaming,
     update_frame,
-    get_bounds,
+    get_zones,
     update_status,
     set_notice,
     hold_notice,
+    add_notice_listener,
+    set_model_manager,
 )
 from utils.defines import (
     FACE_CLASS_ID,
@@ -31,23 +50,103 @@ from utils.defines import (
     SAFE_ZONE_DEBOUNCE_FRAMES,
     CONFIDENCE_THRESHOLD_FACE,
     CONFIDENCE_THRESHOLD_PHONE,
+    DETLOG_ENABLED,
+    USE_INFERENCE_WORKER,
+    MOTION_GATE_ENABLED,
+    ROI_INFERENCE,
+    CASCADE_ENABLED,
+    CASCADE_PHONE_MODEL_PATH,
+    NCNN_MODEL_PATH,
+    ADAPTIVE_LADDER,
 )
 import time
 from collections import deque
 
 
+def load_model(model_path=None):
+    """Load a model (in-process or in a worker) and run warmup inferences."""
+    model_path = model_path or active_model_path()
+    if USE_INFERENCE_WORKER:
+        return InferenceWorker(model_path, notify=set_notice)
+    detector = AIDetector(model_path)
+    detector.warmup()
+    return detector
+
+
+def load_ladder(model_path=None):
+    """
+    Load every model of the adaptive ladder.  Rungs using the ladder's first
+    model take ``model_path`` instead, so a hot swap replaces it on each of them.
+    """
+    model_path = model_path or active_model_path()
+    primary = ADAPTIVE_LADDER[0][0]
+    models = {}
+    rungs = []
+    for rung_path, imgsz in ADAPTIVE_LADDER:
+        rung_path = model_path if rung_path == primary else rung_path
+        if rung_path not in models:
+            models[rung_path] = load_model(rung_path)
+        rungs.append((models[rung_path], imgsz))
+    return AdaptiveDetector(rungs)
+
+
+def load_detector():
+    """Load the detector, or the adaptive ladder, behind the hot-swap manager."""
+    factory = load_ladder if ADAPTIVE_LADDER else load_model
+    return ModelManager(factory(), factory, active_model_path())
+
+
+def zone_notices(zone_check):
+    """Return the ``(message, level)`` notices for a zone breach."""
+    notices = [(f"Operator in {zone['name']}", zone["severity"]) for zone in zone_check.restricted]
+    if zone_check.outside_safe or not notices:
+        notices.append(("Return to safe zone", zone_check.safe_severity or "critical"))
+    return notices
+
+
+def load_cascade(detector):
+    """Build the phone cascade, sharing the main model unless a dedicated one is set."""
+    if CASCADE_PHONE_MODEL_PATH == NCNN_MODEL_PATH:
+        return PhoneCascade(detector)
+    return PhoneCascade(load_model(CASCADE_PHONE_MODEL_PATH))
+
+
 def main():
-    detector = AIDetector()
-    camera = CameraStream().start()
+    startup = StartupTimer()
+    apply_process_budget()
+    if not USE_INFERENCE_WORKER:
+        # The detection loop runs on this thread; pinning it before the model
+        # is loaded and warmed up places NCNN's worker threads on the same cores.
+        # Threads started from here later (clip recorder, detection log, model
+        # watcher) inherit it and move themselves to the background role.
+        apply_thread_role("inference")
+
+    # Load the model while the camera opens and the web server binds
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        camera_future = pool.submit(startup.run, "camera open", lambda: CameraStream().start())
+        web_future = pool.submit(startup.run, "web server bind", start_web_streaming)
+        detector = startup.run("model load + warmup", load_detector)
+        camera = camera_future.result()
+    if web_future.exception() is not None:
+        log_error(f"Web server failed to start: {web_future.exception()}")
+    set_model_manager(detector.start_watching())
+
+    recorder = ClipRecorder().start()
+    add_notice_listener(recorder.on_notice)
+    detection_log = DetectionLogger().start() if DETLOG_ENABLED else None
     # comm = SerialComm()
     phone_timer = 0
     safe_zone_timer = 0
     phone_history = deque(maxlen=PHONE_SCAN_FRAMES)
     safe_history = deque(maxlen=SAFE_ZONE_SCAN_FRAMES)
     prev_time = time.time()
-
-    # Start Flask server on a separate thread
-    Thread(target=start_web_streaming, daemon=True).start()
+    frame_seq = 0
+    motion_gate = MotionGate() if MOTION_GATE_ENABLED else None
+    roi = RoiDetector(detector) if ROI_INFERENCE else None
+    cascade = load_cascade(detector) if CASCADE_ENABLED else None
+    detections = []
+    breach_notices = []
+    operator_active = False
 
     log_info("System initialized. Starting detection loop.")
 
@@ -60,21 +159,29 @@ def main():
             now = time.time()
             fps = 1.0 / (now - prev_time)
             prev_time = now
+            frame_seq += 1
 
-            detections = detector.detect_humans(frame)
+            zones = get_zones()
 
-            bounds = get_bounds()
-            # Debugging: Uncomment to visualize bounds------------------------------------------
-            # if bounds is not None:
-            #     height = frame.shape[0]
-            #     cv2.line(frame, (bounds[0], 0), (bounds[0], height), BOUND_LINE_COLOR, 2)
-            #     cv2.line(frame, (bounds[1], 0), (bounds[1], height), BOUND_LINE_COLOR, 2)
+            # Skip inference on an unchanged, empty cab and reuse the last result
+            gated = motion_gate is not None and not motion_gate.should_infer(frame, operator_active)
+            if not gated:
+                stage1_start = time.perf_counter()
+                if roi is not None:
+                    packed = roi.detect_packed(frame, zones.bounding_rect(frame.shape))
+                else:
+                    packed = detector.detect_packed(frame)
+                if cascade is not None:
+                    stage1_ms = (time.perf_counter() - stage1_start) * 1000
+                    packed = cascade.refine(frame, packed, stage1_ms)
+                detections = unpack_detections(packed)
+                startup.first_protected_frame()
+            # Debugging: Uncomment to visualize zones-------------------------------------------
+            # cv2.polylines(frame, zones.polygons(frame.shape), True, BOUND_LINE_COLOR, 2)
             # -----------------------------------------------------------------------------------
 
             phone_present = False
-            operator_count = 0
-            any_inside = False
-            any_outside = False
+            anchors = []
 
             for (x1, y1, x2, y2, conf, cls_id) in detections:
                 if cls_id == PHONE_CLASS_ID and conf > CONFIDENCE_THRESHOLD_PHONE:
@@ -82,23 +189,18 @@ def main():
                     phone_present = True
 
                 if cls_id == FACE_CLASS_ID and conf > CONFIDENCE_THRESHOLD_FACE:
-                    operator_count += 1
                     cv2.rectangle(frame, (x1, y1), (x2, y2), FACE_DETECTION_COLOR, 2)
                     mid_x = (x1 + x2) // 2
                     mid_y = y1 + DRAW_POINT_OFFSET
                     cv2.circle(frame, (mid_x, mid_y), 3, POINT_COLOR, -1)
+                    anchors.append((mid_x, mid_y))
 
-                if bounds is not None:
-                    left, right = sorted(bounds)
-                    in_safe = left <= mid_x <= right
-                    if in_safe:
-                        any_inside = True
-                    else:
-                        any_outside = True
-
-                if bounds is None:
-                    # If no bounds are set, consider all faces as inside
-                    any_inside = True
+            # Only face anchors are checked, all at once against the zone mask.
+            # Without safe zones every face counts as inside.
+            operator_count = len(anchors)
+            zone_check = zones.check(anchors, frame.shape)
+            any_inside = zone_check.any_inside
+            any_outside = zone_check.any_outside
 
             # Phone detection smoothing using a detection window and hold timer
             phone_history.append(1 if phone_present else 0)
@@ -123,7 +225,12 @@ def main():
                 if sum(safe_history) >= SAFE_ZONE_SCAN_FRAMES // 2:
                     if safe_zone_timer == 0:
                         # comm.send(BREACH_COMMAND)
-                        set_notice("Return to safe zone", "critical")
+                        breach_notices = []
+                    # Zones breached later during the same alert are added to it
+                    for notice in zone_notices(zone_check):
+                        if notice not in breach_notices:
+                            breach_notices.append(notice)
+                            set_notice(*notice)
                     safe_zone_timer = SAFE_ZONE_DEBOUNCE_FRAMES
                 safe_history.clear()
             else:
@@ -131,7 +238,8 @@ def main():
                     safe_zone_timer -= 1
 
             if safe_zone_timer > 0:
-                hold_notice("Return to safe zone")
+                for message, _ in breach_notices:
+                    hold_notice(message)
             breach_active = safe_zone_timer > 0
 
             operator_status = "Not Present"
@@ -144,6 +252,17 @@ def main():
             if operator_count > 1:
                 set_notice("Too many operators", "warning")
 
+            operator_active = operator_count > 0 or phone_timer > 0 or safe_zone_timer > 0
+            if ADAPTIVE_LADDER:
+                detector.set_alert(phone_active or breach_active)
+
+            if detection_log is not None:
+                flags = ((FLAG_PHONE_PRESENT if phone_present else 0)
+                         | (FLAG_PHONE_ACTIVE if phone_active else 0)
+                         | (FLAG_ANY_OUTSIDE if any_outside else 0)
+                         | (FLAG_BREACH_ACTIVE if breach_active else 0)
+                         | (FLAG_GATED if gated else 0))
+                detection_log.log(now, frame_seq, detections, operator_count, flags)
 
             # Draw FPS on frame
             cv2.putText(frame, f"FPS: {fps:.1f}", (10, 20), cv2.FONT_HERSHEY_SIMPLEX,
@@ -159,6 +278,12 @@ def main():
         log_error(f"Exception occurred: {e}")
     finally:
         camera.stop()
+        detector.close()
+        if USE_INFERENCE_WORKER and cascade is not None and cascade.phone_detector is not detector:
+            cascade.phone_detector.close()
+        recorder.stop()
+        if detection_log is not None:
+            detection_log.stop()
         # comm.close()
         log_info("System shutdown completed.")
 
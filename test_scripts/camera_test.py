@@ -1,38 +1,66 @@
 # -*- coding: utf-8 -*-
+"""
+Camera probe and benchmark.
 
-import os
-import cv2
+Lists every capture mode the camera supports, then measures each mode's
+delivered FPS and CPU cost (capture, decode and letterbox to the model input)
+and marks the mode ``CameraStream`` would negotiate.  Set ``PREVIEW`` to show
+a live feed in the selected mode afterwards.
+"""
+import sys
 import time
+import cv2
 
+sys.path.append('.')  # noqa
 
-def main():
-    # Use the correct camera index (0 is default USB cam)
-    backend = cv2.CAP_DSHOW if os.name == "nt" else cv2.CAP_V4L2
-    cap = cv2.VideoCapture(0, backend)
+from utils.defines import CAMERA_INDEX, MODEL_INPUT_SIZE
+from utils.capture_format import (
+    Letterbox,
+    apply_capture_mode,
+    list_capture_modes,
+    mode_cost,
+    open_capture,
+    select_capture_mode,
+)
 
-    # Set camera resolution (choose based on camera capability & FPS tradeoff)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+# -------------------- CONFIGURATION --------------------
+WARMUP_FRAMES = 10   # Frames discarded after switching modes
+PROBE_FRAMES = 90    # Frames measured per mode
+PREVIEW = False      # Show the selected mode afterwards (needs a display)
 
-    # Confirm actual settings
-    width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-    height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-    fps = cap.get(cv2.CAP_PROP_FPS)
 
-    print(f"Camera initialized: {width}x{height} @ {fps} FPS")
+def benchmark_mode(cap, mode):
+    """Return (actual mode, delivered FPS, CPU ms per frame)."""
+    actual = apply_capture_mode(cap, mode)
+    letterbox = Letterbox(actual.width, actual.height, MODEL_INPUT_SIZE)
+    for _ in range(WARMUP_FRAMES):
+        cap.read()
 
-    prev_time = time.time()
+    frames = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(PROBE_FRAMES):
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        letterbox(frame)
+        frames += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    if frames == 0:
+        return actual, 0.0, 0.0
+    return actual, frames / wall, cpu * 1000 / frames
 
+
+def preview(cap):
+    prev_time = time.time()
     while True:
         ret, frame = cap.read()
         if not ret:
             print("Failed to grab frame.")
             break
 
-        # Optional: flip frame if needed
-        # frame = cv2.flip(frame, 1)
-
-        # Show frame
         cv2.imshow("USB Camera Feed", frame)
 
         # Display FPS in console
@@ -43,9 +71,35 @@ def main():
         # Exit on pressing 'q'
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
+    cv2.destroyAllWindows()
+
+
+def main():
+    cap = open_capture(CAMERA_INDEX)
+    if not cap.isOpened():
+        print(f"❌ Cannot open camera {CAMERA_INDEX}")
+        return
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    modes = list_capture_modes(cap, CAMERA_INDEX)
+    if not modes:
+        print("❌ No supported MJPG/YUYV capture modes found.")
+        cap.release()
+        return
+    selected = select_capture_mode(modes, MODEL_INPUT_SIZE)
 
+    print(f"Probing {len(modes)} capture modes ({PROBE_FRAMES} frames each)...\n")
+    print(f"{'Mode':<22}{'Cost':>8}{'Listed FPS':>12}{'Delivered':>11}{'CPU ms/f':>10}")
+    for mode in sorted(modes, key=mode_cost):
+        actual, fps, cpu_ms = benchmark_mode(cap, mode)
+        name = f"{actual.fourcc} {actual.width}x{actual.height}"
+        marker = "  <- selected" if mode == selected else ""
+        print(f"{name:<22}{mode_cost(mode) / 1e5:>8.1f}{mode.fps:>12.1f}{fps:>11.1f}{cpu_ms:>10.2f}{marker}")
+
+    if PREVIEW:
+        apply_capture_mode(cap, selected)
+        preview(cap)
     cap.release()
-    cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Face-then-phone cascade benchmark.
+
+Runs the single-pass detector and the cascade over a labeled set (a folder
+with 'images/' and YOLO 'labels/', e.g. the test split) and reports, for
+each, the recall and precision of faces and phones at IoU 0.5 using the
+runtime confidence thresholds and AP50 (scored with traning/evaluate.py),
+plus the mean latency and FPS.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from core.detector import AIDetector
+from core.cascade import PhoneCascade
+from traning.evaluate import RUNTIME_THRESHOLDS, list_images, load_ground_truth, score
+from utils.defines import CASCADE_PHONE_MODEL_PATH, NCNN_MODEL_PATH
+
+# -------------------- CONFIGURATION --------------------
+LABELED_SET = Path(os.environ.get("LABELED_SET", "dataset/DATA/test"))
+MAX_IMAGES = 500
+
+
+def run(name, frames, gt, detect):
+    rows, elapsed = [], []
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        packed = detect(frame)
+        elapsed.append(time.perf_counter() - start)
+        height, width = frame.shape[:2]
+        boxes = packed[:, :4] / np.array([width, height, width, height], dtype=np.float32)
+        rows.append(np.hstack((np.full((len(packed), 1), index, dtype=np.float32),
+                               packed[:, 5:6], packed[:, 4:5], boxes)))
+    pred = np.concatenate(rows).astype(np.float32) if rows else np.zeros((0, 7), dtype=np.float32)
+
+    elapsed = np.array(elapsed)
+    print(f"\n--- {name} ---")
+    print(f"Latency:   mean {elapsed.mean() * 1000:.1f} ms, p95 {np.percentile(elapsed, 95) * 1000:.1f} ms "
+          f"({1 / elapsed.mean():.1f} FPS)")
+    for label, metrics in score(pred, gt, RUNTIME_THRESHOLDS).items():
+        recall = metrics["recall"] if metrics["recall"] is not None else float("nan")
+        precision = metrics["precision"] if metrics["precision"] is not None else float("nan")
+        print(f"{label.capitalize() + ':':<10} recall {recall:.3f}  precision {precision:.3f}  "
+              f"AP50 {metrics['ap50']:.3f}  ({metrics['ground_truth']} labeled)")
+
+
+def main():
+    paths = list_images(LABELED_SET)[:MAX_IMAGES]
+    frames, images = [], []
+    for path in paths:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        frames.append(frame)
+        images.append(path)
+    gt = load_ground_truth(LABELED_SET, images)
+    print(f"[INFO] Loaded {len(frames)} labeled images from {LABELED_SET}")
+
+    detector = AIDetector()
+    detector.warmup()
+    if CASCADE_PHONE_MODEL_PATH == NCNN_MODEL_PATH:
+        phone_detector = detector
+    else:
+        phone_detector = AIDetector(CASCADE_PHONE_MODEL_PATH)
+        phone_detector.warmup()
+    cascade = PhoneCascade(phone_detector)
+
+    def cascaded(frame):
+        start = time.perf_counter()
+        packed = detector.detect_packed(frame)
+        return cascade.refine(frame, packed, (time.perf_counter() - start) * 1000)
+
+    run("Single pass", frames, gt, detector.detect_packed)
+    run("Cascade", frames, gt, cascaded)
+    print(f"\nStage 2 skipped on {cascade.skipped} frames (stage 1 over budget), "
+          f"per-tile cost {cascade.tile_ms or 0:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Motion gate replay benchmark.
+
+Runs the detector on every frame of a replayed recording (the baseline),
+then replays the same frames through ``MotionGate`` and reports:
+- how many inferences were skipped and the resulting CPU saving
+- the worst-case and mean delay before the gated loop sees a detection that
+  the baseline saw (measured from each detection onset)
+
+Use a recording of a real shift (idle stretches plus operators getting in
+and out) as ``REPLAY_SOURCE`` for meaningful numbers.
+"""
+import sys
+import time
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from core.detector import AIDetector
+from core.motion_gate import MotionGate
+from utils.replay_stream import load_frames
+from utils.defines import (
+    REPLAY_SOURCE,
+    REPLAY_FPS,
+    FACE_CLASS_ID,
+    PHONE_CLASS_ID,
+    CONFIDENCE_THRESHOLD_FACE,
+    CONFIDENCE_THRESHOLD_PHONE,
+)
+
+# -------------------- CONFIGURATION --------------------
+MAX_FRAMES = 3000
+
+
+def relevant(detections):
+    """Return True when a frame holds a face or phone the rules would act on."""
+    for (_, _, _, _, conf, cls_id) in detections:
+        if cls_id == FACE_CLASS_ID and conf > CONFIDENCE_THRESHOLD_FACE:
+            return True
+        if cls_id == PHONE_CLASS_ID and conf > CONFIDENCE_THRESHOLD_PHONE:
+            return True
+    return False
+
+
+def main():
+    frames = load_frames(REPLAY_SOURCE, MAX_FRAMES)
+    print(f"[INFO] Loaded {len(frames)} frames from {REPLAY_SOURCE}")
+
+    detector = AIDetector()
+    detector.warmup()
+
+    # Baseline: full model on every frame
+    baseline = []
+    infer_cpu = []
+    for frame in frames:
+        start = time.process_time()
+        baseline.append(detector.detect_humans(frame))
+        infer_cpu.append(time.process_time() - start)
+    infer_cpu = np.array(infer_cpu)
+    present = np.array([relevant(d) for d in baseline])
+
+    # Gated replay: reuse the baseline result on inferred frames
+    gate = MotionGate()
+    inferred = np.zeros(len(frames), dtype=bool)
+    seen = np.zeros(len(frames), dtype=bool)
+    gate_cpu = 0.0
+    detections = []
+    for i, frame in enumerate(frames):
+        active = relevant(detections)
+        start = time.process_time()
+        inferred[i] = gate.should_infer(frame, active)
+        gate_cpu += time.process_time() - start
+        if inferred[i]:
+            detections = baseline[i]
+        seen[i] = relevant(detections)
+
+    # Delay from each baseline detection onset until the gated loop sees it
+    onsets = np.flatnonzero(present & ~np.concatenate(([False], present[:-1])))
+    delays = []
+    for onset in onsets:
+        hits = np.flatnonzero(seen[onset:] & present[onset:])
+        if len(hits):
+            delays.append(hits[0])
+    delays = np.array(delays) if delays else np.zeros(1, dtype=int)
+
+    baseline_cpu = infer_cpu.sum()
+    gated_cpu = infer_cpu[inferred].sum() + gate_cpu
+    frame_ms = 1000.0 / REPLAY_FPS
+
+    print("\n--- Motion Gate Summary ---")
+    print(f"Frames:                 {len(frames)}")
+    print(f"Inferences (gated):     {inferred.sum()} ({inferred.mean() * 100:.1f}% of frames)")
+    print(f"Gate overhead:          {gate_cpu / len(frames) * 1000:.3f} ms/frame")
+    print(f"CPU baseline:           {baseline_cpu:.2f} s")
+    print(f"CPU gated:              {gated_cpu:.2f} s ({(1 - gated_cpu / baseline_cpu) * 100:.1f}% saved)")
+    print(f"Detection onsets:       {len(onsets)}")
+    print(f"Worst-case delay:       {delays.max()} frames ({delays.max() * frame_ms:.0f} ms @ {REPLAY_FPS} FPS)")
+    print(f"Mean delay:             {delays.mean():.2f} frames ({delays.mean() * frame_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
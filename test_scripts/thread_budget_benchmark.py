@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Thread budget benchmark.
+
+Sweeps runtime thread budgets (NCNN thread count, CPU pinning, priorities)
+against a replayed frame source and reports the detection FPS and latency of
+each configuration.  Every configuration runs in a fresh process so CPU
+affinity and NCNN/OpenMP worker threads never leak between runs.
+
+The replay thread publishes frames at ``REPLAY_FPS`` like a live camera and
+an encoder thread JPEG-encodes the latest frame for one simulated web viewer.
+"""
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from utils.defines import THREAD_BUDGET, REPLAY_SOURCE, REPLAY_FPS
+
+# -------------------- CONFIGURATION --------------------
+BENCHMARK_FRAMES = 300      # Inferences measured per configuration
+MAX_REPLAY_FRAMES = 300     # Frames decoded from REPLAY_SOURCE
+VIEWER_FPS = 15             # Simulated web viewer encode rate (0 disables)
+LATENCY_BUDGET_MS = 100     # p95 latency a configuration must stay under
+SWEEP = {
+    "inference_threads": [2, 3, 4],
+    "inference_cpus": [[0, 1, 2, 3], [1, 2, 3]],
+    "capture_cpus": [[0]],
+    "web_cpus": [[0]],
+}
+
+
+def _viewer(stream, budget, stop):
+    from utils.thread_budget import apply_thread_role
+    apply_thread_role("web", budget)
+    while not stop.is_set():
+        frame = stream.read()
+        if frame is not None:
+            cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        time.sleep(1.0 / VIEWER_FPS)
+
+
+def run_config(budget):
+    """Run one configuration in the current process and return its metrics."""
+    from core.detector import AIDetector
+    from utils.replay_stream import ReplayStream
+    from utils.thread_budget import apply_process_budget, apply_thread_role
+
+    apply_process_budget(budget)
+    apply_thread_role("inference", budget)
+    detector = AIDetector(num_threads=budget["inference_threads"])
+    detector.warmup()
+
+    stream = ReplayStream(REPLAY_SOURCE, REPLAY_FPS, MAX_REPLAY_FRAMES, budget).start()
+    stop = threading.Event()
+    if VIEWER_FPS:
+        threading.Thread(target=_viewer, args=(stream, budget, stop), daemon=True).start()
+    while stream.read() is None:
+        time.sleep(0.01)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(BENCHMARK_FRAMES):
+        frame = stream.read()
+        t0 = time.perf_counter()
+        detector.detect_humans(frame)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stream.stop()
+
+    latencies = np.array(latencies)
+    return {
+        "fps": BENCHMARK_FRAMES / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def sweep_configs():
+    keys = list(SWEEP)
+    for values in itertools.product(*(SWEEP[k] for k in keys)):
+        yield {**THREAD_BUDGET, **dict(zip(keys, values))}
+
+
+def main():
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for budget in sweep_configs():
+        label = ", ".join(f"{k}={budget[k]}" for k in SWEEP)
+        print(f"[INFO] Running {label} ...")
+        with ctx.Pool(1) as pool:
+            try:
+                metrics = pool.apply(run_config, (budget,))
+            except Exception as e:
+                print(f"[ERROR] {label}: {e}")
+                continue
+        results.append((label, metrics))
+        print(f"        FPS {metrics['fps']:.1f} | p50 {metrics['p50_ms']:.1f} ms | p95 {metrics['p95_ms']:.1f} ms")
+
+    if not results:
+        print("❌ No configuration completed.")
+        return
+
+    print("\n--- Results (fastest first) ---")
+    results.sort(key=lambda r: -r[1]["fps"])
+    for label, m in results:
+        print(f"{m['fps']:7.1f} FPS  p50 {m['p50_ms']:6.1f} ms  p95 {m['p95_ms']:6.1f} ms  {label}")
+
+    within = [r for r in results if r[1]["p95_ms"] <= LATENCY_BUDGET_MS]
+    if within:
+        best_label, best = within[0]
+    else:
+        best_label, best = min(results, key=lambda r: r[1]["p95_ms"])
+    print(f"\n✅ Best: {best_label} ({best['fps']:.1f} FPS, p95 {best['p95_ms']:.1f} ms)")
+    if not within:
+        print(f"⚠️ No configuration met the {LATENCY_BUDGET_MS} ms p95 budget; showing the lowest latency.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Ground truth loading skips polygon lines instead of aborting the evaluation.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # noqa
+
+from traning.evaluate import list_images, load_ground_truth
+
+
+def test_mixed_box_and_polygon_lines(tmp_path):
+    (tmp_path / "images").mkdir()
+    (tmp_path / "labels").mkdir()
+    for name in ("a", "b", "c"):
+        (tmp_path / "images" / f"{name}.jpg").write_bytes(b"")
+    (tmp_path / "labels" / "a.txt").write_text("0 0.5 0.5 0.2 0.2\n1 0.1 0.1 0.2 0.1 0.3 0.3 0.1\n")
+    (tmp_path / "labels" / "c.txt").write_text("1 0.5 0.5 0.4 0.4\n")
+
+    gt = load_ground_truth(tmp_path, list_images(tmp_path))
+    np.testing.assert_allclose(gt, [[0, 0, 0.4, 0.4, 0.6, 0.6],
+                                    [2, 1, 0.3, 0.3, 0.7, 0.7]], atol=1e-6)
@@ -0,0 +1,43 @@
+"""
+Class remaps and deletes apply to every label line, not only to valid boxes.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # noqa
+
+from data_preprocessing.dataset_change_class import replace_class_in_labels
+from data_preprocessing.dataset_label_transform import transform_labels
+
+LINES = [
+    "2 0.5 0.5 0.2 0.2",
+    "2 0.1 0.1 0.2 0.1 0.3 0.3",   # polygon
+    "2 0.5 0.5 1.0000001 0.2",     # out of range
+    "0 0.5 0.5 0.001 0.001",
+    "3 0.1 0.1 0.1 0.1 0.2 0.2",   # polygon
+]
+
+
+def write_labels(folder):
+    path = folder / "a.txt"
+    path.write_text("\n".join(LINES) + "\n")
+    return path
+
+
+def test_remap_covers_malformed_lines(tmp_path):
+    path = write_labels(tmp_path)
+    replace_class_in_labels(tmp_path, 2, 1)
+    assert path.read_text().splitlines() == [
+        "1 0.5 0.5 0.2 0.2",
+        "1 0.1 0.1 0.2 0.1 0.3 0.3",
+        "1 0.5 0.5 1.0000001 0.2",
+        LINES[3],
+        LINES[4],
+    ]
+
+
+def test_delete_covers_polygons_and_filters_only_valid_boxes(tmp_path):
+    path = write_labels(tmp_path)
+    stats = transform_labels(tmp_path, class_map={}, delete_classes=[3], min_area=0.01)
+    assert path.read_text().splitlines() == LINES[:3]
+    assert stats["deleted_class"] == 1 and stats["deleted_area"] == 1
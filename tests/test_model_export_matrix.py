@@ -0,0 +1,49 @@
+"""
+The export matrix must never overwrite or remove the `<stem>_ncnn_model`
+folder shipped next to a run's weights.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # noqa
+
+import traning.model_export_matrix as matrix
+
+
+def fake_export(pt_model_path, imgsz=320, half=False):
+    # Like Ultralytics: always <stem>_ncnn_model next to the weights, replacing what is there
+    out = Path(pt_model_path).parent / f"{Path(pt_model_path).stem}_ncnn_model"
+    out.mkdir(exist_ok=True)
+    (out / "model.ncnn.bin").write_text(f"exported {imgsz} {half}")
+    return out
+
+
+def fake_quantize(fp32_dir, calibration, out_dir, imgsz=None):
+    Path(out_dir).mkdir(exist_ok=True)
+    (Path(out_dir) / "model.ncnn.bin").write_text("int8")
+
+
+def test_tracked_model_survives_matrix_run(tmp_path, monkeypatch):
+    weights = tmp_path / "runs" / "yolov11n_320_V3" / "weights"
+    shipped = weights / "yolov11n_320_V3_ncnn_model"
+    shipped.mkdir(parents=True)
+    (shipped / "model.ncnn.bin").write_text("shipped")
+    (weights / "yolov11n_320_V3.pt").write_text("weights")
+
+    monkeypatch.setattr(matrix, "RUNS_DIR", tmp_path / "runs")
+    monkeypatch.setattr(matrix, "MANIFEST_PATH", tmp_path / "export_manifest.json")
+    monkeypatch.setattr(matrix, "EXPORT_SIZES", [320, 256])
+    monkeypatch.setattr(matrix, "export_ncnn", fake_export)
+    monkeypatch.setattr(matrix, "quantize", fake_quantize)
+    monkeypatch.setattr(matrix, "list_images", lambda split_dir: [])
+    monkeypatch.setattr(matrix, "evaluate_model", lambda model_dir, *args: {
+        "model": str(model_dir), "images": 0, "classes": {}, "latency_ms": {"p50": 1.0}})
+    monkeypatch.setattr(matrix, "record_active_model", lambda path: None)
+
+    matrix.main()
+
+    assert (shipped / "model.ncnn.bin").read_text() == "shipped"
+    for imgsz in (320, 256):
+        for precision in ("fp32", "fp16", "int8"):
+            assert (weights / f"yolov11n_320_V3_{imgsz}_{precision}_ncnn_model" / "model.ncnn.bin").exists()
+    assert sorted(p.name for p in weights.iterdir() if not p.name.endswith("_ncnn_model")) == ["yolov11n_320_V3.pt"]
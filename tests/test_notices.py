@@ -0,0 +1,28 @@
+"""
+A notice raised again after it expired reaches the listeners even when no
+browser polls /status in between.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # noqa
+
+import utils.web_stream as web_stream
+
+
+def test_reraised_notice_notifies_after_expiry(monkeypatch):
+    now = [1000.0]
+    heard = []
+    monkeypatch.setattr(web_stream.time, "time", lambda: now[0])
+    monkeypatch.setattr(web_stream, "_notices", [])
+    monkeypatch.setattr(web_stream, "_notice_listeners", [])
+    web_stream.add_notice_listener(lambda message, level: heard.append((message, level)))
+
+    web_stream.set_notice("Phone detected", "critical")
+    now[0] += web_stream.NOTICE_DURATION / 2
+    web_stream.set_notice("Phone detected", "critical")
+    assert len(heard) == 1
+
+    now[0] += web_stream.NOTICE_DURATION + 0.2
+    web_stream.set_notice("Phone detected", "critical")
+    assert heard == [("Phone detected", "critical")] * 2
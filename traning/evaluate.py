@@ -0,0 +1,323 @@
+"""
+Vectorized detection evaluation for YOLO-format datasets.
+
+Ground truth and predictions for a whole split are held as packed NumPy
+arrays (one row per box, tagged with its image index, coordinates
+normalized to the image size), so IoU for every prediction/ground-truth
+pair of the same image and class is computed in one call.  Reports per-class
+AP50 and AP50-95, precision/recall curves, precision/recall at the runtime
+thresholds and a confidence threshold sweep.
+
+Predictions are cached per model, input size and image set, so re-scoring at
+other thresholds or IoUs never re-runs inference.
+
+Usage:
+    python traning/evaluate.py [model_dir] [split_dir]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.yolo_labels import load_label_files
+from utils.defines import (
+    FACE_CLASS_ID,
+    PHONE_CLASS_ID,
+    CONFIDENCE_THRESHOLD_FACE,
+    CONFIDENCE_THRESHOLD_PHONE,
+)
+
+# -------------------- CONFIGURATION --------------------
+CLEANED_DATASET_DIR = Path(os.environ.get("OUTPUT_DATASET_DIR", "dataset/Cleaned_Dataset"))
+CACHE_DIR = Path("traning") / "eval_cache"
+MIN_CONF = 0.001  # Keep low-confidence predictions so the PR curve is complete
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+SWEEP_THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.05), 2)
+CURVE_POINTS = np.linspace(0, 1, 101)  # COCO-style 101-point interpolation
+PLOT_CURVES = False  # Write PR curve PNGs next to the report
+IMAGE_EXTS = [".jpg", ".jpeg", ".png"]
+CLASS_NAMES = {FACE_CLASS_ID: "face", PHONE_CLASS_ID: "phone"}
+RUNTIME_THRESHOLDS = {FACE_CLASS_ID: CONFIDENCE_THRESHOLD_FACE, PHONE_CLASS_ID: CONFIDENCE_THRESHOLD_PHONE}
+# -------------------------------------------------------
+
+
+def list_images(split_dir):
+    return sorted(p for p in (Path(split_dir) / "images").iterdir() if p.suffix.lower() in IMAGE_EXTS)
+
+
+def xywh_to_xyxy(boxes):
+    xy, wh = boxes[:, :2], boxes[:, 2:4] / 2
+    return np.hstack((xy - wh, xy + wh))
+
+
+def load_ground_truth(split_dir, images):
+    """
+    Return ``(M, 6)`` float32 rows of image index, class, x1, y1, x2, y2 for
+    the labels of ``images``, normalized to the image size.  Lines that are
+    not valid boxes (e.g. segmentation polygons) are skipped with a warning.
+    """
+    labels_dir = Path(split_dir) / "labels"
+    paths = [labels_dir / (image.stem + ".txt") for image in images]
+    indices = np.array([i for i, path in enumerate(paths) if path.exists()], dtype=np.int64)
+    labels = load_label_files([paths[i] for i in indices])
+    malformed = labels.malformed_counts()
+    if malformed.any():
+        print(f"⚠️ Skipped {int(malformed.sum())} malformed label line(s) in "
+              f"{np.count_nonzero(malformed)} file(s) of {labels_dir}")
+    boxes = labels.boxes
+    return np.hstack((indices[labels.box_file(), None].astype(np.float32),
+                      boxes[:, :1], xywh_to_xyxy(boxes[:, 1:5]))).astype(np.float32)
+
+
+def _cache_key(model_dir, images, imgsz, conf):
+    digest = hashlib.sha1(f"{Path(model_dir).resolve()}|{imgsz}|{conf}".encode())
+    for path in sorted(Path(model_dir).glob("model.ncnn.*")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    for image in images:
+        stat = image.stat()
+        digest.update(f"{image}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def predict(model_dir, images, imgsz=None, conf=MIN_CONF, cache_dir=CACHE_DIR):
+    """
+    Return ``(pred, latency_ms)``: ``(K, 7)`` float32 rows of image index,
+    class, confidence, x1, y1, x2, y2 (normalized) and per-image latency.
+    Results are cached on disk.
+    """
+    cache = Path(cache_dir) / f"{Path(model_dir).name}_{_cache_key(model_dir, images, imgsz, conf)}.npz"
+    if cache.exists():
+        with np.load(cache) as data:
+            return data["pred"], data["latency_ms"]
+
+    from core.detector import AIDetector
+    detector = AIDetector(model_dir)
+    detector.warmup()
+    rows = []
+    latency = np.zeros(len(images), dtype=np.float32)
+    for index, image in enumerate(images):
+        frame = cv2.imread(str(image))
+        if frame is None:
+            continue
+        start = time.perf_counter()
+        packed = detector.detect_packed(frame, imgsz, conf)
+        latency[index] = (time.perf_counter() - start) * 1000
+        height, width = frame.shape[:2]
+        boxes = packed[:, :4] / np.array([width, height, width, height], dtype=np.float32)
+        rows.append(np.hstack((np.full((len(packed), 1), index, dtype=np.float32),
+                               packed[:, 5:6], packed[:, 4:5], boxes)))
+    pred = np.concatenate(rows).astype(np.float32) if rows else np.zeros((0, 7), dtype=np.float32)
+
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(cache, pred=pred, latency_ms=latency)
+    return pred, latency
+
+
+def pair_iou(pred, gt):
+    """
+    IoU of every prediction/ground-truth pair sharing image and class.
+    Returns ``(pred_index, gt_index, iou)`` arrays.
+    """
+    if not len(pred) or not len(gt):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    # Group ground truth by (image, class) and find each prediction's group
+    gt_keys = gt[:, 0].astype(np.int64) * 1000 + gt[:, 1].astype(np.int64)
+    order = np.argsort(gt_keys, kind="stable")
+    gt_keys = gt_keys[order]
+    pred_keys = pred[:, 0].astype(np.int64) * 1000 + pred[:, 1].astype(np.int64)
+    starts = np.searchsorted(gt_keys, pred_keys, side="left")
+    counts = np.searchsorted(gt_keys, pred_keys, side="right") - starts
+
+    pred_index = np.repeat(np.arange(len(pred)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    gt_index = order[np.repeat(starts, counts) + offsets]
+
+    a = pred[pred_index, 3:7]
+    b = gt[gt_index, 2:6]
+    inter = (np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+             * np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None))
+    union = ((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]) + (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]) - inter)
+    iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    return pred_index, gt_index, iou
+
+
+def match(pred, gt, iou_thresholds=IOU_THRESHOLDS):
+    """
+    Return a ``(K, T)`` boolean true-positive matrix for each IoU threshold.
+    Pairs are matched one-to-one by descending IoU, as Ultralytics does.
+    """
+    tp = np.zeros((len(pred), len(iou_thresholds)), dtype=bool)
+    pred_index, gt_index, iou = pair_iou(pred, gt)
+    for t, threshold in enumerate(iou_thresholds):
+        keep = iou >= threshold
+        if not keep.any():
+            continue
+        p, g, v = pred_index[keep], gt_index[keep], iou[keep]
+        order = np.argsort(-v, kind="stable")
+        p, g = p[order], g[order]
+        _, first = np.unique(p, return_index=True)
+        p, g = p[first], g[first]
+        _, first = np.unique(g, return_index=True)
+        tp[p[first], t] = True
+    return tp
+
+
+def pr_curve(tp, conf, n_gt):
+    """Cumulative precision and recall of predictions sorted by confidence."""
+    order = np.argsort(-conf, kind="stable")
+    tpc = np.cumsum(tp[order], axis=0)
+    fpc = np.cumsum(~tp[order], axis=0)
+    recall = tpc / max(n_gt, 1)
+    precision = tpc / (tpc + fpc)
+    return precision, recall, conf[order]
+
+
+def average_precision(precision, recall):
+    """101-point interpolated AP for each column of ``precision``/``recall``."""
+    if not len(precision):
+        return np.zeros(precision.shape[1] if precision.ndim == 2 else 1)
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision, axis=0), axis=0), axis=0)
+    aps = []
+    for t in range(precision.shape[1]):
+        index = np.searchsorted(recall[:, t], CURVE_POINTS, side="left")
+        values = np.zeros(len(CURVE_POINTS))
+        valid = index < len(recall)
+        values[valid] = envelope[index[valid], t]
+        aps.append(values.mean())
+    return np.array(aps)
+
+
+def threshold_metrics(tp50, conf, n_gt, thresholds):
+    """Precision, recall and F1 at each confidence threshold (IoU 0.5)."""
+    above = conf[None, :] > np.asarray(thresholds)[:, None]
+    tps = (above & tp50[None, :]).sum(axis=1)
+    npred = above.sum(axis=1)
+    precision = np.divide(tps, npred, out=np.zeros(len(tps)), where=npred > 0)
+    recall = tps / max(n_gt, 1)
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros(len(tps)), where=(precision + recall) > 0)
+    return precision, recall, f1
+
+
+def score(pred, gt, thresholds=RUNTIME_THRESHOLDS):
+    """Per-class metrics from packed predictions and ground truth."""
+    tp = match(pred, gt)
+    classes = {}
+    for cls_id, name in CLASS_NAMES.items():
+        mask = pred[:, 1] == cls_id
+        n_gt = int(np.count_nonzero(gt[:, 1] == cls_id))
+        tp_cls, conf = tp[mask], pred[mask, 2]
+        precision, recall, sorted_conf = pr_curve(tp_cls, conf, n_gt)
+        ap = average_precision(precision, recall) if n_gt else np.zeros(len(IOU_THRESHOLDS))
+
+        runtime = thresholds.get(cls_id, MIN_CONF)
+        (p_rt,), (r_rt,), _ = threshold_metrics(tp_cls[:, 0], conf, n_gt, [runtime])
+        p_sweep, r_sweep, f1_sweep = threshold_metrics(tp_cls[:, 0], conf, n_gt, SWEEP_THRESHOLDS)
+        best = int(np.argmax(f1_sweep))
+        n_pred = int(np.count_nonzero(conf > runtime))
+        classes[name] = {
+            "ground_truth": n_gt,
+            "threshold": runtime,
+            "predictions": n_pred,
+            "precision": round(float(p_rt), 4) if n_pred else None,
+            "recall": round(float(r_rt), 4) if n_gt else None,
+            "ap50": round(float(ap[0]), 4),
+            "ap50_95": round(float(ap.mean()), 4),
+            "best_threshold": float(SWEEP_THRESHOLDS[best]),
+            "best_f1": round(float(f1_sweep[best]), 4),
+            "sweep": {
+                "threshold": SWEEP_THRESHOLDS.tolist(),
+                "precision": np.round(p_sweep, 4).tolist(),
+                "recall": np.round(r_sweep, 4).tolist(),
+                "f1": np.round(f1_sweep, 4).tolist(),
+            },
+            "curve": {
+                "precision": precision[:, 0] if len(precision) else np.zeros(0),
+                "recall": recall[:, 0] if len(recall) else np.zeros(0),
+                "confidence": sorted_conf,
+            },
+        }
+    return classes
+
+
+def plot_curves(classes, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(6, 5))
+    for name, metrics in classes.items():
+        curve = metrics["curve"]
+        ax.plot(curve["recall"], curve["precision"], label=f"{name} AP50 {metrics['ap50']:.3f}")
+    ax.set_xlabel("Recall")
+    ax.set_ylabel("Precision")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1.05)
+    ax.legend()
+    fig.savefig(path, dpi=120, bbox_inches="tight")
+    plt.close(fig)
+
+
+def evaluate_model(model_dir, split_dir, imgsz=None, limit=None, thresholds=RUNTIME_THRESHOLDS):
+    """
+    Score ``model_dir`` on a split.  Returns a JSON-serializable report with
+    per-class metrics at ``thresholds`` and the inference latency.
+    """
+    images = list_images(split_dir)[:limit]
+    gt = load_ground_truth(split_dir, images)
+    pred, latency = predict(model_dir, images, imgsz)
+    classes = score(pred, gt, thresholds)
+    for metrics in classes.values():
+        metrics.pop("curve")
+    latency = latency[latency > 0] if np.any(latency > 0) else np.zeros(1)
+    return {
+        "model": str(model_dir),
+        "images": len(images),
+        "classes": classes,
+        "latency_ms": {"mean": round(float(latency.mean()), 2),
+                       "p50": round(float(np.percentile(latency, 50)), 2),
+                       "p95": round(float(np.percentile(latency, 95)), 2)},
+    }
+
+
+def main():
+    from core.model_manager import active_model_path
+    model_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else active_model_path()
+    split_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else CLEANED_DATASET_DIR / "valid"
+
+    start = time.perf_counter()
+    images = list_images(split_dir)
+    gt = load_ground_truth(split_dir, images)
+    pred, latency = predict(model_dir, images)
+    predicted = time.perf_counter()
+    classes = score(pred, gt)
+    scored = time.perf_counter()
+    print(f"📊 {len(images)} images, {len(gt)} labels, {len(pred)} predictions "
+          f"(predict/load {predicted - start:.2f} s, scoring {scored - predicted:.3f} s)")
+
+    for name, metrics in classes.items():
+        print(f"{name:<6} AP50 {metrics['ap50']:.4f}  AP50-95 {metrics['ap50_95']:.4f}  "
+              f"@{metrics['threshold']}: P {metrics['precision']} R {metrics['recall']}  "
+              f"best F1 {metrics['best_f1']} @ {metrics['best_threshold']}")
+
+    if PLOT_CURVES:
+        plot_path = CACHE_DIR / f"{Path(model_dir).name}_pr_curve.png"
+        plot_curves(classes, plot_path)
+        print(f"🖼️ PR curve: {plot_path}")
+    for metrics in classes.values():
+        metrics.pop("curve")
+    report_path = CACHE_DIR / f"{Path(model_dir).name}_report.json"
+    report_path.write_text(json.dumps({"model": str(model_dir), "split": str(split_dir),
+                                       "classes": classes}, indent=2))
+    print(f"📝 Report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
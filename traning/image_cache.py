@@ -0,0 +1,277 @@
+"""
+Pre-resized image cache for training.
+
+Decodes every image of a YOLO dataset once, resizes it the way Ultralytics
+does for training (long side to `IMG_SIZE`, aspect ratio kept) and stores it
+in a fixed `IMG_SIZE` x `IMG_SIZE` slot of one memory-mapped uint8 array per
+split, so epochs read pixels from the page cache instead of re-decoding the
+full-size JPEGs.
+
+- `<dataset>/.image_cache/<split>_<size>.json` is the index: one row per image
+  in dataset manifest order (`dataset_manifest.py`) with the image and label
+  path, the SHA-1 of the file, its original and resized height/width.
+- Rebuilding only decodes images whose content hash changed; the rest are
+  copied over from the previous array. Hashes are only recomputed for files
+  whose size or modification time changed.
+
+`CachedDetectionTrainer` feeds the cache to Ultralytics training. The
+unpadded part of each slot is exactly what Ultralytics' `load_image` would
+return, so mosaic, letterboxing and labels are unchanged; images missing
+from the cache are decoded as usual:
+
+    from traning.image_cache import CachedDetectionTrainer
+    YOLO("yolo11n.pt").train(data="dataset/Cleaned_Dataset/data.yaml", imgsz=320,
+                             trainer=CachedDetectionTrainer)
+
+Usage:
+    python traning/image_cache.py [dataset_dir]
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+from tqdm import tqdm
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+
+try:
+    from ultralytics.utils.torch_utils import unwrap_model
+except ImportError:  # Older Ultralytics releases
+    from ultralytics.utils.torch_utils import de_parallel as unwrap_model
+
+sys.path.append('.')  # noqa
+
+from data_preprocessing.dataset_dedup import content_digest
+from data_preprocessing.dataset_manifest import Manifest
+
+# -------------------- CONFIGURATION --------------------
+CLEANED_DATASET_DIR = Path(os.environ.get("OUTPUT_DATASET_DIR", "dataset/Cleaned_Dataset"))
+IMG_SIZE = 320  # Input size of the traning/runs/train/yolov11n_320* runs
+CACHE_DIR_NAME = ".image_cache"
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR")  # Overrides <dataset>/.image_cache for training
+WORKERS = int(os.environ.get("CACHE_WORKERS", os.cpu_count() or 1))
+CHUNK_SIZE = 256  # Images decoded per batch while building
+# -------------------------------------------------------
+
+
+def resize_for_training(img, size=IMG_SIZE):
+    """Resize the long side to ``size`` like Ultralytics' ``BaseDataset.load_image``."""
+    h0, w0 = img.shape[:2]
+    r = size / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), size), min(math.ceil(h0 * r), size)
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_LINEAR)
+    return img
+
+
+def decode(path, size=IMG_SIZE):
+    """Return ``(resized image, (h0, w0))``, or ``(None, (0, 0))`` if unreadable."""
+    img = cv2.imread(str(path))
+    if img is None:
+        return None, (0, 0)
+    return resize_for_training(img, size), img.shape[:2]
+
+
+def index_path(cache_dir, split, size):
+    return Path(cache_dir) / f"{split or 'root'}_{size}.json"
+
+
+def load_index(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def build_split(manifest, split, size=IMG_SIZE, cache_dir=None):
+    """
+    Bring the cache of one split up to date.  Returns
+    ``(images, decoded, failed)``; ``decoded`` is 0 when nothing changed.
+    """
+    cache_dir = Path(cache_dir or manifest.dataset_dir / CACHE_DIR_NAME)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = index_path(cache_dir, split, size)
+    old = load_index(path)
+    old_rows = {row[0]: (i, row) for i, row in enumerate(old["images"])} if old and old["size"] == size else {}
+
+    pairs = manifest.pairs(split)
+    stats = {image: (file_size, mtime) for image, file_size, mtime in manifest.db.execute(
+        "SELECT path, size, mtime_ns FROM images WHERE split = ?", (split,))}
+    # Resolved paths, so training finds the images from any working directory or through symlinks
+    images = [os.path.realpath(image) for image, _ in pairs]
+    file_stats = [stats[str(image)] for image, _ in pairs]
+    if not images:
+        return 0, 0, 0
+
+    # Content hashes, recomputed only for files whose size or mtime changed
+    digests = [None] * len(images)
+    for i, image in enumerate(images):
+        _, row = old_rows.get(image, (None, None))
+        if row and tuple(row[3:5]) == file_stats[i]:
+            digests[i] = row[2]
+    to_hash = [i for i, digest in enumerate(digests) if digest is None]
+    with ThreadPoolExecutor(max_workers=max(WORKERS, 1)) as pool:
+        for i, digest in zip(to_hash, pool.map(content_digest, [images[i] for i in to_hash])):
+            digests[i] = digest
+
+    rows, reuse, decode_rows = [], [], []
+    for i, (image, (_, label), digest) in enumerate(zip(images, pairs, digests)):
+        label = os.path.realpath(label) if label else None
+        old_index, old_row = old_rows.get(image, (None, None))
+        if old_row and old_row[2] == digest and old_row[7]:
+            rows.append([image, label, digest, *file_stats[i], *old_row[5:]])
+            reuse.append((i, old_index))
+        else:
+            rows.append([image, label, digest, *file_stats[i], 0, 0, 0, 0])
+            decode_rows.append(i)
+
+    if old and old["size"] == size and rows == old["images"] and (cache_dir / old["array"]).exists():
+        return len(rows), 0, 0
+
+    # Array name changes with its contents, so the index never points at a half-written array
+    token = hashlib.sha1(json.dumps(rows).encode()).hexdigest()[:12]
+    array_name = f"{split or 'root'}_{size}_{token}.npy"
+    tmp = cache_dir / f"{array_name}.tmp"
+    array = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=(len(rows), size, size, 3))
+    if reuse:
+        previous = np.load(cache_dir / old["array"], mmap_mode="r")
+        for new_index, old_index in reuse:
+            array[new_index] = previous[old_index]
+        del previous
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(WORKERS, 1)) as pool:
+        progress = tqdm(total=len(decode_rows), desc=f"🔄 {split or '.'} images", ncols=100)
+        for start in range(0, len(decode_rows), CHUNK_SIZE):
+            chunk = decode_rows[start:start + CHUNK_SIZE]
+            for i, (img, (h0, w0)) in zip(chunk, pool.map(decode, [images[i] for i in chunk])):
+                if img is None:
+                    print(f"\n❌ Failed to read image: {images[i]}")
+                    failed += 1
+                    continue
+                h, w = img.shape[:2]
+                array[i, :h, :w] = img
+                rows[i][5:] = [h0, w0, h, w]
+            progress.update(len(chunk))
+        progress.close()
+    array.flush()
+    del array
+    os.replace(tmp, cache_dir / array_name)
+
+    tmp_index = path.with_suffix(".tmp")
+    tmp_index.write_text(json.dumps({"size": size, "array": array_name, "images": rows}))
+    os.replace(tmp_index, path)
+    if old and old.get("array") != array_name and (cache_dir / old["array"]).exists():
+        (cache_dir / old["array"]).unlink()
+    return len(rows), len(decode_rows), failed
+
+
+def build_cache(dataset_dir=CLEANED_DATASET_DIR, size=IMG_SIZE, cache_dir=None):
+    with Manifest(dataset_dir) as manifest:
+        for split in manifest.splits():
+            start = time.perf_counter()
+            images, decoded, failed = build_split(manifest, split, size, cache_dir)
+            status = f"{decoded} decoded, {images - decoded} reused" if decoded else "up to date"
+            print(f"✅ {split or '.'}: {images} image(s) cached at {size} px ({status}"
+                  f"{f', {failed} unreadable' if failed else ''}) in {time.perf_counter() - start:.2f} s")
+
+
+class ImageCache:
+    """
+    Read side of the cache: every ``<split>_<size>.json`` index of a cache
+    folder, looked up by resolved image path.  Arrays are opened lazily so
+    the object stays cheap to pickle into dataloader workers.
+    """
+
+    def __init__(self, cache_dir, size=IMG_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.entries = {}
+        self._arrays = {}
+        for path in sorted(self.cache_dir.glob(f"*_{size}.json")):
+            index = load_index(path)
+            if not index or not (self.cache_dir / index["array"]).exists():
+                continue
+            for row, (image, _, _, _, _, h0, w0, h, w) in enumerate(index["images"]):
+                if h:
+                    self.entries[image] = (index["array"], row, (h0, w0), (h, w))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        return {**self.__dict__, "_arrays": {}}
+
+    def get(self, image_path):
+        """Return ``(image, (h0, w0), (h, w))`` for a cached image, or ``None``."""
+        entry = self.entries.get(os.path.realpath(image_path))
+        if entry is None:
+            return None
+        name, row, hw0, (h, w) = entry
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.cache_dir / name, mmap_mode="r")
+        return self._arrays[name][row, :h, :w].copy(), hw0, (h, w)
+
+
+class CachedYOLODataset(YOLODataset):
+    """``YOLODataset`` that takes images from an ``ImageCache`` when it has them."""
+
+    def __init__(self, *args, image_cache=None, **kwargs):
+        self.image_cache = image_cache
+        super().__init__(*args, **kwargs)
+
+    def load_image(self, i, rect_mode=True):
+        if rect_mode and self.image_cache is not None and self.ims[i] is None:
+            cached = self.image_cache.get(self.im_files[i])
+            if cached is not None:
+                return cached
+        return super().load_image(i, rect_mode)
+
+
+class CachedDetectionTrainer(DetectionTrainer):
+    """``DetectionTrainer`` whose datasets read from the image cache of the training dataset."""
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        cache_dir = Path(IMAGE_CACHE_DIR) if IMAGE_CACHE_DIR else Path(self.data["path"]) / CACHE_DIR_NAME
+        image_cache = ImageCache(cache_dir, self.args.imgsz)
+        if not len(image_cache):
+            print(f"⚠️ No {self.args.imgsz} px image cache in {cache_dir}; decoding images as usual")
+        # Grid stride of the model, as in DetectionTrainer.build_dataset
+        stride = max(int(unwrap_model(self.model).stride.max() if self.model else 0), 32)
+        # Same arguments as ultralytics.data.build_yolo_dataset
+        return CachedYOLODataset(
+            image_cache=image_cache,
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == "train",
+            hyp=self.args,
+            rect=self.args.rect or mode == "val",
+            cache=self.args.cache or None,
+            single_cls=self.args.single_cls or False,
+            stride=stride,
+            pad=0.0 if mode == "train" else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == "train" else 1.0,
+        )
+
+
+def main():
+    dataset_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else CLEANED_DATASET_DIR
+    if not dataset_dir.is_dir():
+        print(f"❌ Error: dataset folder not found: {dataset_dir}")
+        sys.exit(1)
+    build_cache(dataset_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Export matrix and automatic model selection.
+
+For every trained run under `traning/runs/train/*/weights/*.pt` this exports
+NCNN models across `EXPORT_SIZES` x `PRECISIONS` (fp32, fp16 storage and
+INT8 calibrated on the cleaned dataset), benchmarks each artifact on this
+machine's CPU, evaluates precision/recall and AP on the validation split and writes
+`export_manifest.json`.
+
+The fastest variant meeting `ACCURACY_FLOOR` is then recorded as the active
+model (`ACTIVE_MODEL_FILE`), which the runtime loads on its next start; a
+running system can take it with POST /admin/model.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append('.')  # noqa
+
+from core.model_manager import record_active_model
+from traning.evaluate import list_images, evaluate_model
+from traning.model_ncnn_conversion import export_ncnn
+from traning.model_int8_export import (
+    CLEANED_DATASET_DIR,
+    CALIBRATION_SPLIT,
+    CALIBRATION_IMAGES,
+    SEED,
+    quantize,
+)
+
+# -------------------- CONFIGURATION --------------------
+RUNS_DIR = Path("traning") / "runs" / "train"
+EXPORT_SIZES = [320, 256, 224, 192]
+PRECISIONS = ["fp32", "fp16", "int8"]
+EVAL_SPLIT = "valid"
+EVAL_IMAGES = 500
+MANIFEST_PATH = Path("traning") / "export_manifest.json"
+
+# Minimum per-class scores at the runtime thresholds for a variant to be picked
+ACCURACY_FLOOR = {
+    "face": {"precision": 0.85, "recall": 0.90},
+    "phone": {"precision": 0.75, "recall": 0.70},
+}
+UPDATE_ACTIVE_MODEL = True
+# -------------------------------------------------------
+
+
+def variant_dir(pt_path, imgsz, precision):
+    return pt_path.parent / f"{pt_path.stem}_{imgsz}_{precision}_ncnn_model"
+
+
+def export_variants(pt_path, calibration):
+    """Export every size/precision of one run; returns ``[(dir, imgsz, precision)]``."""
+    variants = []
+    for imgsz in EXPORT_SIZES:
+        fp32_dir = None
+        for precision in PRECISIONS:
+            target = variant_dir(pt_path, imgsz, precision)
+            if precision == "int8":
+                if fp32_dir is None:
+                    print(f"⚠️ Skipping INT8 at {imgsz}: no FP32 export to quantize")
+                    continue
+                quantize(fp32_dir, calibration, target, imgsz)
+            else:
+                # Ultralytics always writes <stem>_ncnn_model next to the weights, which may be the
+                # shipped model; export a copy of the weights in a scratch folder instead
+                with tempfile.TemporaryDirectory(dir=pt_path.parent) as scratch:
+                    staged = Path(scratch) / pt_path.name
+                    shutil.copy2(pt_path, staged)
+                    exported = export_ncnn(staged, imgsz, half=precision == "fp16")
+                    if exported is None:
+                        continue
+                    shutil.rmtree(target, ignore_errors=True)
+                    os.replace(exported, target)
+                if precision == "fp32":
+                    fp32_dir = target
+            variants.append((target, imgsz, precision))
+    return variants
+
+
+def meets_floor(result):
+    for name, floor in ACCURACY_FLOOR.items():
+        scores = result["classes"].get(name, {})
+        for metric, minimum in floor.items():
+            if scores.get(metric) is None or scores[metric] < minimum:
+                return False
+    return True
+
+
+def main():
+    pt_models = sorted(RUNS_DIR.glob("*/weights/*.pt"))
+    if not pt_models:
+        print(f"❌ Error: no .pt weights found under {RUNS_DIR}")
+        sys.exit(1)
+
+    calibration = list_images(CLEANED_DATASET_DIR / CALIBRATION_SPLIT)
+    calibration = random.Random(SEED).sample(calibration, min(CALIBRATION_IMAGES, len(calibration)))
+    eval_dir = CLEANED_DATASET_DIR / EVAL_SPLIT
+    eval_images = len(list_images(eval_dir)[:EVAL_IMAGES])
+    print(f"📊 {len(pt_models)} run(s), evaluating on {eval_images} '{EVAL_SPLIT}' images")
+
+    entries = []
+    for pt_path in pt_models:
+        for model_dir, imgsz, precision in export_variants(pt_path, calibration):
+            result = evaluate_model(model_dir, eval_dir, imgsz, EVAL_IMAGES)
+            entry = {
+                "run": pt_path.parent.parent.name,
+                "weights": str(pt_path),
+                "imgsz": imgsz,
+                "precision": precision,
+                **result,
+                "meets_floor": meets_floor(result),
+            }
+            entries.append(entry)
+            print(f"  {entry['run']:<20} {imgsz:>4} {precision:<5} p50 {result['latency_ms']['p50']:>7.1f} ms  "
+                  + "  ".join(f"{name} P {c['precision']} R {c['recall']} AP {c['ap50_95']}" for name, c in result["classes"].items())
+                  + ("  ✅" if entry["meets_floor"] else ""))
+
+    acceptable = [e for e in entries if e["meets_floor"]]
+    selected = min(acceptable, key=lambda e: e["latency_ms"]["p50"]) if acceptable else None
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "eval_split": EVAL_SPLIT,
+        "eval_images": eval_images,
+        "accuracy_floor": ACCURACY_FLOOR,
+        "selected": selected["model"] if selected else None,
+        "variants": entries,
+    }
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2))
+    print(f"📝 Manifest: {MANIFEST_PATH}")
+
+    if selected is None:
+        print("⚠️ No variant meets the accuracy floor; active model left unchanged.")
+        return
+    print(f"🏁 Fastest acceptable: {selected['model']} ({selected['latency_ms']['p50']} ms)")
+    if UPDATE_ACTIVE_MODEL:
+        record_active_model(selected["model"])
+        print("✅ Active model updated; restart or POST /admin/model to apply.")
+
+
+if __name__ == "__main__":
+    main()
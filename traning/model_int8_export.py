@@ -0,0 +1,171 @@
+"""
+INT8 NCNN export with calibration from the cleaned dataset.
+
+1. Samples calibration images from the cleaned dataset (the output layout of
+   `data_preprocessing/dataset_cleaning.py`) and writes an image list.
+2. Builds a calibration table with `ncnn2table` and quantizes the FP32 NCNN
+   export with `ncnn2int8` into `<name>_int8_ncnn_model/` next to it (the
+   `*_ncnn_model` suffix lets the hot-swap watcher pick it up).
+3. Scores FP32 and INT8 on the same test images (`traning/evaluate.py`) and
+   writes a report with per-class precision/recall at the runtime
+   thresholds, AP50/AP50-95 and CPU latency.
+4. INT8 is accepted only if no class loses more than the configured
+   precision/recall; accepted models can be copied to the hot-swap folder.
+
+The `ncnn2table` and `ncnn2int8` tools ship with NCNN (tools/quantize); put
+them on PATH or set NCNN_TOOLS_DIR.
+"""
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.append('.')  # noqa
+
+from traning.evaluate import list_images, evaluate_model
+from utils.defines import MODEL_INPUT_SIZE, MODEL_WATCH_DIR
+
+# -------------------- CONFIGURATION --------------------
+FP32_MODEL_DIR = Path("traning") / "runs" / "train" / "yolov11n_320_V3" / "weights" / "yolov11n_320_V3_ncnn_model"
+CLEANED_DATASET_DIR = Path(os.environ.get("OUTPUT_DATASET_DIR", "dataset/Cleaned_Dataset"))
+NCNN_TOOLS_DIR = os.environ.get("NCNN_TOOLS_DIR")
+
+CALIBRATION_SPLIT = "train"
+CALIBRATION_IMAGES = 300
+EVAL_SPLIT = "test"
+EVAL_IMAGES = 500
+IMGSZ = MODEL_INPUT_SIZE
+SEED = 42
+
+MAX_PRECISION_DROP = 0.02  # Largest allowed drop per class (absolute)
+MAX_RECALL_DROP = 0.02
+DEPLOY_IF_ACCEPTED = False  # Copy an accepted INT8 model to MODEL_WATCH_DIR for hot swap
+
+# -------------------------------------------------------
+
+
+def find_tool(name):
+    if NCNN_TOOLS_DIR:
+        path = Path(NCNN_TOOLS_DIR) / name
+        if path.exists():
+            return str(path)
+    path = shutil.which(name)
+    if path is None:
+        print(f"❌ Error: '{name}' not found. Build NCNN's tools and add them to PATH or set NCNN_TOOLS_DIR.")
+        sys.exit(1)
+    return path
+
+
+def write_image_list(images, path):
+    path.write_text("".join(f"{image.resolve()}\n" for image in images))
+
+
+def run(command):
+    print("🔁 " + " ".join(command))
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stdout)
+        print(result.stderr)
+        print(f"❌ {Path(command[0]).name} failed.")
+        sys.exit(1)
+
+
+def quantize(fp32_dir, calibration_images, int8_dir, imgsz=IMGSZ):
+    """Build the calibration table and write the INT8 model to ``int8_dir``."""
+    int8_dir.mkdir(parents=True, exist_ok=True)
+    image_list = int8_dir / "calibration_images.txt"
+    table = int8_dir / "model.table"
+    write_image_list(calibration_images, image_list)
+
+    # Ultralytics feeds RGB scaled to [0, 1]
+    scale = 1 / 255
+    run([find_tool("ncnn2table"), str(fp32_dir / "model.ncnn.param"), str(fp32_dir / "model.ncnn.bin"),
+         str(image_list), str(table), "mean=[0,0,0]", f"norm=[{scale},{scale},{scale}]",
+         f"shape=[{imgsz},{imgsz},3]", "pixel=RGB", f"thread={os.cpu_count()}", "method=kl"])
+    run([find_tool("ncnn2int8"), str(fp32_dir / "model.ncnn.param"), str(fp32_dir / "model.ncnn.bin"),
+         str(int8_dir / "model.ncnn.param"), str(int8_dir / "model.ncnn.bin"), str(table)])
+    # Ultralytics reads the class names and input size from the metadata
+    shutil.copy(fp32_dir / "metadata.yaml", int8_dir / "metadata.yaml")
+
+
+def compare(fp32, int8):
+    """Return the per-class drops and whether INT8 stays within tolerance."""
+    drops = {}
+    accepted = True
+    for name, base in fp32["classes"].items():
+        quant = int8["classes"][name]
+        drop = {}
+        for metric, limit in (("precision", MAX_PRECISION_DROP), ("recall", MAX_RECALL_DROP)):
+            if base[metric] is None or quant[metric] is None:
+                continue
+            drop[metric] = round(base[metric] - quant[metric], 4)
+            accepted &= drop[metric] <= limit
+        drops[name] = drop
+    return drops, bool(accepted)
+
+
+def export_int8(fp32_dir=FP32_MODEL_DIR, dataset_dir=CLEANED_DATASET_DIR):
+    fp32_dir = Path(fp32_dir)
+    if not (fp32_dir / "model.ncnn.bin").exists():
+        print(f"❌ Error: FP32 NCNN model not found: {fp32_dir}")
+        sys.exit(1)
+    # Keep the *_ncnn_model suffix that ModelManager looks for
+    name = fp32_dir.name[:-len("_ncnn_model")] if fp32_dir.name.endswith("_ncnn_model") else fp32_dir.name
+    int8_dir = fp32_dir.with_name(f"{name}_int8_ncnn_model")
+
+    rng = random.Random(SEED)
+    calibration = list_images(dataset_dir / CALIBRATION_SPLIT)
+    calibration = rng.sample(calibration, min(CALIBRATION_IMAGES, len(calibration)))
+    print(f"📁 Calibrating with {len(calibration)} images from '{CALIBRATION_SPLIT}'")
+    quantize(fp32_dir, calibration, int8_dir)
+    print(f"✅ INT8 model written to: {int8_dir}")
+
+    eval_dir = dataset_dir / EVAL_SPLIT
+    print(f"📊 Evaluating on up to {EVAL_IMAGES} images from '{EVAL_SPLIT}'")
+
+    fp32 = evaluate_model(fp32_dir, eval_dir, IMGSZ, EVAL_IMAGES)
+    int8 = evaluate_model(int8_dir, eval_dir, IMGSZ, EVAL_IMAGES)
+    drops, accepted = compare(fp32, int8)
+    report = {
+        "imgsz": IMGSZ,
+        "calibration_images": len(calibration),
+        "eval_images": fp32["images"],
+        "tolerance": {"precision": MAX_PRECISION_DROP, "recall": MAX_RECALL_DROP},
+        "fp32": fp32,
+        "int8": int8,
+        "drop": drops,
+        "accepted": accepted,
+    }
+    report_path = int8_dir / "int8_report.json"
+    report_path.write_text(json.dumps(report, indent=2))
+
+    print("\n--- FP32 vs INT8 ---")
+    for name in fp32["classes"]:
+        base, quant = fp32["classes"][name], int8["classes"][name]
+        print(f"{name:<6} precision {base['precision']} -> {quant['precision']}   "
+              f"recall {base['recall']} -> {quant['recall']}   "
+              f"AP50-95 {base['ap50_95']} -> {quant['ap50_95']}")
+    print(f"Latency p50 {fp32['latency_ms']['p50']} ms -> {int8['latency_ms']['p50']} ms")
+    print(f"📝 Report: {report_path}")
+
+    if not accepted:
+        print("⚠️ INT8 accuracy drop exceeds tolerance; keep shipping FP32.")
+        return report
+    print("✅ INT8 within tolerance.")
+    if DEPLOY_IF_ACCEPTED:
+        # Copy under a name the watcher ignores, then rename into place
+        target = MODEL_WATCH_DIR / int8_dir.name
+        staging = target.with_name(target.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(int8_dir, staging)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        print(f"🚚 Copied to {target} for hot swap")
+    return report
+
+
+if __name__ == "__main__":
+    export_int8()
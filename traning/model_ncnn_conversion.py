@@ -3,18 +3,22 @@ from pathlib import Path
 import sys
 
 
-def export_ncnn(pt_model_path: str):
+def export_ncnn(pt_model_path: str, imgsz: int = 320, half: bool = False):
+    """
+    Export a .pt model to NCNN.  Returns the output folder, which Ultralytics
+    names ``<stem>_ncnn_model`` next to the weights, or None on failure.
+    """
     pt_model = Path(pt_model_path).resolve()
 
     if not pt_model.exists():
         print(f"❌ Error: .pt model not found: {pt_model}")
         sys.exit(1)
 
-    print(f"🔁 Exporting NCNN from: {pt_model}")
+    print(f"🔁 Exporting NCNN from: {pt_model} (imgsz={imgsz}, half={half})")
 
     # Run the export command
     result = subprocess.run(
-        ["yolo", "export", f"model={str(pt_model)}", "format=ncnn"],
+        ["yolo", "export", f"model={str(pt_model)}", "format=ncnn", f"imgsz={imgsz}", f"half={half}"],
         capture_output=True,
         text=True
     )
@@ -24,14 +28,15 @@ def export_ncnn(pt_model_path: str):
 
     if result.returncode != 0:
         print("❌ NCNN export failed.")
-        sys.exit(1)
+        return None
 
     # Confirm the expected output folder exists
-    expected_ncnn_dir = pt_model.parent / "best_ncnn_model"
+    expected_ncnn_dir = pt_model.parent / f"{pt_model.stem}_ncnn_model"
     if expected_ncnn_dir.exists():
         print(f"✅ NCNN model exported to: {expected_ncnn_dir}")
-    else:
-        print("⚠️ Export completed, but expected output folder not found. Check above logs.")
+        return expected_ncnn_dir
+    print("⚠️ Export completed, but expected output folder not found. Check above logs.")
+    return None
 
 
 if __name__ == "__main__":
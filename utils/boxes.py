@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""
+Vectorized box helpers for packed ``(N, 4+)`` arrays of x1, y1, x2, y2, ...
+"""
+import numpy as np
+
+
+def box_area(boxes):
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def box_iou(a, b):
+    """Pairwise IoU between the boxes in ``a`` (N) and ``b`` (M) as an ``(N, M)`` array."""
+    a = np.asarray(a, dtype=np.float32)[:, :4]
+    b = np.asarray(b, dtype=np.float32)[:, :4]
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    union = box_area(a)[:, None] + box_area(b)[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def nms(packed, iou_threshold=0.5):
+    """
+    Greedy non-maximum suppression within each class of a packed
+    ``(N, 6)`` detection array.  Returns the kept rows by descending
+    confidence.
+    """
+    if len(packed) == 0:
+        return packed
+    packed = packed[np.argsort(-packed[:, 4], kind="stable")]
+    iou = box_iou(packed, packed)
+    iou[packed[:, 5, None] != packed[None, :, 5]] = 0
+    keep = np.ones(len(packed), dtype=bool)
+    for i in range(len(packed)):
+        if keep[i]:
+            keep[i + 1:] &= iou[i, i + 1:] <= iou_threshold
+    return packed[keep]
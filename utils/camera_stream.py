@@ -1,26 +1,56 @@
 # -*- coding: utf-8 -*-
 
-import os
 import cv2
 import threading
+import time
 import sys
 sys.path.append('.')  # noqa
 
-from utils.defines import CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT
+from utils.defines import (
+    CAMERA_INDEX,
+    FRAME_WIDTH,
+    FRAME_HEIGHT,
+    MODEL_INPUT_SIZE,
+    CAPTURE_LETTERBOX,
+    CAPTURE_RETRY_DELAY,
+    NATIVE_CAPTURE,
+    NATIVE_CAPTURE_SIZE,
+    THREAD_BUDGET,
+)
+from utils.capture_format import (
+    CaptureMode,
+    Letterbox,
+    apply_capture_mode,
+    list_capture_modes,
+    open_capture,
+    select_capture_mode,
+)
+from utils.log import log_info
+from utils.thread_budget import apply_thread_role
 
 
 class CameraStream:
     """
     Threaded camera stream reader.
+
+    The cheapest supported capture mode for the model input is negotiated at
+    startup and, when ``CAPTURE_LETTERBOX`` is set, frames are letterboxed to
+    ``MODEL_INPUT_SIZE`` in the capture thread.  ROI inference and the
+    cascade need the native frame, so with ``NATIVE_CAPTURE`` set a mode of at
+    least ``NATIVE_CAPTURE_SIZE`` is negotiated and letterboxing is skipped.
     """
 
-    def __init__(self):
-        # Select appropriate backend based on operating system
-        backend = cv2.CAP_DSHOW if os.name == "nt" else cv2.CAP_V4L2
-        self.cap = cv2.VideoCapture(CAMERA_INDEX, backend)
+    def __init__(self, mode=None, budget=THREAD_BUDGET):
+        self.budget = budget
+        self.cap = open_capture(CAMERA_INDEX)
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        if mode is None:
+            modes = list_capture_modes(self.cap, CAMERA_INDEX)
+            target = NATIVE_CAPTURE_SIZE if NATIVE_CAPTURE else MODEL_INPUT_SIZE
+            mode = select_capture_mode(modes, target) or CaptureMode("MJPG", FRAME_WIDTH, FRAME_HEIGHT, 0)
+        self.mode = apply_capture_mode(self.cap, mode)
+        log_info(f"Camera mode: {self.mode.fourcc} {self.mode.width}x{self.mode.height} @ {self.mode.fps:.0f} FPS")
+        self.letterbox = None
         self.frame = None
         self.stopped = False
         self.lock = threading.Lock()
@@ -29,12 +59,26 @@ class CameraStream:
         threading.Thread(target=self._update, daemon=True).start()
         return self
 
+    def _resize(self, frame):
+        if not CAPTURE_LETTERBOX or NATIVE_CAPTURE:
+            return frame
+        height, width = frame.shape[:2]
+        if self.letterbox is None or self.letterbox.src_shape != (height, width):
+            self.letterbox = Letterbox(width, height, MODEL_INPUT_SIZE)
+        return self.letterbox(frame)
+
     def _update(self):
+        apply_thread_role("capture", self.budget)
         while not self.stopped:
-            if self.cap.grab():
-                _, frame = self.cap.retrieve()
-                with self.lock:
-                    self.frame = frame
+            if not self.cap.grab():
+                time.sleep(CAPTURE_RETRY_DELAY)
+                continue
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                continue
+            frame = self._resize(frame)
+            with self.lock:
+                self.frame = frame
 
     def read(self):
         with self.lock:
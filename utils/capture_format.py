@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+Capture format negotiation and letterboxing to the model input size.
+"""
+import os
+import re
+import shutil
+import subprocess
+from collections import namedtuple
+import cv2
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import (
+    CAPTURE_MIN_FPS,
+    CAPTURE_MJPG_COST_FACTOR,
+    CAPTURE_MODE_CANDIDATES,
+    LETTERBOX_COLOR,
+)
+
+CaptureMode = namedtuple("CaptureMode", ["fourcc", "width", "height", "fps"])
+
+
+def open_capture(index):
+    """Open a camera with the backend appropriate for this operating system."""
+    backend = cv2.CAP_DSHOW if os.name == "nt" else cv2.CAP_V4L2
+    return cv2.VideoCapture(index, backend)
+
+
+def _fourcc_name(cap):
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def apply_capture_mode(cap, mode):
+    """Request a mode and return the mode the driver actually delivers."""
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+    if mode.fps:
+        cap.set(cv2.CAP_PROP_FPS, mode.fps)
+    return CaptureMode(
+        _fourcc_name(cap),
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        cap.get(cv2.CAP_PROP_FPS),
+    )
+
+
+def _list_v4l2_modes(index):
+    """Parse ``v4l2-ctl --list-formats-ext`` into capture modes."""
+    if os.name == "nt" or shutil.which("v4l2-ctl") is None:
+        return []
+    try:
+        output = subprocess.run(
+            ["v4l2-ctl", "--device", f"/dev/video{index}", "--list-formats-ext"],
+            capture_output=True, text=True, timeout=5,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+    modes = {}
+    fourcc = size = None
+    for line in output.splitlines():
+        match = re.search(r"\[\d+\]: '(\w{1,4})'", line)
+        if match:
+            fourcc, size = match.group(1), None
+            continue
+        match = re.search(r"Size: \w+ (\d+)x(\d+)", line)
+        if match:
+            size = (int(match.group(1)), int(match.group(2)))
+            modes.setdefault((fourcc, *size), 0.0)
+            continue
+        match = re.search(r"\(([\d.]+) fps\)", line)
+        if match and fourcc and size:
+            key = (fourcc, *size)
+            modes[key] = max(modes[key], float(match.group(1)))
+    return [CaptureMode(f, w, h, fps) for (f, w, h), fps in modes.items() if f in ("MJPG", "YUYV")]
+
+
+def _probe_opencv_modes(cap):
+    """Try each candidate mode and keep those the driver accepts unchanged."""
+    modes = set()
+    for fourcc, width, height in CAPTURE_MODE_CANDIDATES:
+        actual = apply_capture_mode(cap, CaptureMode(fourcc, width, height, 0))
+        if (actual.fourcc, actual.width, actual.height) == (fourcc, width, height):
+            modes.add(actual)
+    return sorted(modes)
+
+
+def list_capture_modes(cap, index):
+    """Return the capture modes supported by the camera."""
+    return _list_v4l2_modes(index) or _probe_opencv_modes(cap)
+
+
+def mode_cost(mode):
+    """Relative per-frame capture cost: pixels, weighted by decode work."""
+    factor = CAPTURE_MJPG_COST_FACTOR if mode.fourcc == "MJPG" else 1.0
+    return mode.width * mode.height * factor
+
+
+def select_capture_mode(modes, target_size, min_fps=CAPTURE_MIN_FPS):
+    """
+    Pick the cheapest mode that fills ``target_size`` without upscaling and
+    delivers at least ``min_fps``.  Falls back to the fastest largest mode.
+    """
+    if not modes:
+        return None
+    usable = [m for m in modes
+              if max(m.width, m.height) >= target_size and (not m.fps or m.fps >= min_fps)]
+    if usable:
+        return min(usable, key=lambda m: (mode_cost(m), -m.fps))
+    return max(modes, key=lambda m: (m.fps >= min_fps, m.width * m.height, m.fps))
+
+
+class Letterbox:
+    """
+    Resize and pad frames to a square model input in a single pass.
+
+    The scale, padding and destination view are computed once per source
+    size.  Frames are resized straight into one of two preallocated padded
+    canvases, so no intermediate buffer or border copy is needed per frame.
+    The canvases alternate, so the previously returned frame stays intact
+    until the next-but-one call.
+    """
+
+    def __init__(self, src_width, src_height, size, color=LETTERBOX_COLOR):
+        self.src_shape = (src_height, src_width)
+        self.size = size
+        self.scale = min(size / src_width, size / src_height)
+        self.new_size = (round(src_width * self.scale), round(src_height * self.scale))
+        self.pad_x = (size - self.new_size[0]) // 2
+        self.pad_y = (size - self.new_size[1]) // 2
+        self.canvases = [np.full((size, size, 3), color, dtype=np.uint8) for _ in range(2)]
+        self.views = [c[self.pad_y:self.pad_y + self.new_size[1], self.pad_x:self.pad_x + self.new_size[0]]
+                      for c in self.canvases]
+        self.index = 0
+
+    def __call__(self, frame):
+        self.index ^= 1
+        cv2.resize(frame, self.new_size, dst=self.views[self.index], interpolation=cv2.INTER_LINEAR)
+        return self.canvases[self.index]
+
+    def to_source(self, x, y):
+        """Map model-input coordinates back to source frame coordinates."""
+        return (x - self.pad_x) / self.scale, (y - self.pad_y) / self.scale
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incident clip recorder.
+
+Keeps a bounded in-memory ring of recent JPEG frames (shared with the web
+stream encoders) and, when an alert is raised, writes pre-roll plus post-roll
+footage to disk from a background thread as an MJPEG AVI file.
+"""
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import (
+    CLIP_OUTPUT_DIR,
+    CLIP_STREAM_PROFILE,
+    CLIP_TRIGGER_LEVELS,
+    CLIP_FPS,
+    CLIP_PRE_ROLL,
+    CLIP_POST_ROLL,
+    CLIP_MAX_DURATION,
+    CLIP_RING_MAX_BYTES,
+    CLIP_MAX_PENDING,
+    CLIP_MAX_FILES,
+)
+from utils.image_header import jpeg_size
+from utils.log import log_info, log_warning, log_error
+from utils.thread_budget import apply_thread_role
+from utils.web_stream import wait_frame, encode_frame
+
+_AVIF_HASINDEX = 0x10
+_AVIIF_KEYFRAME = 0x10
+
+
+def _chunk(fourcc, payload):
+    """Return a RIFF chunk, padded to an even length."""
+    pad = b"\0" if len(payload) % 2 else b""
+    return fourcc + struct.pack("<I", len(payload)) + payload + pad
+
+
+def _list(list_type, payload):
+    return _chunk(b"LIST", list_type + payload)
+
+
+def write_mjpeg_avi(path, frames, fps):
+    """
+    Write JPEG frames to an AVI container without re-encoding them.
+
+    The result is a standard Motion-JPEG AVI that plays in VLC, ffmpeg and
+    most desktop players.
+    """
+    size = jpeg_size(frames[0])
+    if size is None:
+        raise ValueError("First clip frame is not a valid JPEG image")
+    width, height = size
+    rate = max(1, round(fps * 1000))
+    max_frame = max(len(f) for f in frames)
+
+    avih = struct.pack(
+        "<14I",
+        round(1_000_000 / fps), max_frame * max(1, round(fps)), 0, _AVIF_HASINDEX,
+        len(frames), 0, 1, max_frame, width, height, 0, 0, 0, 0,
+    )
+    strh = struct.pack(
+        "<4s4sIHHIIIIIIiI4h",
+        b"vids", b"MJPG", 0, 0, 0, 0, 1000, rate, 0, len(frames),
+        max_frame, -1, 0, 0, 0, width, height,
+    )
+    strf = struct.pack(
+        "<IiiHH4sIiiII",
+        40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0,
+    )
+    hdrl = _list(b"hdrl", _chunk(b"avih", avih)
+                 + _list(b"strl", _chunk(b"strh", strh) + _chunk(b"strf", strf)))
+
+    movi_chunks = []
+    index = []
+    offset = 4  # idx1 offsets are relative to the 'movi' list type
+    for frame in frames:
+        chunk = _chunk(b"00dc", frame)
+        index.append(struct.pack("<4sIII", b"00dc", _AVIIF_KEYFRAME, offset, len(frame)))
+        movi_chunks.append(chunk)
+        offset += len(chunk)
+    movi = _list(b"movi", b"".join(movi_chunks))
+    idx1 = _chunk(b"idx1", b"".join(index))
+
+    body = b"AVI " + hdrl + movi + idx1
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", len(body)) + body)
+    os.replace(tmp_path, path)
+
+
+class ClipRecorder:
+    """
+    Bounded pre-roll ring plus background writer for incident clips.
+    """
+
+    def __init__(self, output_dir=CLIP_OUTPUT_DIR):
+        self.output_dir = output_dir
+        self.ring = deque()  # (timestamp, jpeg bytes)
+        self.ring_bytes = 0
+        self.incident = None  # {"reason", "frames", "bytes", "start", "until"}
+        self.clips = queue.Queue(maxsize=CLIP_MAX_PENDING)
+        self.lock = threading.Lock()
+        self.stopped = False
+        self._capture_thread = threading.Thread(target=self._capture, daemon=True)
+        self._writer_thread = threading.Thread(target=self._write, daemon=True)
+
+    def start(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._capture_thread.start()
+        self._writer_thread.start()
+        return self
+
+    def on_notice(self, message, level):
+        """Notice listener: start or extend a clip for alert-level notices."""
+        if level in CLIP_TRIGGER_LEVELS:
+            self.trigger(message)
+
+    def trigger(self, reason):
+        """Start a clip with the current pre-roll, or extend the active one."""
+        now = time.time()
+        with self.lock:
+            if self.incident is not None:
+                self.incident["until"] = min(now + CLIP_POST_ROLL,
+                                             self.incident["start"] + CLIP_MAX_DURATION)
+                return
+            frames = list(self.ring)
+            self.incident = {
+                "reason": reason,
+                "frames": frames,
+                "bytes": sum(len(jpeg) for _, jpeg in frames),
+                "start": frames[0][0] if frames else now,
+                "until": now + CLIP_POST_ROLL,
+            }
+
+    def _capture(self):
+        apply_thread_role("background")
+        seq = 0
+        interval = 1.0 / CLIP_FPS
+        next_grab = 0.0
+        while not self.stopped:
+            delay = next_grab - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            new_seq, frame = wait_frame(seq, timeout=0.5)
+            if new_seq == seq or frame is None:
+                self._append(time.time(), None)
+                continue
+            seq = new_seq
+            next_grab = time.monotonic() + interval
+            jpeg = encode_frame(CLIP_STREAM_PROFILE, seq, frame)
+            if jpeg is not None:
+                self._append(time.time(), jpeg)
+
+    def _append(self, now, jpeg):
+        with self.lock:
+            if jpeg is not None:
+                self.ring.append((now, jpeg))
+                self.ring_bytes += len(jpeg)
+                while self.ring and (now - self.ring[0][0] > CLIP_PRE_ROLL
+                                     or self.ring_bytes > CLIP_RING_MAX_BYTES):
+                    self.ring_bytes -= len(self.ring.popleft()[1])
+
+            incident = self.incident
+            if incident is None:
+                return
+            if jpeg is not None and incident["bytes"] + len(jpeg) <= CLIP_RING_MAX_BYTES:
+                incident["frames"].append((now, jpeg))
+                incident["bytes"] += len(jpeg)
+            if now < incident["until"]:
+                return
+            self.incident = None
+        self._finish(incident)
+
+    def _finish(self, incident):
+        if not incident["frames"]:
+            return
+        try:
+            self.clips.put_nowait(incident)
+        except queue.Full:
+            log_warning(f"Clip writer busy, dropped clip for '{incident['reason']}'")
+
+    def _write(self):
+        apply_thread_role("background")
+        while True:
+            incident = self.clips.get()
+            if incident is None:
+                break
+            frames = incident["frames"]
+            duration = frames[-1][0] - frames[0][0]
+            fps = (len(frames) - 1) / duration if duration > 0 else CLIP_FPS
+            stamp = datetime.fromtimestamp(frames[0][0]).strftime("%Y%m%d_%H%M%S")
+            reason = re.sub(r"[^a-z0-9]+", "_", incident["reason"].lower()).strip("_")
+            path = self.output_dir / f"{stamp}_{reason}.avi"
+            try:
+                write_mjpeg_avi(path, [jpeg for _, jpeg in frames], fps)
+                log_info(f"Saved incident clip {path} ({len(frames)} frames, {duration:.1f}s)")
+            except (OSError, ValueError) as e:
+                log_error(f"Failed to write clip {path}: {e}")
+            self._prune()
+
+    def _prune(self):
+        clips = sorted(self.output_dir.glob("*.avi"))
+        for old in clips[:max(0, len(clips) - CLIP_MAX_FILES)]:
+            old.unlink(missing_ok=True)
+
+    def stop(self):
+        """Flush any clip in progress and stop the background threads."""
+        self.stopped = True
+        self._capture_thread.join(timeout=2)
+        with self.lock:
+            incident, self.incident = self.incident, None
+        if incident is not None:
+            self._finish(incident)
+        self.clips.put(None)
+        self._writer_thread.join(timeout=10)
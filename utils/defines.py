@@ -11,6 +11,28 @@ CAMERA_INDEX = 0
 FRAME_WIDTH = 320
 FRAME_HEIGHT = 320
 
+# Model input size (square).  Captured frames are letterboxed to this size in
+# the capture thread so the detector does not resize them again.
+MODEL_INPUT_SIZE = 320
+CAPTURE_LETTERBOX = True
+LETTERBOX_COLOR = (114, 114, 114)  # Same padding value Ultralytics uses
+
+# Capture format negotiation.  Supported modes are listed with ``v4l2-ctl``
+# when available, otherwise the candidates below are probed through OpenCV.
+# The cheapest mode that delivers at least ``CAPTURE_MIN_FPS`` without
+# upscaling to the model input is selected.  MJPG costs a JPEG decode per
+# frame, weighted by ``CAPTURE_MJPG_COST_FACTOR`` against raw YUYV.
+CAPTURE_MIN_FPS = 15
+CAPTURE_MJPG_COST_FACTOR = 3.0
+CAPTURE_MODE_CANDIDATES = [
+    ("YUYV", 320, 240),
+    ("YUYV", 352, 288),
+    ("YUYV", 640, 480),
+    ("MJPG", 320, 240),
+    ("MJPG", 640, 480),
+    ("MJPG", 1280, 720),
+]
+
 # Detection thresholds
 CONFIDENCE_THRESHOLD = 0.3  # General detection confidence threshold
 CONFIDENCE_THRESHOLD_FACE = 0.45
@@ -24,6 +46,133 @@ PHONE_CLASS_ID = 1  # 'phone'
 # in the web interface.
 NCNN_MODEL_PATH = Path("traning") / "runs" / "train" / "yolov11n_320_V3" / "weights" / "yolov11n_320_V3_ncnn_model"
 
+# Model hot swap.  NCNN exports copied into ``MODEL_WATCH_DIR`` (or requested
+# with POST /admin/model) are loaded and warmed up in the background, checked
+# on recently seen frames against the running model, then swapped in between
+# two frames; the running model keeps protecting until then.  The replaced
+# model is kept for POST /admin/model/rollback.  The active path is recorded
+# in ``ACTIVE_MODEL_FILE`` and preferred over ``NCNN_MODEL_PATH`` on start.
+MODEL_WATCH_DIR = Path("models")
+MODEL_WATCH_INTERVAL = 5.0  # seconds; exports must also be unchanged this long
+ACTIVE_MODEL_FILE = MODEL_WATCH_DIR / "active_model.txt"
+MODEL_VALIDATE_FRAMES = 8  # recent frames kept for validation
+MODEL_VALIDATE_MIN_FRAMES = 3  # candidates are rejected (watcher: deferred) until this many are kept
+MODEL_VALIDATE_SAMPLE_INTERVAL = 30  # inferences between kept frames
+MODEL_VALIDATE_MIN_AGREEMENT = 0.6  # mean box agreement with the running model
+MODEL_VALIDATE_MAX_SLOWDOWN = 2.0  # latency ratio allowed, measured while sharing the CPU
+ADMIN_TOKEN = os.environ.get("FIPD_ADMIN_TOKEN")  # required by /admin routes; unset = loopback only
+
+# Load-adaptive model ladder: ``(model path, input size)`` rungs ordered from
+# most accurate to fastest, all loaded and warmed up at startup (rungs sharing
+# a path share the model).  The detector steps down a rung when its moving
+# average latency exceeds ``ADAPTIVE_LATENCY_HIGH_MS`` or the SoC is hot or
+# throttled, and steps back up after ``ADAPTIVE_UP_FRAMES`` frames in which
+# the upper rung is predicted to stay under ``ADAPTIVE_LATENCY_LOW_MS`` and
+# the SoC is cool.  While an alert is active latency alone never steps down.
+# Switches are at least ``ADAPTIVE_HOLD_SECONDS`` apart.  Rungs using the
+# first rung's model run the active model, so a hot swap rebuilds the ladder
+# with the new model on each of them.  Empty disables.
+ADAPTIVE_LADDER = []  # e.g. [(NCNN_MODEL_PATH, 320), (NCNN_MODEL_PATH, 256), (NCNN_MODEL_PATH, 192)]
+ADAPTIVE_LATENCY_HIGH_MS = 120
+ADAPTIVE_LATENCY_LOW_MS = 80
+ADAPTIVE_TEMP_HIGH_C = 80.0
+ADAPTIVE_TEMP_LOW_C = 72.0
+ADAPTIVE_HOLD_SECONDS = 5.0
+ADAPTIVE_UP_FRAMES = 60
+ADAPTIVE_SENSOR_INTERVAL = 1.0  # seconds between thermal readings
+ADAPTIVE_PROBE_RUNS = 5  # timed inferences per rung at startup
+SOC_TEMP_FILE = Path("/sys/class/thermal/thermal_zone0/temp")
+SOC_THROTTLED_FILE = Path("/sys/devices/platform/soc/soc:firmware/get_throttled")  # Raspberry Pi
+
+# Region-of-interest inference.  The detector runs on a native-resolution
+# crop covering the zones (plus margin) and the expanded last-known
+# boxes, with a full-frame pass every ``ROI_FULL_FRAME_INTERVAL`` frames to
+# catch new entrants.  Crops are never upscaled and use a rectangular model
+# input (NCNN accepts dynamic shapes), so narrow crops also run faster.
+ROI_INFERENCE = False
+ROI_FULL_FRAME_INTERVAL = 10
+ROI_ZONE_MARGIN = 0.05  # Fraction of frame width added around the zones
+ROI_BOX_EXPAND = 1.0  # Box width/height added on every side of known boxes
+ROI_MAX_AREA = 0.7  # Above this fraction of the frame a full pass is used
+
+# Face-then-phone cascade.  After the full pass, the regions below and around
+# the most confident faces are cut from the native frame, resized to
+# ``CASCADE_TILE_SIZE`` tiles and run through the phone model in one
+# inference, laid side by side (the NCNN backend only runs batch size 1).
+# Each stage has a latency budget: stage 2 is skipped when stage 1 overran
+# its own, and the number of tiles is limited to what the measured per-tile
+# cost fits into ``CASCADE_STAGE2_BUDGET_MS``.
+CASCADE_ENABLED = False
+CASCADE_PHONE_MODEL_PATH = NCNN_MODEL_PATH
+CASCADE_TILE_SIZE = 224
+CASCADE_MAX_TILES = 3
+CASCADE_CROP_SIDE = 1.0  # Face widths added on each side of the face
+CASCADE_CROP_ABOVE = 0.25  # Face heights added above the face
+CASCADE_CROP_BELOW = 2.5  # Face heights added below the face
+CASCADE_STAGE1_BUDGET_MS = 120
+CASCADE_STAGE2_BUDGET_MS = 60
+CASCADE_NMS_IOU = 0.5
+
+# ROI inference and the cascade crop the native frame, so frames are kept at
+# capture resolution instead of being letterboxed to the model input, and a
+# capture mode of at least ``NATIVE_CAPTURE_SIZE`` is negotiated.
+NATIVE_CAPTURE = ROI_INFERENCE or CASCADE_ENABLED
+NATIVE_CAPTURE_SIZE = 640
+
+# Motion-gated inference.  A downsampled grayscale frame is compared with the
+# one seen at the last inference.  While nothing changed and no operator or
+# alert is active, the model only runs every ``MOTION_IDLE_INTERVAL`` frames;
+# any change triggers inference on that same frame.
+MOTION_GATE_ENABLED = True
+MOTION_WIDTH = 64  # Width of the comparison frame in pixels
+MOTION_PIXEL_THRESHOLD = 25  # Gray-level difference counted as changed
+MOTION_AREA_THRESHOLD = 0.01  # Fraction of changed pixels that means motion
+MOTION_IDLE_INTERVAL = 15  # Frames between inferences while idle
+
+# Out-of-process inference.  When enabled the detector runs in a worker
+# process; frames are copied into shared-memory slots and packed detections
+# come back the same way, so only a few bytes of control data cross the pipe.
+USE_INFERENCE_WORKER = False
+WORKER_SLOTS = 2
+WORKER_MAX_FRAME_SHAPE = (720, 1280, 3)  # Largest frame a slot can hold
+WORKER_MAX_DETECTIONS = 100
+WORKER_START_TIMEOUT = 120  # Seconds allowed for model load and warmup
+WORKER_RESULT_TIMEOUT = 2.0  # Seconds before a frame is considered hung
+WORKER_RESTART_BACKOFF = 1.0  # Seconds before the first restart retry, doubled per failure
+WORKER_RESTART_MAX_BACKOFF = 60.0
+WORKER_RESTART_NOTICE_AFTER = 3  # Failed restarts before a notice is raised
+
+# Startup
+WARMUP_RUNS = 3  # Inferences on a blank frame before the detection loop starts
+STARTUP_BENCHMARK_FILE = Path("logs") / "startup_benchmark.jsonl"
+
+# Web server
+WEB_HOST = "0.0.0.0"
+WEB_PORT = 5000
+
+# Runtime thread budget for the Pi's four cores.  CPU pinning and per-thread
+# priorities are applied on Linux only; raising priority (negative nice) needs
+# CAP_SYS_NICE and is skipped with a warning otherwise.
+THREAD_BUDGET = {
+    "inference_threads": 3,       # NCNN worker threads
+    "inference_cpus": [1, 2, 3],  # Detection loop and its NCNN workers
+    "capture_cpus": [0],          # Camera grab/retrieve/letterbox thread
+    "web_cpus": [0],              # Flask request threads and JPEG encoding
+    "background_cpus": [0],       # Clip recorder, detection log, model watcher/loader
+    "inference_nice": -5,
+    "capture_nice": -5,
+    "web_nice": 5,
+    "background_nice": 10,
+    "encode_threads": 1,          # Concurrent JPEG encodes across all viewers
+    "opencv_threads": 1,          # OpenCV internal parallelism (resize, etc.)
+    "max_stream_clients": 4,      # Simultaneous /video_feed viewers
+}
+CAPTURE_RETRY_DELAY = 0.01  # Seconds to back off when the camera has no frame
+
+# Replay source used by benchmarks (video file or folder of images)
+REPLAY_SOURCE = Path("test_images")
+REPLAY_FPS = 30
+
 # Serial settings
 SERIAL_PORT = "COM3" if os.name == "nt" else "/dev/ttyAMA0"
 SERIAL_BAUDRATE = 115200
@@ -43,9 +192,51 @@ UI_INFO_COLOR = "#42a5f5"
 # Notice display duration in seconds
 NOTICE_DURATION = 1
 
+# Web stream profiles selected with ``/video_feed?profile=<name>``.  Each
+# profile is encoded once per new frame and shared by all of its viewers.  A
+# ``width`` of ``None`` streams the frame at its native size.
+STREAM_PROFILES = {
+    "thumb": {"width": 160, "quality": 50, "max_fps": 5},
+    "normal": {"width": 320, "quality": 70, "max_fps": 15},
+    "full": {"width": None, "quality": 90, "max_fps": 30},
+}
+DEFAULT_STREAM_PROFILE = "normal"
+
+# Adaptive stream quality.  When more than ``STREAM_BACKLOG_BYTES`` are still
+# waiting in a client's socket send buffer the frame is dropped and the JPEG
+# quality for that client steps down.  It steps back up after the buffer has
+# stayed drained for ``STREAM_RECOVER_FRAMES`` frames.
+STREAM_QUALITY_STEP = 15
+STREAM_MIN_QUALITY = 30
+STREAM_BACKLOG_BYTES = 64 * 1024
+STREAM_RECOVER_FRAMES = 30
+
+# Incident clip recorder.  The last ``CLIP_PRE_ROLL`` seconds of JPEG frames
+# from ``CLIP_STREAM_PROFILE`` are kept in memory (never more than
+# ``CLIP_RING_MAX_BYTES``).  When a notice with a level from
+# ``CLIP_TRIGGER_LEVELS`` is raised, the pre-roll plus ``CLIP_POST_ROLL``
+# seconds are written to ``CLIP_OUTPUT_DIR`` as an MJPEG AVI file.
+CLIP_OUTPUT_DIR = Path("clips")
+CLIP_STREAM_PROFILE = "normal"
+CLIP_TRIGGER_LEVELS = ("warning", "critical")
+CLIP_FPS = 10
+CLIP_PRE_ROLL = 5  # seconds
+CLIP_POST_ROLL = 5  # seconds
+CLIP_MAX_DURATION = 30  # seconds, repeated alerts extend a clip up to this
+CLIP_RING_MAX_BYTES = 8 * 1024 * 1024
+CLIP_MAX_PENDING = 2  # finished clips waiting for the writer thread
+CLIP_MAX_FILES = 200  # oldest clips are deleted beyond this count
+
 # Detection settings
 DRAW_POINT_OFFSET = 5  # Pixels below the top line of the bbox
 
+# Safe and restricted polygon zones, edited in the web UI.  A face anchor
+# outside every safe zone, or inside a restricted one, counts as a breach.
+# Zones are bits of a uint8 mask, hence at most 8.
+ZONES_FILE = Path("config") / "zones.json"
+ZONES_RELOAD_INTERVAL = 1.0  # seconds between checks for hand edits
+MAX_ZONES = 8
+
 # Debounce settings
 # Number of frames used to evaluate if a detection is stable.  The detection is
 # considered valid when it appears in at least half of these frames.
@@ -58,6 +249,18 @@ SAFE_ZONE_SCAN_FRAMES = 30
 PHONE_DEBOUNCE_FRAMES = PHONE_SCAN_FRAMES * 2
 SAFE_ZONE_DEBOUNCE_FRAMES = SAFE_ZONE_SCAN_FRAMES * 2
 
+# Binary detection log.  One fixed-size record per frame is queued by the
+# detection loop and written in batches every ``DETLOG_FLUSH_SECONDS`` by a
+# background thread.  Segments rotate at ``DETLOG_SEGMENT_BYTES`` and only the
+# newest ``DETLOG_MAX_SEGMENTS`` are kept.
+DETLOG_ENABLED = True
+DETLOG_DIR = Path("logs") / "detections"
+DETLOG_MAX_BOXES = 8  # boxes stored per record, extra boxes set a flag
+DETLOG_FLUSH_SECONDS = 5
+DETLOG_SEGMENT_BYTES = 16 * 1024 * 1024
+DETLOG_MAX_SEGMENTS = 32
+DETLOG_MAX_QUEUED = 30 * 60  # records held in memory if the writer stalls
+
 # Serial command messages
 PHONE_COMMAND = "phone_detected"
 BREACH_COMMAND = "breach_detected"
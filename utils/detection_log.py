@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+Append-only binary detection log.
+
+Every frame is stored as one fixed-size record (timestamp, frame sequence,
+packed boxes/confidences/classes and alert flags).  Records are batched by a
+background writer into rotating segment files which ``DetectionLogReader``
+memory-maps for fast time-range queries.
+"""
+import os
+import struct
+import threading
+import time
+from collections import deque
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import (
+    DETLOG_DIR,
+    DETLOG_MAX_BOXES,
+    DETLOG_FLUSH_SECONDS,
+    DETLOG_SEGMENT_BYTES,
+    DETLOG_MAX_SEGMENTS,
+    DETLOG_MAX_QUEUED,
+)
+from utils.log import log_error
+from utils.thread_budget import apply_thread_role
+
+# Record flags
+FLAG_PHONE_PRESENT = 1 << 0
+FLAG_PHONE_ACTIVE = 1 << 1
+FLAG_ANY_OUTSIDE = 1 << 2
+FLAG_BREACH_ACTIVE = 1 << 3
+FLAG_TRUNCATED = 1 << 4  # more boxes than DETLOG_MAX_BOXES were detected
+FLAG_GATED = 1 << 5  # inference skipped by the motion gate, boxes are reused
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("seq", "<u4"),
+    ("count", "u1"),
+    ("flags", "u1"),
+    ("operators", "u1"),
+    ("reserved", "u1"),
+    ("boxes", "<u2", (DETLOG_MAX_BOXES, 4)),  # x1, y1, x2, y2 in pixels
+    ("conf", "u1", (DETLOG_MAX_BOXES,)),  # confidence * 255
+    ("cls", "u1", (DETLOG_MAX_BOXES,)),
+])
+
+SEGMENT_MAGIC = b"FIPDLOG1"
+SEGMENT_HEADER = struct.Struct("<8sII")  # magic, record size, boxes per record
+SEGMENT_GLOB = "detlog_*.bin"
+
+
+def _segment_start(path):
+    """Segment start time in seconds, encoded in the file name."""
+    return int(path.stem.split("_")[1]) / 1000.0
+
+
+class DetectionLogger:
+    """
+    Batched background writer for per-frame detection records.
+    """
+
+    def __init__(self, log_dir=DETLOG_DIR):
+        self.log_dir = log_dir
+        self.queue = deque(maxlen=DETLOG_MAX_QUEUED)
+        self.stopped = threading.Event()
+        self.file = None
+        self.file_size = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.thread.start()
+        return self
+
+    def log(self, timestamp, seq, detections, operator_count, flags):
+        """Queue one frame record; packing and I/O happen on the writer thread."""
+        self.queue.append((timestamp, seq, detections, operator_count, flags))
+
+    def _pack(self, entries):
+        records = np.zeros(len(entries), dtype=RECORD_DTYPE)
+        times, seqs, _, operators, flags = zip(*entries)
+        records["time"] = times
+        records["seq"] = seqs
+        records["operators"] = np.minimum(operators, 255)
+        records["flags"] = flags
+        for i, (_, _, detections, _, _) in enumerate(entries):
+            if not detections:
+                continue
+            count = min(len(detections), DETLOG_MAX_BOXES)
+            if len(detections) > DETLOG_MAX_BOXES:
+                records["flags"][i] |= FLAG_TRUNCATED
+            packed = np.asarray(detections[:count], dtype=np.float64)
+            records["count"][i] = count
+            records["boxes"][i, :count] = np.clip(packed[:, :4], 0, 65535)
+            records["conf"][i, :count] = np.clip(packed[:, 4] * 255 + 0.5, 0, 255)
+            records["cls"][i, :count] = packed[:, 5]
+        return records
+
+    def _open_segment(self, timestamp):
+        if self.file is not None:
+            self.file.close()
+        path = self.log_dir / f"detlog_{int(timestamp * 1000):013d}.bin"
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, RECORD_DTYPE.itemsize, DETLOG_MAX_BOXES))
+        self.file_size = self.file.tell()
+        segments = sorted(self.log_dir.glob(SEGMENT_GLOB))
+        for old in segments[:max(0, len(segments) - DETLOG_MAX_SEGMENTS)]:
+            old.unlink(missing_ok=True)
+
+    def _flush(self):
+        entries = []
+        while self.queue:
+            entries.append(self.queue.popleft())
+        if not entries:
+            return
+        records = self._pack(entries)
+        if self.file is None or self.file_size + records.nbytes > DETLOG_SEGMENT_BYTES:
+            self._open_segment(entries[0][0])
+        self.file.write(records.tobytes())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file_size += records.nbytes
+
+    def _run(self):
+        apply_thread_role("background")
+        while not self.stopped.wait(DETLOG_FLUSH_SECONDS):
+            try:
+                self._flush()
+            except OSError as e:
+                log_error(f"Detection log write failed: {e}")
+
+    def stop(self):
+        """Write any queued records and close the current segment."""
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        try:
+            self._flush()
+        except OSError as e:
+            log_error(f"Detection log write failed: {e}")
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class DetectionLogReader:
+    """
+    Memory-mapped reader for detection log segments.
+    """
+
+    def __init__(self, log_dir=DETLOG_DIR):
+        self.log_dir = log_dir
+
+    def segments(self):
+        return sorted(self.log_dir.glob(SEGMENT_GLOB))
+
+    @staticmethod
+    def open_segment(path):
+        """Return the records of one segment as a read-only memory map."""
+        header_size = SEGMENT_HEADER.size
+        with open(path, "rb") as f:
+            magic, record_size, _ = SEGMENT_HEADER.unpack(f.read(header_size))
+        if magic != SEGMENT_MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported detection log segment: {path}")
+        count = (path.stat().st_size - header_size) // record_size
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=header_size, shape=(count,))
+
+    def query(self, start=None, end=None):
+        """
+        Return all records with ``start <= time < end`` as one array.
+
+        Segments are skipped by the start time in their names and records are
+        located with a binary search on the record timestamps.
+        """
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        segments = self.segments()
+        starts = [_segment_start(p) for p in segments]
+        parts = []
+        for i, path in enumerate(segments):
+            next_start = starts[i + 1] if i + 1 < len(segments) else np.inf
+            if starts[i] >= end or next_start <= start:
+                continue
+            records = self.open_segment(path)
+            lo, hi = np.searchsorted(records["time"], [start, end])
+            if hi > lo:
+                parts.append(np.array(records[lo:hi]))
+        if not parts:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+    def last(self, seconds):
+        """Return the records of the last ``seconds`` seconds."""
+        return self.query(time.time() - seconds)
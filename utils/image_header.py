@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""
+Read image dimensions from encoded headers without decoding the pixels.
+"""
+import struct
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# JPEG start-of-frame markers carrying the image size (excludes DHT/JPG/DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(data):
+    """Return ``(width, height)`` of JPEG bytes, or ``None`` if not found."""
+    i = 2
+    end = len(data) - 9
+    while i < end:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Fill byte or standalone marker without a length field
+            i += 1 if marker == 0xFF else 2
+            continue
+        i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+def png_size(data):
+    """Return ``(width, height)`` of PNG bytes, or ``None`` if not found."""
+    if data[:8] != PNG_SIGNATURE or data[12:16] != b"IHDR" or len(data) < 24:
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def encoded_size(data):
+    """Return ``(width, height)`` of PNG or JPEG bytes, or ``None`` if not found."""
+    if data[:8] == PNG_SIGNATURE:
+        return png_size(data)
+    if data[:2] == b"\xff\xd8":
+        return jpeg_size(data)
+    return None
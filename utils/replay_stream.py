@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from pathlib import Path
+import cv2
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import (
+    MODEL_INPUT_SIZE,
+    CAPTURE_LETTERBOX,
+    NATIVE_CAPTURE,
+    REPLAY_FPS,
+    THREAD_BUDGET,
+)
+from utils.capture_format import Letterbox
+from utils.thread_budget import apply_thread_role
+
+IMAGE_EXTS = [".jpg", ".jpeg", ".png", ".bmp"]
+
+
+def load_frames(source, max_frames=None, letterbox=CAPTURE_LETTERBOX and not NATIVE_CAPTURE):
+    """
+    Decode a video file or a folder of images into a list of frames,
+    letterboxed the same way the capture thread would.
+    """
+    source = Path(source)
+    frames = []
+    if source.is_dir():
+        for path in sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_EXTS):
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                frames.append(frame)
+            if max_frames and len(frames) >= max_frames:
+                break
+    else:
+        cap = cv2.VideoCapture(str(source))
+        while not max_frames or len(frames) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        raise FileNotFoundError(f"No frames could be read from {source}")
+
+    if letterbox:
+        boxes = {}
+        for i, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            if (width, height) not in boxes:
+                boxes[(width, height)] = Letterbox(width, height, MODEL_INPUT_SIZE)
+            frames[i] = boxes[(width, height)](frame).copy()
+    return frames
+
+
+class ReplayStream:
+    """
+    Replays pre-decoded frames with the same interface as ``CameraStream``.
+
+    Frames are published from a background thread at ``fps``, looping over
+    the source, so consumers see the same pacing as a live camera.
+    """
+
+    def __init__(self, source, fps=REPLAY_FPS, max_frames=None, budget=THREAD_BUDGET):
+        self.frames = load_frames(source, max_frames)
+        self.fps = fps
+        self.budget = budget
+        self.frame = None
+        self.index = -1
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._update, daemon=True).start()
+        return self
+
+    def _update(self):
+        apply_thread_role("capture", self.budget)
+        interval = 1.0 / self.fps
+        next_time = time.monotonic()
+        while not self.stopped:
+            with self.lock:
+                self.index += 1
+                self.frame = self.frames[self.index % len(self.frames)]
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def read(self):
+        with self.lock:
+            return self.frame.copy() if self.frame is not None else None
+
+    def stop(self):
+        self.stopped = True
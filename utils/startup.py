@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+Startup phase timing and the time-to-first-protected-frame benchmark.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import STARTUP_BENCHMARK_FILE
+from utils.log import log_info, log_warning
+
+
+def _uptime():
+    """Seconds since the system booted, or ``None`` when unavailable."""
+    try:
+        with open("/proc/uptime") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError):
+        return None
+
+
+def _process_age():
+    """Seconds since this process was started, or ``None`` when unavailable."""
+    uptime = _uptime()
+    if uptime is None:
+        return None
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields resume after ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    """
+    Times startup phases (possibly running in parallel threads) and records
+    how long it took to protect the first frame.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.done = False
+
+    def run(self, phase, func, *args, **kwargs):
+        """Call ``func`` and log how long it took."""
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.phases[phase] = round(elapsed * 1000, 1)
+        log_info(f"Startup: {phase} took {elapsed * 1000:.0f} ms")
+        return result
+
+    def first_protected_frame(self):
+        """Log and persist the startup benchmark once the first frame is checked."""
+        if self.done:
+            return
+        self.done = True
+        boot = _uptime()
+        process = _process_age()
+        main_elapsed = time.perf_counter() - self.start
+        log_info(f"First protected frame {main_elapsed:.2f}s after main() "
+                 f"({process if process is not None else float('nan'):.2f}s after process start, "
+                 f"{boot if boot is not None else float('nan'):.1f}s after power-on)")
+
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "boot_to_protected_s": None if boot is None else round(boot, 2),
+            "process_to_protected_s": None if process is None else round(process, 2),
+            "main_to_protected_s": round(main_elapsed, 2),
+            "phases_ms": self.phases,
+        }
+        try:
+            STARTUP_BENCHMARK_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(STARTUP_BENCHMARK_FILE, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            log_warning(f"Could not record startup benchmark: {e}")
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Apply the runtime thread budget: CPU pinning and scheduling priority per
+thread role, plus OpenCV's internal thread count.
+"""
+import os
+import threading
+import cv2
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import THREAD_BUDGET
+from utils.log import log_warning
+
+ROLES = ("inference", "capture", "web", "background")
+_warned = set()
+
+
+def _warn_once(key, message):
+    if key not in _warned:
+        _warned.add(key)
+        log_warning(message)
+
+
+def apply_thread_role(role, budget=THREAD_BUDGET):
+    """
+    Pin the calling thread to the role's CPUs and set its priority.
+
+    Threads started afterwards from this thread inherit both settings, which
+    is how NCNN's OpenMP workers end up on the inference cores.
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown thread role: {role}")
+    tid = threading.get_native_id()
+
+    cpus = budget.get(f"{role}_cpus")
+    if cpus and hasattr(os, "sched_setaffinity"):
+        available = os.sched_getaffinity(0)
+        cpus = set(cpus) & available or available
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except OSError as e:
+            _warn_once(f"{role}-affinity", f"Could not pin {role} thread to CPUs {sorted(cpus)}: {e}")
+
+    nice = budget.get(f"{role}_nice")
+    if nice is not None and hasattr(os, "setpriority"):
+        try:
+            # On Linux the "process" priority of a TID applies to that thread only
+            os.setpriority(os.PRIO_PROCESS, tid, nice)
+        except OSError as e:
+            _warn_once(f"{role}-nice", f"Could not set {role} thread priority to {nice}: {e}")
+
+
+def apply_process_budget(budget=THREAD_BUDGET):
+    """Apply process-wide settings that must be in place before threads start."""
+    cv2.setNumThreads(budget["opencv_threads"])
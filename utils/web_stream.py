@@ -1,17 +1,38 @@
 # -*- coding: utf-8 -*-
 
 from flask import Flask, Response, render_template, request, jsonify
+from werkzeug.serving import make_server
 import cv2
+import hmac
+import struct
 import threading
 import time
 from pathlib import Path
 from utils.defines import (
-    FRAME_WIDTH,
     UI_PRIMARY_COLOR,
     UI_ALERT_COLOR,
     UI_INFO_COLOR,
     NOTICE_DURATION,
+    STREAM_PROFILES,
+    DEFAULT_STREAM_PROFILE,
+    STREAM_QUALITY_STEP,
+    STREAM_MIN_QUALITY,
+    STREAM_BACKLOG_BYTES,
+    STREAM_RECOVER_FRAMES,
+    WEB_HOST,
+    WEB_PORT,
+    THREAD_BUDGET,
+    ADMIN_TOKEN,
 )
+from utils.thread_budget import apply_thread_role
+from utils.zones import ZoneSet, band_zone, is_band_zone
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Windows: send buffer backlog cannot be queried
+    fcntl = None
+    termios = None
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 app = Flask(
@@ -22,36 +43,133 @@ app = Flask(
 
 # Global frame buffer and lock
 _lock = threading.Lock()
+_frame_ready = threading.Condition(_lock)
 _current_frame = None
-_bounds = None
+_frame_seq = 0
+_zones = ZoneSet()
+_model_manager = None
 _status = {"phone": False, "operator": "Not Present", "count": 0, "fps": 0.0}
 _notices = []  # list of {"message": str, "level": str, "time": float}
+_notice_listeners = []  # callables receiving (message, level) for new notices
+_encoders = {}  # (profile, quality) -> StreamEncoder
+_encoders_lock = threading.Lock()
+# Caps from the thread budget: concurrent JPEG encodes and stream viewers
+_encode_slots = threading.BoundedSemaphore(THREAD_BUDGET["encode_threads"])
+_stream_slots = threading.BoundedSemaphore(THREAD_BUDGET["max_stream_clients"])
+_LOOPBACK_ADDRS = {"127.0.0.1", "::1", "::ffff:127.0.0.1"}
+
+
+class StreamEncoder:
+    """
+    JPEG encoder for one stream profile at one quality level.
+
+    Each new frame is encoded at most once and the bytes are shared by every
+    viewer currently watching the same profile at the same quality.
+    """
+
+    def __init__(self, width, quality):
+        self.width = width
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._seq = -1
+        self._jpeg = None
+
+    def encode(self, seq, frame):
+        with self._lock:
+            if seq != self._seq:
+                if self.width and frame.shape[1] != self.width:
+                    height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+                    frame = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+                with _encode_slots:
+                    success, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                self._jpeg = jpeg.tobytes() if success else None
+                self._seq = seq
+            return self._jpeg
+
+
+def _get_encoder(profile, quality):
+    """Return the shared encoder for a profile and quality level."""
+    key = (profile, quality)
+    with _encoders_lock:
+        encoder = _encoders.get(key)
+        if encoder is None:
+            encoder = StreamEncoder(STREAM_PROFILES[profile]["width"], quality)
+            _encoders[key] = encoder
+        return encoder
+
+
+def _unsent_bytes(sock):
+    """Return the number of bytes still queued in a socket's send buffer."""
+    if sock is None or fcntl is None:
+        return None
+    try:
+        queued = fcntl.ioctl(sock.fileno(), termios.TIOCOUTQ, b"\0\0\0\0")
+    except (OSError, ValueError):
+        return None
+    return struct.unpack("i", queued)[0]
 
 
 def update_frame(frame):
     """Update the global frame to be streamed."""
-    global _current_frame
-    with _lock:
-        _current_frame = frame.copy()
-
-
-def generate():
-    """Generate frames as JPEG stream."""
-    global _current_frame
+    global _current_frame, _frame_seq
+    frame = frame.copy()
+    with _frame_ready:
+        _current_frame = frame
+        _frame_seq += 1
+        _frame_ready.notify_all()
+
+
+def wait_frame(last_seq, timeout=1.0):
+    """
+    Block until a frame newer than ``last_seq`` is available.
+
+    Returns ``(seq, frame)``.  The frame is shared and must not be modified;
+    ``update_frame`` always stores a fresh array so no copy is needed here.
+    """
+    with _frame_ready:
+        _frame_ready.wait_for(lambda: _frame_seq != last_seq and _current_frame is not None, timeout)
+        return _frame_seq, _current_frame
+
+
+def encode_frame(profile, seq, frame):
+    """Return the shared JPEG bytes of a frame at the profile's base quality."""
+    return _get_encoder(profile, STREAM_PROFILES[profile]["quality"]).encode(seq, frame)
+
+
+def generate(profile=DEFAULT_STREAM_PROFILE, sock=None):
+    """Generate frames as JPEG stream for the given profile."""
+    settings = STREAM_PROFILES[profile]
+    interval = 1.0 / settings["max_fps"]
+    quality = settings["quality"]
+    drained_frames = 0
+    seq = 0
+    next_send = 0.0
     while True:
-        with _lock:
-            frame = None if _current_frame is None else _current_frame.copy()
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
-        if frame is None:
-            time.sleep(0.01)
+        new_seq, frame = wait_frame(seq)
+        if new_seq == seq or frame is None:
             continue
-
-        success, jpeg = cv2.imencode('.jpg', frame)
-        if not success:
-            time.sleep(0.01)
+        seq = new_seq
+        next_send = time.monotonic() + interval
+
+        # Back off when the client cannot keep up with the stream
+        backlog = _unsent_bytes(sock)
+        if backlog is not None and backlog > STREAM_BACKLOG_BYTES:
+            quality = max(STREAM_MIN_QUALITY, quality - STREAM_QUALITY_STEP)
+            drained_frames = 0
+            continue
+        if quality < settings["quality"]:
+            drained_frames += 1
+            if drained_frames >= STREAM_RECOVER_FRAMES:
+                quality = min(settings["quality"], quality + STREAM_QUALITY_STEP)
+                drained_frames = 0
+
+        frame_bytes = _get_encoder(profile, quality).encode(seq, frame)
+        if frame_bytes is None:
             continue
-
-        frame_bytes = jpeg.tobytes()
 
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
@@ -65,20 +183,29 @@ def index():
         primary_color=UI_PRIMARY_COLOR,
         alert_color=UI_ALERT_COLOR,
         info_color=UI_INFO_COLOR,
+        stream_profiles=list(STREAM_PROFILES),
+        default_profile=DEFAULT_STREAM_PROFILE,
     )
 
 
 @app.route('/video_feed')
 def video_feed():
-    """Stream the frame via MJPEG."""
-    return Response(generate(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    """Stream the frame via MJPEG using the requested profile."""
+    profile = request.args.get('profile', DEFAULT_STREAM_PROFILE)
+    if profile not in STREAM_PROFILES:
+        return jsonify({'status': 'error'}), 400
+    if not _stream_slots.acquire(blocking=False):
+        return jsonify({'status': 'busy'}), 503
+    sock = request.environ.get('werkzeug.socket')
+    response = Response(generate(profile, sock),
+                        mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.call_on_close(_stream_slots.release)
+    return response
 
 
 @app.route('/set_bounds', methods=['POST'])
 def set_bounds():
-    """Receive bounding line coordinates from the web UI."""
-    global _bounds
+    """Replace the safe band between two vertical lines, keeping drawn zones."""
     data = request.get_json(force=True)
     if not data or 'x1' not in data or 'x2' not in data:
         return jsonify({'status': 'error'}), 400
@@ -87,28 +214,89 @@ def set_bounds():
         x2 = max(0.0, min(float(data['x2']), 1.0))
     except (TypeError, ValueError):
         return jsonify({'status': 'error'}), 400
-    # Determine the width of the most recent frame if available. This ensures
-    # that the bounding line positions match the actual streamed frame even if
-    # the camera resolution differs from the configured FRAME_WIDTH constant.
-    with _lock:
-        frame_width = (_current_frame.shape[1]
-                       if _current_frame is not None else FRAME_WIDTH)
-
-    _bounds = (int(x1 * frame_width), int(x2 * frame_width))
+    # Zones are stored normalized and rasterized at the frame resolution
+    kept = [zone for zone in _zones.zones if not is_band_zone(zone)]
+    try:
+        _zones.update(kept + [band_zone(x1, x2)])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     return jsonify({'status': 'ok'})
 
 
 @app.route('/reset_bounds', methods=['POST'])
 def reset_bounds():
-    """Clear any existing bounding lines."""
-    global _bounds
-    _bounds = None
+    """Remove the safe band, keeping drawn zones."""
+    _zones.update([zone for zone in _zones.zones if not is_band_zone(zone)])
     return jsonify({'status': 'ok'})
 
 
-def get_bounds():
-    """Return the currently configured bounding lines."""
-    return _bounds
+@app.route('/zones', methods=['GET', 'POST'])
+def zones():
+    """Return the zone definitions, or validate, persist and apply new ones."""
+    if request.method == 'GET':
+        return jsonify({'zones': _zones.zones})
+    data = request.get_json(force=True, silent=True)
+    try:
+        applied = _zones.update(data.get('zones') if isinstance(data, dict) else None)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except OSError as e:
+        return jsonify({'status': 'error', 'message': f'Could not save zones: {e}'}), 500
+    return jsonify({'status': 'ok', 'zones': applied})
+
+
+def get_zones():
+    """Return the shared zone set, picking up edits made to the zone file."""
+    _zones.reload_if_changed()
+    return _zones
+
+
+def set_model_manager(manager):
+    """Expose a ``ModelManager`` through the /admin/model routes."""
+    global _model_manager
+    _model_manager = manager
+
+
+def _admin_denied():
+    """
+    Return an error response unless the request carries the admin token.
+    Without a configured token only loopback clients are allowed, since the
+    server listens on every interface and the routes load arbitrary paths.
+    """
+    if ADMIN_TOKEN:
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+            return jsonify({'status': 'forbidden'}), 403
+    elif request.remote_addr not in _LOOPBACK_ADDRS:
+        return jsonify({'status': 'forbidden'}), 403
+    if _model_manager is None:
+        return jsonify({'status': 'unavailable'}), 503
+    return None
+
+
+@app.route('/admin/model', methods=['GET', 'POST'])
+def admin_model():
+    """Report the model state, or load, validate and swap in the model at ``path``."""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if request.method == 'POST':
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict) or not data.get('path'):
+            return jsonify({'status': 'error'}), 400
+        if not _model_manager.request(data['path']):
+            return jsonify({'status': 'rejected', **_model_manager.status()}), 409
+    return jsonify({'status': 'ok', **_model_manager.status()})
+
+
+@app.route('/admin/model/rollback', methods=['POST'])
+def admin_model_rollback():
+    """Swap the previous model back in."""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if not _model_manager.rollback():
+        return jsonify({'status': 'rejected', **_model_manager.status()}), 409
+    return jsonify({'status': 'ok', **_model_manager.status()})
 
 
 def update_status(phone: bool, operator: str, count: int, fps: float):
@@ -117,15 +305,31 @@ def update_status(phone: bool, operator: str, count: int, fps: float):
     _status.update(phone=phone, operator=operator, count=count, fps=fps)
 
 
+def _purge_notices(now):
+    global _notices
+    _notices = [n for n in _notices if now - n["time"] <= NOTICE_DURATION]
+
+
 def set_notice(message: str, level: str = "info"):
     """Add or refresh a notice to display on the web UI."""
-    global _notices
+    # Expired notices are purged here too, so a re-raised one notifies again without a /status poll
+    _purge_notices(time.time())
     for notice in _notices:
         if notice["message"] == message:
             notice.update(level=level, time=time.time())
             break
     else:
         _notices.append({"message": message, "level": level, "time": time.time()})
+        for listener in _notice_listeners:
+            listener(message, level)
+
+
+def add_notice_listener(callback):
+    """
+    Register a callback invoked with ``(message, level)`` whenever a new
+    notice is raised.  Callbacks run on the caller's thread and must not block.
+    """
+    _notice_listeners.append(callback)
 
 
 def hold_notice(message: str):
@@ -139,9 +343,7 @@ def hold_notice(message: str):
 
 def get_notices():
     """Return all active notices and purge expired ones."""
-    global _notices
-    now = time.time()
-    _notices = [n for n in _notices if now - n["time"] <= NOTICE_DURATION]
+    _purge_notices(time.time())
     return [{"message": n["message"], "level": n["level"]} for n in _notices]
 
 
@@ -153,7 +355,14 @@ def status():
 
 def start_web_streaming():
     """Start Flask server (non-blocking)."""
-    # Disable the reloader when running inside a thread to avoid spawning
-    # additional processes.
-    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True,
-            use_reloader=False)
+    # Bind synchronously so the caller knows the port is ready, then serve from
+    # a daemon thread.  No reloader, so no additional processes are spawned.
+    server = make_server(WEB_HOST, WEB_PORT, app, threaded=True)
+
+    def serve():
+        # Request threads are spawned from here and inherit the web role
+        apply_thread_role("web")
+        server.serve_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
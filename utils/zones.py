@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+"""
+Polygon safe and restricted zones.
+
+Zones are stored with normalized polygon coordinates so they survive capture
+resolution changes.  Each zone is rasterized once per frame size into a
+shared uint8 mask where bit ``i`` marks zone ``i``; checking any number of
+face anchors is then a single fancy-indexing lookup.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+import sys
+sys.path.append('.')  # noqa
+
+from utils.defines import ZONES_FILE, ZONES_RELOAD_INTERVAL, MAX_ZONES
+from utils.log import log_info, log_warning
+
+ZONE_KINDS = ("safe", "restricted")
+ZONE_SEVERITIES = ("info", "warning", "critical")
+
+ZoneCheck = namedtuple("ZoneCheck", "any_inside any_outside outside_safe safe_severity restricted")
+
+
+def validate_zones(zones):
+    """
+    Return a cleaned copy of a list of zone definitions or raise ``ValueError``.
+
+    Each zone is ``{"name", "kind", "severity", "points"}`` with at least
+    three ``[x, y]`` points normalized to the frame size.
+    """
+    if not isinstance(zones, list):
+        raise ValueError("zones must be a list")
+    if len(zones) > MAX_ZONES:
+        raise ValueError(f"At most {MAX_ZONES} zones are supported")
+    cleaned = []
+    for zone in zones:
+        if not isinstance(zone, dict):
+            raise ValueError("zone must be an object")
+        name = str(zone.get("name", "")).strip()[:64]
+        kind = zone.get("kind", "safe")
+        severity = zone.get("severity", "critical")
+        if not name:
+            raise ValueError("zone name is required")
+        if kind not in ZONE_KINDS:
+            raise ValueError(f"Unknown zone kind: {kind}")
+        if severity not in ZONE_SEVERITIES:
+            raise ValueError(f"Unknown zone severity: {severity}")
+        try:
+            points = np.clip(np.array(zone.get("points"), dtype=np.float64), 0.0, 1.0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid points for zone {name}")
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError(f"Zone {name} needs at least three [x, y] points")
+        cleaned.append({"name": name, "kind": kind, "severity": severity,
+                        "points": points.round(4).tolist()})
+    return cleaned
+
+
+def band_zone(x1, x2):
+    """Safe zone covering the full height between two normalized x-coordinates."""
+    left, right = sorted((x1, x2))
+    return {"name": "Safe zone", "kind": "safe", "severity": "critical",
+            "points": [[left, 0.0], [right, 0.0], [right, 1.0], [left, 1.0]]}
+
+
+def is_band_zone(zone):
+    """True for a zone made by ``band_zone`` (legacy bounding lines) rather than drawn."""
+    points = zone["points"]
+    if zone["kind"] != "safe" or len(points) != 4:
+        return False
+    (l1, t1), (r1, t2), (r2, b1), (l2, b2) = points
+    return l1 == l2 and r1 == r2 and t1 == t2 == 0.0 and b1 == b2 == 1.0
+
+
+def pixel_polygons(zones, shape):
+    """``int32`` pixel polygons of ``zones`` for a frame shape."""
+    height, width = shape[:2]
+    scale = np.array([width - 1, height - 1])
+    return [np.round(np.array(zone["points"]) * scale).astype(np.int32) for zone in zones]
+
+
+class ZoneSet:
+    """
+    Current zone definitions with their rasterized masks.
+
+    ``update`` swaps in a new immutable state, so the detection loop can
+    keep reading while the web UI edits zones.  Definitions are persisted to
+    ``path`` and reloaded when the file is changed by hand.
+    """
+
+    def __init__(self, path=ZONES_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.checked = 0.0
+        self._state = ([], {})  # (zones, {(height, width): mask})
+        self.reload()
+
+    @property
+    def zones(self):
+        return self._state[0]
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        """Load the zone file if it exists and is valid."""
+        mtime = self._file_mtime()
+        self.mtime = mtime
+        if mtime is None:
+            return
+        try:
+            with open(self.path) as f:
+                zones = validate_zones(json.load(f))
+        except (OSError, ValueError) as e:
+            log_warning(f"Ignoring zone file {self.path}: {e}")
+            return
+        self._state = (zones, {})
+        log_info(f"Loaded {len(zones)} zone(s) from {self.path}")
+
+    def reload_if_changed(self):
+        """Pick up hand edits to the zone file, checking at most every ``ZONES_RELOAD_INTERVAL``."""
+        now = time.monotonic()
+        if now - self.checked < ZONES_RELOAD_INTERVAL:
+            return
+        self.checked = now
+        if self._file_mtime() != self.mtime:
+            with self.lock:
+                self.reload()
+
+    def update(self, zones):
+        """Validate, apply and persist new zone definitions."""
+        zones = validate_zones(zones)
+        with self.lock:
+            self._state = (zones, {})
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(zones, f, indent=2)
+            os.replace(tmp, self.path)
+            self.mtime = self._file_mtime()
+        return zones
+
+    def mask(self, shape):
+        """Return the uint8 zone bit mask for a frame shape, rasterizing it once."""
+        zones, masks = self._state
+        height, width = shape[:2]
+        mask = masks.get((height, width))
+        if mask is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            layer = np.empty_like(mask)
+            for i, polygon in enumerate(pixel_polygons(zones, shape)):
+                layer[:] = 0
+                cv2.fillPoly(layer, [polygon], 1 << i)
+                mask |= layer
+            masks[(height, width)] = mask
+        return mask
+
+    def polygons(self, shape):
+        """Pixel polygons of the current zones, e.g. for drawing them."""
+        return pixel_polygons(self.zones, shape)
+
+    def lookup(self, anchors, shape):
+        """Return the zone bits under each ``(x, y)`` pixel anchor."""
+        anchors = np.asarray(anchors, dtype=np.int64).reshape(-1, 2)
+        mask = self.mask(shape)
+        x = np.clip(anchors[:, 0], 0, mask.shape[1] - 1)
+        y = np.clip(anchors[:, 1], 0, mask.shape[0] - 1)
+        return mask[y, x]
+
+    def check(self, anchors, shape):
+        """
+        Classify face anchors against the zones.
+
+        An anchor is outside when safe zones exist and it lies in none of
+        them, or when it lies in a restricted zone.  ``restricted`` lists the
+        restricted zones containing at least one anchor; ``safe_severity`` is
+        the highest severity of the safe zones, which an anchor outside all of
+        them has left (``None`` without safe zones).
+        """
+        zones = self.zones
+        bits = self.lookup(anchors, shape)
+        safe_bits = sum(1 << i for i, zone in enumerate(zones) if zone["kind"] == "safe")
+        restricted_bits = sum(1 << i for i, zone in enumerate(zones) if zone["kind"] == "restricted")
+
+        outside_safe = (bits & safe_bits) == 0 if safe_bits else np.zeros(len(bits), dtype=bool)
+        intruding = bits & restricted_bits
+        outside = outside_safe | (intruding != 0)
+        hit = int(np.bitwise_or.reduce(intruding)) if len(intruding) else 0
+        safe_severities = [ZONE_SEVERITIES.index(zone["severity"]) for zone in zones if zone["kind"] == "safe"]
+        return ZoneCheck(
+            any_inside=bool((~outside).any()),
+            any_outside=bool(outside.any()),
+            outside_safe=bool(outside_safe.any()),
+            safe_severity=ZONE_SEVERITIES[max(safe_severities)] if safe_severities else None,
+            restricted=[zone for i, zone in enumerate(zones) if hit & (1 << i)],
+        )
+
+    def bounding_rect(self, shape):
+        """Pixel ``(x1, y1, x2, y2)`` around all zones, or ``None`` when there are none."""
+        zones = self.zones
+        if not zones:
+            return None
+        height, width = shape[:2]
+        points = np.concatenate([np.array(zone["points"]) for zone in zones]) * [width, height]
+        x1, y1 = points.min(axis=0)
+        x2, y2 = points.max(axis=0)
+        return x1, y1, x2, y2
@@ -1,4 +1,4 @@
-// Interactive bounding line selection and drawing
+// Interactive bounding line selection, polygon zone editing and drawing
 
 const overlay = document.getElementById('overlay');
 const stream = document.getElementById('stream');
@@ -9,18 +9,62 @@ const phoneLabel = document.getElementById('phoneLabel');
 const operatorLabel = document.getElementById('operatorLabel');
 const countLabel = document.getElementById('countLabel');
 const noticeBox = document.getElementById('notices');
+const profileSelect = document.getElementById('profileSelect');
+const zoneName = document.getElementById('zoneName');
+const zoneKind = document.getElementById('zoneKind');
+const zoneSeverity = document.getElementById('zoneSeverity');
+const drawZoneBtn = document.getElementById('drawZoneBtn');
+const finishZoneBtn = document.getElementById('finishZoneBtn');
+const clearZonesBtn = document.getElementById('clearZonesBtn');
 
 let setting = false;
 let points = [];
+let drawingZone = false;
+let zonePoints = [];  // normalized [x, y] corners of the zone being drawn
+let zones = [];
 
 function adjustCanvas() {
     overlay.width = stream.clientWidth;
     overlay.height = stream.clientHeight;
 }
 
+function cssVar(name) {
+    return getComputedStyle(document.documentElement).getPropertyValue(name);
+}
+
+function drawPolygon(corners, color, fill) {
+    if (!corners.length) return;
+    ctx.beginPath();
+    corners.forEach(([x, y], i) => {
+        const px = x * overlay.width;
+        const py = y * overlay.height;
+        if (i === 0) ctx.moveTo(px, py); else ctx.lineTo(px, py);
+    });
+    ctx.strokeStyle = color;
+    ctx.lineWidth = 3;
+    if (fill) {
+        ctx.closePath();
+        ctx.globalAlpha = 0.15;
+        ctx.fillStyle = color;
+        ctx.fill();
+        ctx.globalAlpha = 1;
+    }
+    ctx.stroke();
+}
+
 function drawLines() {
     ctx.clearRect(0, 0, overlay.width, overlay.height);
-    ctx.strokeStyle = getComputedStyle(document.documentElement).getPropertyValue('--primary-color');
+    zones.forEach((zone) => {
+        const color = cssVar(zone.kind === 'restricted' ? '--alert-color' : '--primary-color');
+        drawPolygon(zone.points, color, true);
+        const [x, y] = zone.points[0];
+        ctx.fillStyle = color;
+        ctx.font = '14px sans-serif';
+        ctx.fillText(zone.name, x * overlay.width + 4, y * overlay.height + 16);
+    });
+    drawPolygon(zonePoints, cssVar('--info-color'), false);
+
+    ctx.strokeStyle = cssVar('--primary-color');
     ctx.lineWidth = 4;
     points.forEach((x) => {
         ctx.beginPath();
@@ -30,29 +74,113 @@ function drawLines() {
     });
 }
 
+// Safe band from SET BOUNDS: full height between two vertical lines
+function isBandZone(zone) {
+    const p = zone.points;
+    return zone.kind === 'safe' && p.length === 4 &&
+        p[0][0] === p[3][0] && p[1][0] === p[2][0] &&
+        p[0][1] === 0 && p[1][1] === 0 && p[2][1] === 1 && p[3][1] === 1;
+}
+
+function loadZones() {
+    fetch('/zones')
+        .then(r => r.json())
+        .then(data => {
+            zones = data.zones || [];
+            drawLines();
+        })
+        .catch(() => { });
+}
+
+function saveZones(newZones) {
+    return fetch('/zones', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ zones: newZones })
+    })
+        .then(r => r.json())
+        .then(data => {
+            if (data.status === 'ok') {
+                zones = data.zones;
+                message.textContent = '';
+            } else {
+                message.textContent = data.message || 'Could not save zones';
+            }
+            drawLines();
+        });
+}
+
 btn.addEventListener('click', () => {
     setting = true;
+    drawingZone = false;
     points = [];
+    zonePoints = [];
+    // Only the band is replaced; drawn zones stay
+    zones = zones.filter(zone => !isBandZone(zone));
     message.textContent = 'Set the bounding lines by clicking on the camera feed';
     fetch('/reset_bounds', { method: 'POST' });
     drawLines();
 });
 
+drawZoneBtn.addEventListener('click', () => {
+    setting = false;
+    drawingZone = true;
+    points = [];
+    zonePoints = [];
+    message.textContent = 'Click the corners of the zone, then FINISH ZONE';
+    drawLines();
+});
+
+finishZoneBtn.addEventListener('click', () => {
+    if (!drawingZone) return;
+    if (zonePoints.length < 3) {
+        message.textContent = 'A zone needs at least three corners';
+        return;
+    }
+    const zone = {
+        name: zoneName.value.trim() || 'Zone ' + (zones.length + 1),
+        kind: zoneKind.value,
+        severity: zoneSeverity.value,
+        points: zonePoints
+    };
+    drawingZone = false;
+    zonePoints = [];
+    saveZones(zones.concat([zone]));
+});
+
+clearZonesBtn.addEventListener('click', () => {
+    drawingZone = false;
+    zonePoints = [];
+    saveZones([]);
+});
+
 overlay.addEventListener('click', (e) => {
-    if (!setting) return;
     const rect = overlay.getBoundingClientRect();
     const x = e.clientX - rect.left;
+    const y = e.clientY - rect.top;
+    if (drawingZone) {
+        zonePoints.push([x / overlay.width, y / overlay.height]);
+        drawLines();
+        return;
+    }
+    if (!setting) return;
     points.push(x);
     drawLines();
     if (points.length === 2) {
         setting = false;
         const x1Norm = points[0] / overlay.width;
         const x2Norm = points[1] / overlay.width;
+        points = [];
         fetch('/set_bounds', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ x1: x1Norm, x2: x2Norm })
-        });
+        })
+            .then(r => r.json())
+            .then(data => {
+                if (data.status !== 'ok') message.textContent = data.message || 'Could not set bounds';
+                loadZones();
+            });
         message.textContent = '';
     }
 });
@@ -62,6 +190,10 @@ window.addEventListener('resize', () => {
     drawLines();
 });
 
+profileSelect.addEventListener('change', () => {
+    stream.src = '/video_feed?profile=' + encodeURIComponent(profileSelect.value);
+});
+
 stream.addEventListener('load', () => {
     adjustCanvas();
     drawLines();
@@ -102,4 +234,5 @@ function pollStatus() {
 }
 
 adjustCanvas();
+loadZones();
 pollStatus();
\ No newline at end of file